@@ -0,0 +1,370 @@
+"""
+Career, season and split totals per player, kept in player_career_totals,
+player_season_totals and player_split_totals.
+
+Split totals are per player, season and team, and per split key of each
+SPLIT_DIMENSIONS (ex: dimension "opponent", key "TOR"), so split queries read
+a few rollup rows instead of scanning game rows.
+
+DatabaseHelper.ingest_stats() applies the change of each ingested stat row to all
+three tables in the same transaction as the rows themselves, so totals never have to be
+recomputed from the stats table when they are read. This module holds the delta
+arithmetic, plus a check and a full rebuild from the stats table for data loaded
+some other way (ex: bulk SQL loads).
+
+Run from the backend directory:
+    python -m aggregates verify
+    python -m aggregates rebuild
+"""
+
+import argparse
+from collections import defaultdict
+from datetime import datetime
+
+from pony.orm import db_session, select
+
+from db_connection import db, init_db
+from db_models.entities import (
+    PlayerCareerTotals,
+    PlayerSeasonTotals,
+    PlayerSplitTotals,
+    Stat,
+)
+
+# The counters of both aggregate tables, in column order.
+COUNTERS = (
+    "games",
+    "goals",
+    "assists",
+    "points",
+    "shots",
+    "pim",
+    "plus_minus",
+    "power_play_goals",
+    "power_play_points",
+    "shorthanded_goals",
+    "shorthanded_points",
+    "game_winning_goals",
+    "toi_seconds",
+)
+
+# Counters summed straight from the Stat column of the same name.
+_SUMMED = (
+    "goals",
+    "assists",
+    "points",
+    "shots",
+    "pim",
+    "plus_minus",
+    "power_play_goals",
+    "power_play_points",
+    "shorthanded_goals",
+    "shorthanded_points",
+)
+
+# Totals of stats missing a key value (ex: no team) are kept under this key.
+UNKNOWN = "?"
+
+
+def toi_seconds(value):
+    """
+    Converts a "mm:ss" time on ice string to seconds. Missing values count as 0.
+    """
+    if not value or ":" not in value:
+        return 0
+    minutes, _, seconds = value.partition(":")
+    return int(minutes) * 60 + int(seconds)
+
+
+def stat_counters(stat: dict):
+    """
+    Gets what one game stat row adds to its player's totals.
+
+    Parameters:
+        stat: A dictionary of Stat column:value pairs.
+
+    Returns:
+        A dictionary of COUNTERS name -> value.
+    """
+    counters = {name: stat.get(name) or 0 for name in _SUMMED}
+    counters["games"] = 1
+    counters["game_winning_goals"] = 1 if stat.get("game_winning_goal") else 0
+    counters["toi_seconds"] = toi_seconds(stat.get("toi"))
+    return counters
+
+
+def _month(value):
+    return value.strftime("%Y-%m") if value else UNKNOWN
+
+
+def _home_road(value):
+    return {True: "home", False: "road"}.get(value, UNKNOWN)
+
+
+# Split dimension -> (function of a stat row giving its split key, the same in SQL).
+SPLIT_DIMENSIONS = {
+    "opponent": (
+        lambda stat: stat.get("opponent_abbr") or UNKNOWN,
+        f"COALESCE(opponent_abbr, '{UNKNOWN}')",
+    ),
+    "home_road": (
+        lambda stat: _home_road(stat.get("home_road_flag")),
+        "CASE WHEN home_road_flag THEN 'home' WHEN NOT home_road_flag THEN 'road'"
+        f" ELSE '{UNKNOWN}' END",
+    ),
+    "month": (
+        lambda stat: _month(stat.get("game_date")),
+        f"COALESCE(to_char(game_date, 'YYYY-MM'), '{UNKNOWN}')",
+    ),
+}
+
+_TEAM_SQL = f"COALESCE(team_abbr, '{UNKNOWN}')"
+
+# Aggregate table -> (key columns, one tuple of SQL key expressions per source query).
+_TABLES = {
+    PlayerCareerTotals: (("player",), [("player",)]),
+    PlayerSeasonTotals: (
+        ("player", "season", "team_abbr"),
+        [("player", "season", _TEAM_SQL)],
+    ),
+    PlayerSplitTotals: (
+        ("player", "season", "team_abbr", "dimension", "split_key"),
+        [
+            ("player", "season", _TEAM_SQL, f"'{dimension}'", key_sql)
+            for dimension, (_, key_sql) in SPLIT_DIMENSIONS.items()
+        ],
+    ),
+}
+
+
+def aggregate_keys(stat: dict):
+    """
+    Gets the keys of the totals a stat row counts towards.
+
+    Returns:
+        A dictionary of aggregate entity -> list of keys in its key column order
+        (ex: PlayerSeasonTotals -> [(player_id, season, team_abbr)]), or None if the
+        row has no player.
+    """
+    player = stat.get("player")
+    if player is None:
+        return None
+    season = (player, stat["season"], stat.get("team_abbr") or UNKNOWN)
+    return {
+        PlayerCareerTotals: [(player,)],
+        PlayerSeasonTotals: [season],
+        PlayerSplitTotals: [
+            season + (dimension, split_key(stat))
+            for dimension, (split_key, _) in SPLIT_DIMENSIONS.items()
+        ],
+    }
+
+
+class AggregateDeltas:
+    """
+    Accumulates the changes to the career, season and split totals of a batch of
+    stat rows.
+    """
+
+    def __init__(self):
+        self.deltas = {
+            entity: defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+            for entity in _TABLES
+        }
+
+    def add(self, stat: dict, sign=1):
+        """
+        Adds (sign=1) or removes (sign=-1) a stat row's counters.
+        """
+        keys = aggregate_keys(stat)
+        if keys is None:
+            return
+        counters = stat_counters(stat)
+        for entity, entity_keys in keys.items():
+            for key in entity_keys:
+                totals = self.deltas[entity][key]
+                for name, value in counters.items():
+                    totals[name] += sign * value
+
+    def apply(self):
+        """
+        Adds the accumulated changes to the aggregate rows. Call inside the
+        db_session writing the stat rows.
+
+        Returns:
+            A dictionary of aggregate table name -> number of keys changed.
+        """
+        now = datetime.now()
+        report = {}
+        for entity, deltas in self.deltas.items():
+            columns = _TABLES[entity][0]
+            rows = _touched_rows(entity, columns, deltas)
+            for key, delta in deltas.items():
+                _apply_delta(entity, rows.get(key), delta, now, dict(zip(columns, key)))
+            report[entity._table_] = len(deltas)
+        return report
+
+
+def sum_splits(rows):
+    """
+    Adds up split total rows by split key.
+
+    Parameters:
+        rows: PlayerSplitTotals rows of one dimension (ex: a player's seasons, or a
+            team's players).
+
+    Returns:
+        A list of dictionaries of split_key and COUNTERS name -> value, by split key.
+    """
+    splits = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for row in rows:
+        totals = splits[row.split_key]
+        for name in COUNTERS:
+            totals[name] += getattr(row, name)
+    return [{"split_key": key, **splits[key]} for key in sorted(splits)]
+
+
+def _touched_rows(entity, columns, keys):
+    """
+    Selects the aggregate rows of the given keys, so the rows read grow with the
+    batch rather than with the players' careers.
+
+    Each key column is filtered on the values it takes in keys, which can match a
+    few rows of other keys (ex: another of the batch's seasons); those are dropped.
+
+    Returns:
+        A dictionary of key -> row, for the keys that have a row.
+    """
+    if not keys:
+        return {}
+    values = {
+        column: list({key[i] for key in keys}) for i, column in enumerate(columns)
+    }
+    players = values.pop("player")
+    query = select(r for r in entity if r.player.id in players)
+    for column, column_values in values.items():
+        query = query.filter(lambda r: getattr(r, column) in column_values)
+    rows = {_key(row, columns): row for row in query}
+    return {key: row for key, row in rows.items() if key in keys}
+
+
+def _key(row, columns):
+    return tuple(
+        row.player.id if column == "player" else getattr(row, column)
+        for column in columns
+    )
+
+
+def _apply_delta(entity, row, delta, now, key):
+    if not any(delta.values()):
+        return
+    if row is None:
+        entity(**key, **delta, updated_at=now)
+        return
+    for name, value in delta.items():
+        if value:
+            setattr(row, name, getattr(row, name) + value)
+    if row.games <= 0:
+        row.delete()  # every stat row it counted moved elsewhere
+    else:
+        row.updated_at = now
+
+
+def _totals_sql(keys):
+    """
+    Builds the SELECT computing totals from the stats table, grouped by the SQL key
+    expressions keys.
+    """
+    sums = ",\n".join(f"    COALESCE(SUM({name}), 0)" for name in _SUMMED)
+    groups = ", ".join(str(i + 1) for i in range(len(keys)))
+    return f"""
+SELECT {", ".join(keys)},
+    COUNT(*),
+{sums},
+    COUNT(*) FILTER (WHERE game_winning_goal),
+    COALESCE(SUM(CASE WHEN position(':' in toi) > 0
+        THEN split_part(toi, ':', 1)::int * 60 + split_part(toi, ':', 2)::int
+        ELSE 0 END), 0)
+FROM {Stat._table_}
+WHERE player IS NOT NULL
+GROUP BY {groups}
+"""
+
+
+def _expected_sql(queries):
+    return "\nUNION ALL\n".join(_totals_sql(keys) for keys in queries)
+
+
+@db_session
+def verify():
+    """
+    Compares the aggregate tables to totals recomputed from the stats table.
+
+    Returns:
+        A dictionary of table name -> {"missing", "extra", "different"}: the number
+        of keys with stats but no row, rows without stats, and rows whose counters differ.
+    """
+    report = {}
+    for entity, (columns, queries) in _TABLES.items():
+        size = len(columns)
+        expected = {
+            tuple(row[:size]): tuple(row[size:])
+            for row in db.db.select(_expected_sql(queries))
+        }
+        stored_columns = ", ".join(columns + COUNTERS)
+        stored = {
+            tuple(row[:size]): tuple(row[size:])
+            for row in db.db.select(f"SELECT {stored_columns} FROM {entity._table_}")
+        }
+        report[entity._table_] = {
+            "missing": len(expected.keys() - stored.keys()),
+            "extra": len(stored.keys() - expected.keys()),
+            "different": sum(
+                1 for k in expected.keys() & stored.keys() if expected[k] != stored[k]
+            ),
+        }
+    return report
+
+
+@db_session
+def rebuild():
+    """
+    Replaces the aggregate tables with totals recomputed from the stats table,
+    in one transaction.
+
+    Returns:
+        A dictionary of table name -> rows written.
+    """
+    report = {}
+    for entity, (columns, queries) in _TABLES.items():
+        insert_columns = ", ".join(columns + COUNTERS + ("updated_at",))
+        db.db.execute(f"DELETE FROM {entity._table_}")
+        db.db.execute(
+            f"INSERT INTO {entity._table_} ({insert_columns})\n"
+            f"SELECT *, now() FROM ({_expected_sql(queries)}) totals"
+        )
+        report[entity._table_] = db.db.select(f"SELECT COUNT(*) FROM {entity._table_}")[
+            0
+        ]
+    return report
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Checks or rebuilds the career and season totals tables."
+    )
+    arg_parser.add_argument("command", choices=["verify", "rebuild"])
+    args = arg_parser.parse_args(argv)
+
+    init_db()
+    if args.command == "rebuild":
+        print(rebuild())
+        return 0
+
+    report = verify()
+    print(report)
+    return 1 if any(any(counts.values()) for counts in report.values()) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,44 @@
+"""
+Times league-wide player analytics for a full season of synthetic game stats.
+
+Rows are built in the shape DatabaseHelper.get_stat_rows() returns, so the timings
+cover loading them into columns (to_columns) and computing every player's metrics
+(summarize), but not the database query itself.
+
+Run from the backend directory:
+    python -m benchmarks.bench_analytics
+"""
+
+import argparse
+from time import perf_counter
+
+from analytics import STAT_COLUMNS, summarize, to_columns
+from benchmarks.synthetic import generate_league, iter_stats
+
+
+def run(scale, repeat):
+    league = generate_league(scale=scale)
+    rows = [tuple(stat[name] for name in STAT_COLUMNS) for stat in iter_stats(league)]
+
+    load, compute = [], []
+    for _ in range(repeat):
+        start = perf_counter()
+        columns = to_columns(rows)
+        loaded = perf_counter()
+        players = summarize(columns)
+        load.append(loaded - start)
+        compute.append(perf_counter() - loaded)
+
+    print(f"{len(rows)} stat rows, {len(players)} players")
+    print(f"{'step':<12}{'best (ms)':>12}")
+    print(f"{'to_columns':<12}{min(load) * 1000:>12.1f}")
+    print(f"{'summarize':<12}{min(compute) * 1000:>12.1f}")
+    print(f"{'total':<12}{min(a + b for a, b in zip(load, compute)) * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--scale", type=int, default=1)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+    run(args.scale, args.repeat)
@@ -0,0 +1,225 @@
+"""
+Benchmarks DatabaseConnection, DatabaseHelper and the HTTP routes on synthetic league data.
+
+For each scale the benchmark database is dropped and recreated, loaded with a
+synthetic league (see benchmarks/synthetic.py) and every operation is timed.
+The NHL API is replaced by FakeNHLClient, so no network access is needed.
+Results are stored under benchmarks/results/ and compared against
+benchmarks/baselines/bench_db-<scale>x.json when it exists.
+
+WARNING: this drops every table in the target database. It refuses to run against
+a database whose name doesn't contain "bench".
+
+Run from the backend directory against a local Postgres:
+    BENCH_DB_NAME=nhltrak_bench python -m benchmarks.bench_db --scales 1,10,100
+    python -m benchmarks.bench_db --scales 1 --save-baseline
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+from itertools import islice
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from benchmarks import harness
+from benchmarks.fake_nhl import FakeNHLClient
+from benchmarks.synthetic import generate_league, iter_stats
+
+# Tables in foreign key order. Stats are generated lazily and loaded last.
+LOAD_ORDER = ["conferences", "divisions", "teams", "players", "player_team_seasons"]
+
+
+def _insert_rows(cursor, table, rows, batch_size=5000):
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+
+    columns = list(first)
+    statement = f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s"
+    count = 0
+    batch = [first, *islice(rows, batch_size - 1)]
+    while batch:
+        execute_values(
+            cursor, statement, [tuple(row[c] for c in columns) for row in batch]
+        )
+        count += len(batch)
+        batch = list(islice(rows, batch_size))
+    return count
+
+
+def load_league(db, league):
+    """
+    Bulk loads a synthetic league with execute_values on a dedicated connection.
+
+    Parameters:
+        db: The connected DatabaseConnection.
+        league: A league dictionary from synthetic.generate_league().
+
+    Returns:
+        A dictionary of table name -> rows loaded.
+    """
+    connection = psycopg2.connect(
+        user=db.user,
+        password=db.password,
+        host=db.host,
+        port=db.port,
+        dbname=db.database,
+    )
+    counts = {}
+    try:
+        with connection, connection.cursor() as cursor:
+            for table in LOAD_ORDER:
+                counts[table] = _insert_rows(cursor, table, league[table])
+            counts["stats"] = _insert_rows(cursor, "stats", iter_stats(league))
+    finally:
+        connection.close()
+    return counts
+
+
+def build_operations(db, db_helper, client, league):
+    """
+    Builds the named operations to time.
+
+    Returns:
+        A dictionary of operation name -> callable taking no arguments.
+    """
+    from db_models.entities import Player, Team
+    import rosters
+
+    rng = random.Random(1)
+    teams = league["teams"]
+    players = league["players"]
+    season = league["seasons"][-1]
+
+    def random_team():
+        return rng.choice(teams)
+
+    def update_team_roster():
+        team = random_team()
+        asyncio.run(rosters.update_team_roster(team["id"], team["abbr"], season))
+
+    return {
+        "get_all[Team]": lambda: db.get_all(Team),
+        "get_all[Player, position=C]": lambda: db.get_all(Player, position="C"),
+        "search_by_any_field[Team]": lambda: db.search_by_any_field(
+            Team, random_team()["common_name"], ["name", "common_name", "abbr"]
+        ),
+        "search_by_any_field[Player]": lambda: db.search_by_any_field(
+            Player, rng.choice(players)["last_name"], ["first_name", "last_name"]
+        ),
+        "to_dict_with_relations[Team]": lambda: db.get_one_by_id_with_relations(
+            Team,
+            random_team()["id"],
+            relation_fields={
+                "division": ["abbr", "name"],
+                "conference": ["abbr", "name"],
+            },
+        ),
+        "get_all_with_relations[Team]": lambda: db.get_all_with_relations(
+            Team,
+            relation_fields={
+                "division": ["abbr", "name"],
+                "conference": ["abbr", "name"],
+            },
+        ),
+        "get_team_roster": lambda: db_helper.get_team_roster(
+            random_team()["id"], season
+        ),
+        "update_team_roster (fake upstream)": update_team_roster,
+        "GET /teams/": lambda: client.get("/teams/"),
+        "GET /teams/id/": lambda: client.get(
+            "/teams/id/", params={"id": random_team()["id"]}
+        ),
+        "GET /players/players_by_team_id/": lambda: client.get(
+            "/players/players_by_team_id/",
+            params={"id": random_team()["id"], "season": season},
+        ),
+        "GET /players/players_by_team_name/": lambda: client.get(
+            "/players/players_by_team_name/",
+            params={"name": random_team()["abbr"], "season": season},
+        ),
+    }
+
+
+def run_scale(db, scale, seasons, iterations, max_seconds, save_baseline):
+    from fastapi.testclient import TestClient
+
+    from main import app, db_helper
+    from nhl import set_nhl_client
+    from response_cache import response_cache
+
+    print(f"\n=== scale {scale}x, {seasons} season(s) ===")
+    db.drop_all_tables()
+    db.create_tables()
+    response_cache.invalidate()
+
+    league = generate_league(scale=scale, seasons=seasons)
+    counts = load_league(db, league)
+    print("loaded " + ", ".join(f"{table}={rows}" for table, rows in counts.items()))
+
+    set_nhl_client(FakeNHLClient(league))
+
+    results = {}
+    with TestClient(app) as client:
+        for name, operation in build_operations(db, db_helper, client, league).items():
+            samples = harness.time_operation(
+                operation, iterations=iterations, max_seconds=max_seconds
+            )
+            results[name] = harness.summarize(samples)
+
+    name = f"bench_db-{scale}x"
+    path = harness.save_results(
+        name, results, meta={"scale": scale, "seasons": seasons, "rows": counts}
+    )
+
+    baseline_file = harness.baseline_path(name)
+    baseline = harness.load_results(baseline_file) if baseline_file.exists() else None
+    harness.print_report(results, baseline)
+    print(f"results: {path}")
+
+    if save_baseline:
+        print(f"baseline: {harness.save_baseline(name, path)}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--scales", default="1,10")
+    arg_parser.add_argument("--seasons", type=int, default=1)
+    arg_parser.add_argument("--iterations", type=int, default=200)
+    arg_parser.add_argument("--max-seconds", type=float, default=10.0)
+    arg_parser.add_argument("--save-baseline", action="store_true")
+    args = arg_parser.parse_args()
+
+    from db_connection import db, init_db
+
+    database = os.environ.get("BENCH_DB_NAME", "nhltrak_bench")
+    if "bench" not in database:
+        sys.exit(f"refusing to drop tables in '{database}': name must contain 'bench'")
+
+    init_db(
+        user=os.environ.get("BENCH_DB_USER"),
+        password=os.environ.get("BENCH_DB_PASSWORD"),
+        host=os.environ.get("BENCH_DB_HOST"),
+        port=os.environ.get("BENCH_DB_PORT"),
+        database=database,
+        create_tables=True,
+    )
+
+    for scale in (int(value) for value in args.scales.split(",")):
+        run_scale(
+            db,
+            scale,
+            args.seasons,
+            args.iterations,
+            args.max_seconds,
+            args.save_baseline,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compares the old and new JSON encoding paths on roster and all-teams payloads.
+
+The old path is what a route returning a dictionary went through: the route's own
+jsonable_encoder call, FastAPI's jsonable_encoder pass in serialize_response, and
+finally json.dumps in JSONResponse.render. The new path is a single orjson call in
+FastJSONResponse.render.
+
+Run from the backend directory:
+    python -m benchmarks.bench_encoding
+"""
+
+import argparse
+import timeit
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from responses import FastJSONResponse
+
+POSITIONS = ["C", "L", "R", "D", "G"]
+
+
+def make_roster(size=30):
+    """
+    Builds a roster payload shaped like the /players/players_by_team_id/ response.
+    """
+    now = datetime.now()
+    roster = [
+        {
+            "id": 8470000 + i,
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "position": POSITIONS[i % len(POSITIONS)],
+            "birth_city": "Detroit",
+            "birth_country": "USA",
+            "birth_province_state": "Michigan",
+            "shoots_catches": "L",
+            "height_in_centimeters": 185,
+            "height_in_inches": 73,
+            "weight_in_kilograms": 90,
+            "weight_in_pounds": 198,
+            "headshot": f"https://assets.nhle.com/mugs/nhl/20252026/DET/{8470000 + i}.png",
+            "sweater_number": i,
+            "games_played": 40 + i,
+            "last_updated": now - timedelta(minutes=i),
+        }
+        for i in range(size)
+    ]
+    return {"roster": roster, "count": len(roster)}
+
+
+def make_teams(size=32):
+    """
+    Builds a payload shaped like the /teams/ response.
+    """
+    teams = [
+        {
+            "id": i,
+            "abbr": f"T{i:02d}",
+            "common_name": f"Team {i}",
+            "name": f"City Team {i}",
+            "logo": f"https://assets.nhle.com/logos/nhl/svg/T{i:02d}_light.svg",
+            "division": {"name": f"Division {i % 4}", "abbr": f"D{i % 4}"},
+            "conference": {"name": f"Conference {i % 2}", "abbr": f"C{i % 2}"},
+        }
+        for i in range(size)
+    ]
+    return {"teams": teams, "count": len(teams)}
+
+
+def old_path(payload):
+    return JSONResponse(jsonable_encoder(jsonable_encoder(payload))).body
+
+
+def new_path(payload):
+    return FastJSONResponse(payload).body
+
+
+def run(number):
+    payloads = {"roster": make_roster(), "all_teams": make_teams()}
+
+    print(f"{'payload':<12}{'old (us)':>12}{'new (us)':>12}{'speedup':>10}")
+    for name, payload in payloads.items():
+        old = min(timeit.repeat(lambda: old_path(payload), number=number, repeat=5))
+        new = min(timeit.repeat(lambda: new_path(payload), number=number, repeat=5))
+        old_us = old / number * 1e6
+        new_us = new / number * 1e6
+        print(f"{name:<12}{old_us:>12.1f}{new_us:>12.1f}{old_us / new_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--number", type=int, default=2000)
+    run(arg_parser.parse_args().number)
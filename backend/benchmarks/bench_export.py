@@ -0,0 +1,118 @@
+"""
+Compares exporting a season of stats through the JSON list path against the
+Arrow IPC and Parquet export path.
+
+The JSON path is what GET /players/stats/ does: every row becomes a dictionary,
+the whole list is kept, and it is encoded in one piece. The export path converts
+batches of row tuples to Arrow record batches and writes each one out before
+reading the next. Rows are built up front in the shape the database cursor
+returns, so only the conversion and encoding are timed and measured.
+
+Run from the backend directory:
+    python -m benchmarks.bench_export
+"""
+
+import argparse
+import tracemalloc
+from time import perf_counter
+
+from benchmarks.synthetic import generate_league, iter_stats
+from responses import encode_json
+
+try:
+    import pyarrow as pa
+
+    from export import write_batches
+except ImportError:
+    pa = None
+
+STAT_COLUMNS = (
+    "id",
+    "assists",
+    "common_name",
+    "game_winning_goal",
+    "goals",
+    "home_road_flag",
+    "opponent_abbr",
+    "opponent_common_name",
+    "ot_goals",
+    "pim",
+    "plus_minus",
+    "points",
+    "power_play_goals",
+    "power_play_points",
+    "shifts",
+    "shorthanded_goals",
+    "shorthanded_points",
+    "shots",
+    "team_abbr",
+    "toi",
+    "game_date",
+    "player",
+    "game_id",
+    "season",
+)
+
+
+def json_path(rows, batch_size):
+    stats = [dict(zip(STAT_COLUMNS, row)) for row in rows]
+    return len(encode_json({"stats": stats, "count": len(stats)}))
+
+
+def export_path(fmt, schema):
+    def export(rows, batch_size):
+        batches = (rows[i : i + batch_size] for i in range(0, len(rows), batch_size))
+        return sum(len(chunk) for chunk in write_batches(batches, fmt, schema))
+
+    return export
+
+
+def measure(fn, rows, batch_size):
+    """
+    Times fn, then runs it again under tracemalloc (which slows allocations down)
+    to get its peak memory.
+
+    Returns:
+        A tuple of (output bytes, seconds, peak bytes allocated).
+    """
+    start = perf_counter()
+    size = fn(rows, batch_size)
+    elapsed = perf_counter() - start
+
+    tracemalloc.start()
+    fn(rows, batch_size)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+def run(scale, batch_size):
+    rows = [
+        tuple(stat[name] for name in STAT_COLUMNS)
+        for stat in iter_stats(generate_league(scale=scale))
+    ]
+    paths = {"json": json_path}
+    if pa is not None:
+        # Inferred from the rows, as export_schema() needs the entity mappings.
+        sample = list(zip(*rows[:1000]))
+        schema = pa.schema(
+            [pa.field(n, pa.array(c).type) for n, c in zip(STAT_COLUMNS, sample)]
+        )
+        paths["arrow"] = export_path("arrow", schema)
+        paths["parquet"] = export_path("parquet", schema)
+
+    print(f"{len(rows)} stat rows, batches of {batch_size}")
+    print(f"{'path':<10}{'size (MB)':>12}{'time (ms)':>12}{'peak (MB)':>12}")
+    for name, fn in paths.items():
+        size, elapsed, peak = measure(fn, rows, batch_size)
+        print(
+            f"{name:<10}{size / 1e6:>12.2f}{elapsed * 1000:>12.1f}{peak / 1e6:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--scale", type=int, default=1)
+    arg_parser.add_argument("--batch-size", type=int, default=10000)
+    args = arg_parser.parse_args()
+    run(args.scale, args.batch_size)
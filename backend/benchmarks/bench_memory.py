@@ -0,0 +1,140 @@
+"""
+Compares the memory held by a full-league, multi-season roster cache built from
+dictionaries against the same cache built from RosterEntry and TeamRecord records.
+
+Rows are built the way the database driver hands them over: every string is a
+separate object, so the dictionary cache pays for each copy while the records
+intern the repeated ones. Both caches must encode to the same JSON.
+
+Run from the backend directory:
+    python -m benchmarks.bench_memory
+"""
+
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime, timedelta
+
+from records import ROSTER_FIELDS, RosterEntry, TeamRecord
+from responses import encode_json
+
+POSITIONS = ["C", "L", "R", "D", "G"]
+COUNTRIES = ["CAN", "USA", "SWE", "FIN", "CZE", "RUS"]
+CITIES = ["Toronto", "Detroit", "Stockholm", "Helsinki", "Prague", "Moscow"]
+UPDATED = datetime(2026, 1, 1)
+
+
+def _copy(value: str):
+    # A fresh string object, as a driver would return for each row.
+    return "".join(list(value))
+
+
+def make_rows(teams, seasons, players):
+    """
+    Builds the raw team and roster rows of a league.
+
+    Returns:
+        A tuple of (team rows, {(team_id, season): roster rows}).
+    """
+    team_rows = [
+        (
+            i,
+            _copy(f"T{i:02d}"),
+            f"Team {i}",
+            f"City Team {i}",
+            f"https://assets.nhle.com/logos/nhl/svg/T{i:02d}_light.svg",
+            _copy(f"D{i % 4}"),
+            _copy(f"C{i % 2}"),
+        )
+        for i in range(teams)
+    ]
+    roster_rows = {}
+    for team in range(teams):
+        for season in range(2015, 2015 + seasons):
+            key = (team, f"{season}{season + 1}")
+            roster_rows[key] = [
+                (
+                    8470000 + team * 100 + i,
+                    f"First{i}",
+                    f"Last{team}-{i}",
+                    _copy(POSITIONS[i % len(POSITIONS)]),
+                    _copy(CITIES[i % len(CITIES)]),
+                    _copy(COUNTRIES[i % len(COUNTRIES)]),
+                    _copy("Ontario") if i % 3 == 0 else None,
+                    _copy("L" if i % 2 else "R"),
+                    185,
+                    73,
+                    90,
+                    198,
+                    f"https://assets.nhle.com/mugs/nhl/{key[1]}/T{team:02d}/{i}.png",
+                    i,
+                    40 + i,
+                    UPDATED - timedelta(minutes=i),
+                )
+                for i in range(players)
+            ]
+    return team_rows, roster_rows
+
+
+def dict_cache(team_rows, roster_rows):
+    team_keys = ("id", "abbr", "common_name", "name", "logo", "division", "conference")
+    return (
+        [dict(zip(team_keys, row)) for row in team_rows],
+        {
+            key: [dict(zip(ROSTER_FIELDS, row)) for row in rows]
+            for key, rows in roster_rows.items()
+        },
+    )
+
+
+def record_cache(team_rows, roster_rows):
+    return (
+        [TeamRecord(*row) for row in team_rows],
+        {
+            key: [RosterEntry.from_row(row) for row in rows]
+            for key, rows in roster_rows.items()
+        },
+    )
+
+
+def measure(build, teams, seasons, players):
+    """
+    Builds a cache from freshly made rows and measures what it keeps once the rows
+    are freed, so strings the records dropped by interning are not counted.
+
+    Returns:
+        A tuple of (the built cache, the bytes it holds).
+    """
+    gc.collect()
+    tracemalloc.start()
+    team_rows, roster_rows = make_rows(teams, seasons, players)
+    cache = build(team_rows, roster_rows)
+    del team_rows, roster_rows
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return cache, used
+
+
+def run(teams, seasons, players):
+    entries = teams * seasons * players
+    dicts, dict_bytes = measure(dict_cache, teams, seasons, players)
+    records, record_bytes = measure(record_cache, teams, seasons, players)
+
+    key = (0, "20152016")
+    assert encode_json(dicts[1][key]) == encode_json(records[1][key])
+
+    print(f"{teams} teams x {seasons} seasons x {players} players = {entries} entries")
+    print(f"{'cache':<10}{'total (MB)':>12}{'per entry (B)':>16}")
+    for name, size in (("dicts", dict_bytes), ("records", record_bytes)):
+        print(f"{name:<10}{size / 1e6:>12.2f}{size / entries:>16.0f}")
+    print(f"records use {record_bytes / dict_bytes:.0%} of the dictionary cache")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--teams", type=int, default=32)
+    arg_parser.add_argument("--seasons", type=int, default=10)
+    arg_parser.add_argument("--players", type=int, default=30)
+    args = arg_parser.parse_args()
+    run(args.teams, args.seasons, args.players)
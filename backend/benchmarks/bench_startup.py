@@ -0,0 +1,96 @@
+"""
+Measures worker import time with `python -X importtime` and checks it against a baseline.
+
+Each run imports main in a fresh interpreter, parses the importtime report, and
+fails (exit code 1) when the median cumulative import time of main exceeds the
+stored baseline by more than the allowed tolerance.
+
+Run from the backend directory:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --update-baseline
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "startup.json"
+
+
+def measure_import(module="main"):
+    """
+    Imports a module in a fresh interpreter with -X importtime.
+
+    Parameters:
+        module: The module to import.
+            (default: "main")
+
+    Returns:
+        A dictionary mapping each imported module to its (self, cumulative) time in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def run(runs, top, tolerance, update_baseline):
+    samples = [measure_import() for _ in range(runs)]
+    totals = [timings["main"][1] / 1000 for timings in samples]
+    median_ms = statistics.median(totals)
+
+    print(f"import main: median {median_ms:.1f}ms over {runs} runs")
+    print("\nslowest imports (cumulative, last run):")
+    slowest = sorted(samples[-1].items(), key=lambda item: item[1][1], reverse=True)
+    for name, (_, cumulative_us) in slowest[:top]:
+        print(f"  {cumulative_us / 1000:>8.1f}ms  {name}")
+
+    if update_baseline:
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps({"main_ms": round(median_ms, 1)}, indent=2))
+        print(f"\nbaseline updated: {BASELINE_PATH}")
+        return 0
+
+    if not BASELINE_PATH.exists():
+        print("\nno baseline stored, run with --update-baseline")
+        return 0
+
+    baseline_ms = json.loads(BASELINE_PATH.read_text())["main_ms"]
+    limit_ms = baseline_ms * (1 + tolerance)
+    print(f"\nbaseline {baseline_ms:.1f}ms, limit {limit_ms:.1f}ms")
+    if median_ms > limit_ms:
+        print("FAIL: import time regressed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--runs", type=int, default=5)
+    arg_parser.add_argument("--top", type=int, default=15)
+    arg_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed regression over the baseline (default: 0.25, i.e. 25%%)",
+    )
+    arg_parser.add_argument("--update-baseline", action="store_true")
+    args = arg_parser.parse_args()
+    sys.exit(run(args.runs, args.top, args.tolerance, args.update_baseline))
@@ -0,0 +1,123 @@
+"""
+In-memory stand-in for NHLClient, serving upstream-shaped payloads built from
+synthetic league data.
+"""
+
+import time
+
+POSITION_GROUPS = {"C": "forwards", "L": "forwards", "R": "forwards", "D": "defensemen"}
+
+
+def to_upstream_player(player):
+    """
+    Converts a synthetic player row to the shape returned by players_by_team().
+    """
+    return {
+        "id": player["id"],
+        "headshot": player["headshot"],
+        "firstName": {"default": player["first_name"]},
+        "lastName": {"default": player["last_name"]},
+        "sweaterNumber": player["sweater_number"],
+        "positionCode": player["position"],
+        "shootsCatches": player["shoots_catches"],
+        "heightInInches": player["height_in_inches"],
+        "weightInPounds": player["weight_in_pounds"],
+        "heightInCentimeters": player["height_in_centimeters"],
+        "weightInKilograms": player["weight_in_kilograms"],
+        "birthDate": player["birth_date"],
+        "birthCity": {"default": player["birth_city"]},
+        "birthCountry": player["birth_country"],
+    }
+
+
+def build_payloads(league):
+    """
+    Builds the teams() and players_by_team() payloads for a synthetic league.
+
+    Parameters:
+        league: A league dictionary from synthetic.generate_league().
+
+    Returns:
+        A tuple of (teams list, {(team_abbr, season): roster dict}).
+    """
+    conferences = {c["id"]: c for c in league["conferences"]}
+    divisions = {d["id"]: d for d in league["divisions"]}
+    players = {p["id"]: p for p in league["players"]}
+    teams_by_id = {t["id"]: t for t in league["teams"]}
+
+    teams = [
+        {
+            "conference": {
+                "abbr": conferences[team["conference"]]["abbr"],
+                "name": conferences[team["conference"]]["name"],
+            },
+            "division": {
+                "abbr": divisions[team["division"]]["abbr"],
+                "name": divisions[team["division"]]["name"],
+            },
+            "name": team["name"],
+            "common_name": team["common_name"],
+            "abbr": team["abbr"],
+            "logo": team["logo"],
+            "franchise_id": team["id"],
+        }
+        for team in league["teams"]
+    ]
+
+    rosters = {}
+    for pts in league["player_team_seasons"]:
+        key = (teams_by_id[pts["team"]]["abbr"], pts["season"])
+        roster = rosters.setdefault(
+            key, {"forwards": [], "defensemen": [], "goalies": []}
+        )
+        player = players[pts["player"]]
+        group = POSITION_GROUPS.get(player["position"], "goalies")
+        roster[group].append(to_upstream_player(player))
+
+    return teams, rosters
+
+
+class _FakeTeams:
+    def __init__(self, client):
+        self._client = client
+
+    def teams(self, date="now"):
+        self._client._call("teams")
+        return self._client.team_payload
+
+
+class _FakePlayers:
+    def __init__(self, client):
+        self._client = client
+
+    def players_by_team(self, team_abbr, season):
+        self._client._call("players_by_team")
+        return self._client.rosters.get(
+            (team_abbr, season), {"forwards": [], "defensemen": [], "goalies": []}
+        )
+
+
+class FakeNHLClient:
+    """
+    Fake NHLClient exposing teams.teams() and players.players_by_team().
+
+    Install it with nhl.set_nhl_client(FakeNHLClient(league)).
+    """
+
+    def __init__(self, league, latency=0.0):
+        """
+        Parameters:
+            league: A league dictionary from synthetic.generate_league().
+            latency: Seconds each call sleeps, to simulate the network.
+                (default: 0.0)
+        """
+        self.team_payload, self.rosters = build_payloads(league)
+        self.latency = latency
+        self.calls = {}
+        self.teams = _FakeTeams(self)
+        self.players = _FakePlayers(self)
+
+    def _call(self, endpoint):
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
@@ -0,0 +1,150 @@
+"""
+Timing, reporting and result storage shared by the benchmarks.
+"""
+
+import json
+import platform
+import statistics
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = BENCHMARK_DIR / "results"
+BASELINES_DIR = BENCHMARK_DIR / "baselines"
+
+
+def time_operation(fn, iterations=200, max_seconds=10.0, warmup=3):
+    """
+    Calls fn repeatedly and records the latency of each call.
+
+    Parameters:
+        fn: A callable taking no arguments.
+        iterations: The maximum number of timed calls.
+            (default: 200)
+        max_seconds: Stops early once this much time has been spent timing.
+            (default: 10.0)
+        warmup: The number of untimed calls made first.
+            (default: 3)
+
+    Returns:
+        A list of per-call latencies in seconds.
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    deadline = perf_counter() + max_seconds
+    for _ in range(iterations):
+        start = perf_counter()
+        fn()
+        end = perf_counter()
+        samples.append(end - start)
+        if end >= deadline:
+            break
+    return samples
+
+
+def percentile(samples, pct):
+    """
+    Gets the pct-th percentile (0-100) of a list of samples.
+    """
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+def summarize(samples):
+    """
+    Summarizes latency samples.
+
+    Parameters:
+        samples: A list of latencies in seconds.
+
+    Returns:
+        A dictionary with the sample count, throughput (ops/s), mean, p50 and p99 in ms.
+    """
+    return {
+        "count": len(samples),
+        "throughput_per_s": len(samples) / sum(samples) if sum(samples) else 0.0,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def save_results(name, results, meta=None):
+    """
+    Stores a run's results as JSON under benchmarks/results/.
+
+    Parameters:
+        name: The benchmark name (ex: "bench_db-10x").
+        results: A dictionary of operation name -> summary.
+        meta: A dictionary of run parameters to store alongside the results.
+            (default: None)
+
+    Returns:
+        The path of the stored file.
+    """
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    path = RESULTS_DIR / f"{name}-{stamp}.json"
+    document = {
+        "name": name,
+        "created": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "meta": meta or {},
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2))
+    return path
+
+
+def load_results(path):
+    """
+    Loads the results dictionary from a stored results or baseline file.
+    """
+    return json.loads(Path(path).read_text())["results"]
+
+
+def baseline_path(name):
+    return BASELINES_DIR / f"{name}.json"
+
+
+def save_baseline(name, results_path):
+    """
+    Promotes a stored results file to the baseline for its benchmark name.
+    """
+    BASELINES_DIR.mkdir(parents=True, exist_ok=True)
+    path = baseline_path(name)
+    path.write_text(Path(results_path).read_text())
+    return path
+
+
+def print_report(results, baseline=None):
+    """
+    Prints results as a table, with the p50/p99 change against a baseline when given.
+
+    Parameters:
+        results: A dictionary of operation name -> summary.
+        baseline: A dictionary of operation name -> summary to compare against.
+            (default: None)
+    """
+    header = f"{'operation':<44}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+    if baseline:
+        header += f"{'p50 Δ':>10}{'p99 Δ':>10}"
+    print(header)
+    print("-" * len(header))
+
+    for operation, summary in results.items():
+        line = (
+            f"{operation:<44}{summary['throughput_per_s']:>10.1f}"
+            f"{summary['p50_ms']:>10.2f}{summary['p99_ms']:>10.2f}"
+        )
+        previous = (baseline or {}).get(operation)
+        if previous:
+            for field in ("p50_ms", "p99_ms"):
+                change = (summary[field] - previous[field]) / previous[field] * 100
+                line += f"{change:>+9.1f}%"
+        print(line)
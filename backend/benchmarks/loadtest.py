@@ -0,0 +1,425 @@
+"""
+HTTP load generator for the /teams/* and /players/* routes.
+
+Requests are sent open-loop at a fixed rate with a configurable mix of endpoints.
+Roster refresh storms are produced by periodically marking every stored roster
+stale, so the next roster requests all go upstream at once. While the test runs,
+event loop lag is sampled from /admin/runtime and DB connections in use from
+pg_stat_activity.
+
+With --spawn, the NHL API replay server (benchmarks/nhl_replay.py) and the app are
+started as subprocesses, so the whole stack runs offline. Replay recordings must
+exist first (python -m benchmarks.nhl_replay synthesize).
+
+Run from the backend directory:
+    python -m benchmarks.loadtest --spawn --workers 2 --rps 200 --duration 30 \\
+        --mix teams=4,team_id=2,roster_id=3,roster_name=1 --storm-every 10 \\
+        --upstream-latency-ms 80 --upstream-error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+import psycopg2
+
+from db_connection import load_config
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+DEFAULT_MIX = "teams=4,team_id=2,division=1,roster_id=3,roster_name=1"
+
+
+def _db_connect():
+    config = load_config()
+
+    def setting(name, default=""):
+        return config.get(name) or os.environ.get(name, default)
+
+    return psycopg2.connect(
+        user=setting("DB_USER"),
+        password=setting("DB_PASSWORD"),
+        host=setting("DB_HOST", "localhost"),
+        port=setting("DB_PORT", "5432"),
+        dbname=setting("DB_NAME", "postgres"),
+    )
+
+
+def build_request_kinds(teams, season):
+    """
+    Builds the request generators of the endpoint mix.
+
+    Parameters:
+        teams: A list of (id, abbr, division_id) tuples.
+        season: The season string used for roster requests.
+
+    Returns:
+        A dictionary of kind -> callable(rng) returning (path, params).
+    """
+    return {
+        "teams": lambda rng: ("/teams/", {}),
+        "team_id": lambda rng: ("/teams/id/", {"id": rng.choice(teams)[0]}),
+        "team_name": lambda rng: ("/teams/name/", {"name": rng.choice(teams)[1]}),
+        "division": lambda rng: (
+            "/teams/division/id/",
+            {"div_id": rng.choice(teams)[2]},
+        ),
+        "roster_id": lambda rng: (
+            "/players/players_by_team_id/",
+            {"id": rng.choice(teams)[0], "season": season},
+        ),
+        "roster_name": lambda rng: (
+            "/players/players_by_team_name/",
+            {"name": rng.choice(teams)[1], "season": season},
+        ),
+    }
+
+
+def parse_mix(mix):
+    weights = {}
+    for item in mix.split(","):
+        kind, _, weight = item.partition("=")
+        weights[kind.strip()] = float(weight or 1)
+    return weights
+
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(int)
+        self.etags = {}
+        self.loop_lag = {}
+        self.db_connections = []
+        self.storms = 0
+        self.in_flight = 0
+        self.dropped = 0
+        self.elapsed = 0.0
+        self.upstream = None
+
+    async def _request(self, client, kind, path, params):
+        headers = {}
+        url_key = (path, tuple(sorted(params.items())))
+        if self.args.conditional and url_key in self.etags:
+            headers["If-None-Match"] = self.etags[url_key]
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, params=params, headers=headers)
+            self.statuses[response.status_code] += 1
+            if response.status_code >= 400:
+                self.errors[kind] += 1
+            elif "etag" in response.headers:
+                self.etags[url_key] = response.headers["etag"]
+        except httpx.HTTPError:
+            self.errors[kind] += 1
+        finally:
+            self.in_flight -= 1
+            self.latencies[kind].append(time.perf_counter() - start)
+
+    async def _generate(self, client, kinds, weights):
+        names = list(weights)
+        cumulative = list(weights.values())
+        interval = 1 / self.args.rps
+        total = int(self.args.rps * self.args.duration)
+        start = time.perf_counter()
+        tasks = set()
+
+        for i in range(total):
+            delay = start + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.in_flight >= self.args.max_in_flight:
+                self.dropped += 1
+                continue
+
+            kind = self.rng.choices(names, cumulative)[0]
+            path, params = kinds[kind](self.rng)
+            task = asyncio.create_task(self._request(client, kind, path, params))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.wait(tasks)
+
+    async def _sample(self, client, stop):
+        connection = await asyncio.to_thread(_db_connect)
+        connection.autocommit = True
+        try:
+            while not stop.is_set():
+                if self.args.admin_token:
+                    try:
+                        response = await client.get(
+                            "/admin/runtime",
+                            headers={"X-Admin-Token": self.args.admin_token},
+                        )
+                        runtime = response.json()
+                        self.loop_lag[runtime["pid"]] = runtime["event_loop_lag"]
+                    except (httpx.HTTPError, ValueError, KeyError):
+                        pass
+
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT state, count(*) FROM pg_stat_activity "
+                        "WHERE datname = current_database() AND pid <> pg_backend_pid() "
+                        "GROUP BY state"
+                    )
+                    self.db_connections.append(dict(cursor.fetchall()))
+
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=1)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            connection.close()
+
+    async def _storm(self, stop):
+        connection = await asyncio.to_thread(_db_connect)
+        connection.autocommit = True
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.args.storm_every)
+                    return
+                except asyncio.TimeoutError:
+                    pass
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "UPDATE roster_refreshes SET refreshed_at = refreshed_at - interval '3 hours'"
+                    )
+                self.storms += 1
+        finally:
+            connection.close()
+
+    def _load_teams(self):
+        connection = _db_connect()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT id, abbr, division FROM teams ORDER BY id")
+                return cursor.fetchall()
+        finally:
+            connection.close()
+
+    async def run(self):
+        teams = await asyncio.to_thread(self._load_teams)
+        if not teams:
+            sys.exit("no teams stored, start the app once so lifespan seeds them")
+
+        kinds = build_request_kinds(teams, self.args.season)
+        weights = parse_mix(self.args.mix)
+        unknown = set(weights) - set(kinds)
+        if unknown:
+            sys.exit(f"unknown request kinds: {', '.join(sorted(unknown))}")
+
+        limits = httpx.Limits(max_connections=self.args.max_in_flight)
+        stop = asyncio.Event()
+        async with httpx.AsyncClient(
+            base_url=self.args.url, limits=limits, timeout=30
+        ) as client:
+            background = [asyncio.create_task(self._sample(client, stop))]
+            if self.args.storm_every:
+                background.append(asyncio.create_task(self._storm(stop)))
+
+            start = time.perf_counter()
+            await self._generate(client, kinds, weights)
+            self.elapsed = time.perf_counter() - start
+
+            stop.set()
+            await asyncio.gather(*background)
+
+            if self.args.upstream_url:
+                try:
+                    async with httpx.AsyncClient() as upstream:
+                        response = await upstream.get(
+                            f"{self.args.upstream_url}/_replay/stats"
+                        )
+                        self.upstream = response.json()
+                except httpx.HTTPError:
+                    pass
+
+    def report(self):
+        sent = sum(len(samples) for samples in self.latencies.values())
+        print(
+            f"\nsent {sent} requests in {self.elapsed:.1f}s "
+            f"({sent / self.elapsed:.1f} req/s, target {self.args.rps}), "
+            f"dropped {self.dropped} over the in-flight cap, {self.storms} refresh storms"
+        )
+        print(
+            "statuses: "
+            + ", ".join(f"{k}={v}" for k, v in sorted(self.statuses.items()))
+        )
+
+        header = f"\n{'kind':<14}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+        print(header)
+        print("-" * (len(header) - 1))
+        for kind, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+
+            def pct(p):
+                return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+            print(
+                f"{kind:<14}{len(samples):>8}{self.errors[kind]:>8}"
+                f"{pct(0.5):>10.1f}{pct(0.95):>10.1f}{pct(0.99):>10.1f}{samples[-1] * 1000:>10.1f}"
+            )
+
+        for kind, samples in sorted(self.latencies.items()):
+            print(f"\n{kind} latency histogram")
+            counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+            for sample in samples:
+                ms = sample * 1000
+                index = next(
+                    (i for i, bound in enumerate(HISTOGRAM_BUCKETS_MS) if ms <= bound),
+                    len(HISTOGRAM_BUCKETS_MS),
+                )
+                counts[index] += 1
+            peak = max(counts) or 1
+            labels = [f"<= {b}ms" for b in HISTOGRAM_BUCKETS_MS] + [
+                f"> {HISTOGRAM_BUCKETS_MS[-1]}ms"
+            ]
+            for label, count in zip(labels, counts):
+                if count:
+                    print(f"  {label:>10} {count:>7} {'#' * round(count / peak * 40)}")
+
+        print("\nevent loop lag per worker (last minute)")
+        if not self.loop_lag:
+            print("  not sampled (pass --admin-token, and set ADMIN_TOKEN on the app)")
+        for pid, lag in sorted(self.loop_lag.items()):
+            print(
+                f"  pid {pid}: p50 {lag['p50_ms']:.2f}ms, p99 {lag['p99_ms']:.2f}ms, "
+                f"max {lag['max_ms']:.2f}ms"
+            )
+
+        if self.db_connections:
+            totals = [sum(sample.values()) for sample in self.db_connections]
+            active = [sample.get("active", 0) for sample in self.db_connections]
+            print(
+                f"\nDB connections: max {max(totals)} open, max {max(active)} active, "
+                f"mean {sum(totals) / len(totals):.1f} open"
+            )
+
+        if self.upstream:
+            print(f"\nupstream replay: {self.upstream}")
+
+
+def _wait_until_up(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    sys.exit(f"{url} did not come up within {timeout}s")
+
+
+def spawn(args):
+    """
+    Starts the replay server and the app as subprocesses.
+
+    Returns:
+        The list of started processes.
+    """
+    upstream_port = int(args.upstream_url.rsplit(":", 1)[1])
+    app_port = int(args.url.rsplit(":", 1)[1])
+
+    replay = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.nhl_replay",
+            "serve",
+            "--port",
+            str(upstream_port),
+            "--latency-ms",
+            str(args.upstream_latency_ms),
+            "--jitter-ms",
+            str(args.upstream_jitter_ms),
+            "--error-rate",
+            str(args.upstream_error_rate),
+        ],
+        cwd=BACKEND_DIR,
+    )
+    _wait_until_up(f"{args.upstream_url}/_replay/stats")
+
+    env = {**os.environ, "NHL_API_URL": args.upstream_url}
+    if args.admin_token:
+        env["ADMIN_TOKEN"] = args.admin_token
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(app_port),
+            "--workers",
+            str(args.workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    _wait_until_up(f"{args.url}/teams/")
+    return [server, replay]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--url", default="http://127.0.0.1:8000")
+    arg_parser.add_argument("--rps", type=float, default=100)
+    arg_parser.add_argument("--duration", type=float, default=30)
+    arg_parser.add_argument("--mix", default=DEFAULT_MIX)
+    arg_parser.add_argument("--season", default="20252026")
+    arg_parser.add_argument("--max-in-flight", type=int, default=500)
+    arg_parser.add_argument(
+        "--conditional",
+        action="store_true",
+        help="send If-None-Match with the last ETag seen per URL, like polling clients",
+    )
+    arg_parser.add_argument(
+        "--storm-every",
+        type=float,
+        default=0,
+        help="mark every roster stale every N seconds (default: 0, never)",
+    )
+    arg_parser.add_argument("--admin-token", default=os.environ.get("ADMIN_TOKEN"))
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--spawn", action="store_true")
+    arg_parser.add_argument("--workers", type=int, default=1)
+    arg_parser.add_argument("--upstream-url", default=None)
+    arg_parser.add_argument("--upstream-latency-ms", type=float, default=50)
+    arg_parser.add_argument("--upstream-jitter-ms", type=float, default=25)
+    arg_parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    args = arg_parser.parse_args()
+
+    processes = []
+    if args.spawn:
+        args.upstream_url = args.upstream_url or "http://127.0.0.1:8765"
+        args.admin_token = args.admin_token or "loadtest"
+        processes = spawn(args)
+
+    try:
+        load_test = LoadTest(args)
+        asyncio.run(load_test.run())
+        load_test.report()
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Offline stand-in for the NHL API that serves recorded responses.
+
+Recordings live in a directory mirroring the upstream URLs:
+    <recordings>/<host>/<path>.json   (ex: api-web.nhle.com/v1/roster/TOR/20252026.json)
+
+Latency, jitter and error rate are tunable, so upstream slowness and failures can
+be reproduced deterministically. Point the app at the server with
+NHL_API_URL=http://127.0.0.1:8765 (see nhl.get_nhl_client()).
+
+Run from the backend directory:
+    python -m benchmarks.nhl_replay synthesize --scale 1     # offline, synthetic league
+    python -m benchmarks.nhl_replay record --season 20252026 # one-time, needs network
+    python -m benchmarks.nhl_replay serve --latency-ms 80 --jitter-ms 40 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from pathlib import Path
+
+RECORDINGS_DIR = Path(__file__).resolve().parent / "recordings"
+
+WEB_HOST = "api-web.nhle.com"
+STATS_HOST = "api.nhle.com"
+
+
+def _write(recordings, path, payload):
+    target = Path(recordings) / f"{path}.json"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(payload))
+
+
+def synthesize(recordings, scale=1, seasons=1):
+    """
+    Writes recordings for a synthetic league (see benchmarks/synthetic.py).
+
+    Parameters:
+        recordings: The recordings directory.
+        scale: Multiplier on the number of players per team.
+            (default: 1)
+        seasons: The number of seasons of rosters.
+            (default: 1)
+
+    Returns:
+        The number of recordings written.
+    """
+    from benchmarks.fake_nhl import build_payloads
+    from benchmarks.synthetic import generate_league
+
+    league = generate_league(scale=scale, seasons=seasons)
+    teams, rosters = build_payloads(league)
+
+    standings = [
+        {
+            "conferenceAbbrev": team["conference"]["abbr"],
+            "conferenceName": team["conference"]["name"],
+            "divisionAbbrev": team["division"]["abbr"],
+            "divisionName": team["division"]["name"],
+            "teamName": {"default": team["name"]},
+            "teamCommonName": {"default": team["common_name"]},
+            "teamAbbrev": {"default": team["abbr"]},
+            "teamLogo": team["logo"],
+        }
+        for team in teams
+    ]
+    franchises = [
+        {"id": team["franchise_id"], "fullName": team["name"]} for team in teams
+    ]
+
+    _write(recordings, f"{WEB_HOST}/v1/standings/now", {"standings": standings})
+    _write(recordings, f"{STATS_HOST}/stats/rest/en/franchise", {"data": franchises})
+    for (abbr, season), roster in rosters.items():
+        _write(recordings, f"{WEB_HOST}/v1/roster/{abbr}/{season}", roster)
+
+    return len(rosters) + 2
+
+
+def record(recordings, season):
+    """
+    Records the live NHL API responses the app uses. This is the only command that
+    needs network access.
+
+    Parameters:
+        recordings: The recordings directory.
+        season: The season string to record rosters for (ex: "20252026").
+
+    Returns:
+        The number of recordings written.
+    """
+    import httpx
+
+    paths = [f"{WEB_HOST}/v1/standings/now", f"{STATS_HOST}/stats/rest/en/franchise"]
+    with httpx.Client(timeout=30, follow_redirects=True) as client:
+        payloads = {path: client.get(f"https://{path}").json() for path in paths}
+        for team in payloads[paths[0]]["standings"]:
+            path = f"{WEB_HOST}/v1/roster/{team['teamAbbrev']['default']}/{season}"
+            payloads[path] = client.get(f"https://{path}").json()
+
+    for path, payload in payloads.items():
+        _write(recordings, path, payload)
+    return len(payloads)
+
+
+def create_app(recordings, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=0):
+    """
+    Builds the replay server application.
+
+    Parameters:
+        recordings: The recordings directory.
+        latency_ms: Base latency added to every response.
+            (default: 0.0)
+        jitter_ms: Extra uniformly distributed latency, 0..jitter_ms.
+            (default: 0.0)
+        error_rate: Fraction of requests answered with a 503.
+            (default: 0.0)
+        seed: Random seed for jitter and errors.
+            (default: 0)
+
+    Returns:
+        A Starlette application. GET /_replay/stats returns request counters.
+    """
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Route
+
+    rng = random.Random(seed)
+    root = Path(recordings).resolve()
+    bodies = {}
+    stats = {"requests": 0, "errors": 0, "not_found": 0}
+
+    async def replay(request):
+        stats["requests"] += 1
+        delay = latency_ms + rng.uniform(0, jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"message": "replayed upstream error"}, status_code=503)
+
+        path = request.path_params["path"]
+        if path not in bodies:
+            target = (root / f"{path}.json").resolve()
+            if root not in target.parents or not target.is_file():
+                stats["not_found"] += 1
+                return JSONResponse({"message": "not recorded"}, status_code=404)
+            bodies[path] = target.read_bytes()
+        return Response(bodies[path], media_type="application/json")
+
+    async def replay_stats(request):
+        return JSONResponse(stats)
+
+    return Starlette(
+        routes=[
+            Route("/_replay/stats", replay_stats),
+            Route("/{path:path}", replay),
+        ]
+    )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--recordings", default=str(RECORDINGS_DIR))
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    synthesize_parser = commands.add_parser("synthesize")
+    synthesize_parser.add_argument("--scale", type=int, default=1)
+    synthesize_parser.add_argument("--seasons", type=int, default=1)
+
+    record_parser = commands.add_parser("record")
+    record_parser.add_argument("--season", required=True)
+
+    serve_parser = commands.add_parser("serve")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--latency-ms", type=float, default=0.0)
+    serve_parser.add_argument("--jitter-ms", type=float, default=0.0)
+    serve_parser.add_argument("--error-rate", type=float, default=0.0)
+
+    args = arg_parser.parse_args()
+    if args.command == "synthesize":
+        print(
+            f"wrote {synthesize(args.recordings, args.scale, args.seasons)} recordings"
+        )
+    elif args.command == "record":
+        print(f"wrote {record(args.recordings, args.season)} recordings")
+    else:
+        import uvicorn
+
+        app = create_app(
+            args.recordings, args.latency_ms, args.jitter_ms, args.error_rate
+        )
+        uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
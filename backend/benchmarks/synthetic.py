@@ -0,0 +1,192 @@
+"""
+Synthetic league data for benchmarks.
+
+Generates conferences, divisions, teams, players, player-team-seasons and game
+stats at a configurable scale. At scale 1 the league has the real shape (32 teams,
+26 players per team, 82 games per player-season); higher scales multiply the
+number of players per team, and with it every per-player table.
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+POSITIONS = ["C", "L", "R", "D", "D", "G"]
+COUNTRIES = ["CAN", "USA", "SWE", "FIN", "RUS", "CZE", "SVK", "DEU", "CHE", "LVA"]
+CITIES = ["Toronto", "Detroit", "Boston", "Stockholm", "Helsinki", "Moscow", "Prague"]
+CONFERENCES = [("E", "Eastern"), ("W", "Western")]
+DIVISIONS = [
+    ("A", "Atlantic", 1),
+    ("M", "Metropolitan", 1),
+    ("C", "Central", 2),
+    ("P", "Pacific", 2),
+]
+
+TEAMS_PER_LEAGUE = 32
+PLAYERS_PER_TEAM = 26
+GAMES_PER_SEASON = 82
+
+
+def season_strings(first_year, seasons):
+    """
+    Builds the season strings (ex: "20252026") of consecutive seasons starting in first_year.
+    """
+    return [f"{year}{year + 1}" for year in range(first_year, first_year + seasons)]
+
+
+def generate_league(scale=1, seasons=1, first_year=2025, seed=0):
+    """
+    Generates a synthetic league, without its game stats (see iter_stats()).
+
+    Parameters:
+        scale: Multiplier on the number of players per team.
+            (default: 1)
+        seasons: The number of seasons of rosters and stats.
+            (default: 1)
+        first_year: The starting year of the first season.
+            (default: 2025)
+        seed: Random seed, so runs are reproducible.
+            (default: 0)
+
+    Returns:
+        A dictionary of row lists keyed by table name, plus "seasons" and "seed".
+        Rows use the database column names.
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    season_list = season_strings(first_year, seasons)
+
+    conferences = [
+        {"id": i + 1, "abbr": abbr, "name": name}
+        for i, (abbr, name) in enumerate(CONFERENCES)
+    ]
+    divisions = [
+        {"id": i + 1, "abbr": abbr, "name": name}
+        for i, (abbr, name, _) in enumerate(DIVISIONS)
+    ]
+
+    teams = []
+    for i in range(TEAMS_PER_LEAGUE):
+        division_index = i % len(DIVISIONS)
+        abbr = f"T{i:02d}"
+        teams.append(
+            {
+                "id": i + 1,
+                "abbr": abbr,
+                "common_name": f"Team {i}",
+                "name": f"City{i} Team {i}",
+                "conference": DIVISIONS[division_index][2],
+                "division": division_index + 1,
+                "logo": f"https://assets.nhle.com/logos/nhl/svg/{abbr}_light.svg",
+            }
+        )
+
+    players = []
+    team_seasons = []
+    players_per_team = PLAYERS_PER_TEAM * scale
+
+    for team in teams:
+        for slot in range(players_per_team):
+            player_id = 8_000_000 + len(players)
+            height = rng.randint(175, 200)
+            weight = rng.randint(75, 105)
+            players.append(
+                {
+                    "id": player_id,
+                    "birth_city": rng.choice(CITIES),
+                    "birth_country": rng.choice(COUNTRIES),
+                    "birth_date": f"{rng.randint(1988, 2006)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+                    "birth_province_state": None,
+                    "first_name": f"First{player_id}",
+                    "last_name": f"Last{player_id}",
+                    "headshot": f"https://assets.nhle.com/mugs/nhl/{team['abbr']}/{player_id}.png",
+                    "height_in_centimeters": height,
+                    "height_in_inches": round(height / 2.54),
+                    "position": POSITIONS[slot % len(POSITIONS)],
+                    "shoots_catches": rng.choice(["L", "R"]),
+                    "sweater_number": slot % 99 + 1,
+                    "weight_in_kilograms": weight,
+                    "weight_in_pounds": round(weight * 2.2046),
+                    "last_updated": now,
+                }
+            )
+
+            for season in season_list:
+                team_seasons.append(
+                    {
+                        "player": player_id,
+                        "team": team["id"],
+                        "season": season,
+                        "sweater_number": slot % 99 + 1,
+                        "games_played": GAMES_PER_SEASON,
+                    }
+                )
+
+    return {
+        "seed": seed,
+        "seasons": season_list,
+        "conferences": conferences,
+        "divisions": divisions,
+        "teams": teams,
+        "players": players,
+        "player_team_seasons": team_seasons,
+    }
+
+
+def iter_stats(league):
+    """
+    Generates one game stat row per player-team-season and game, lazily.
+
+    Stats are by far the largest table, so they are yielded one row at a time
+    instead of being held in memory.
+
+    Parameters:
+        league: A league dictionary from generate_league().
+
+    Yields:
+        A stat row dictionary using the database column names.
+    """
+    rng = random.Random(league["seed"])
+    teams = {team["id"]: team for team in league["teams"]}
+    team_list = league["teams"]
+    stat_id = 1
+
+    for pts in league["player_team_seasons"]:
+        team = teams[pts["team"]]
+        season = pts["season"]
+        season_start = date(int(season[:4]), 10, 7)
+
+        for game in range(GAMES_PER_SEASON):
+            goals = rng.choices([0, 1, 2, 3], [70, 22, 6, 2])[0]
+            assists = rng.choices([0, 1, 2, 3], [60, 28, 9, 3])[0]
+            pp_points = min(goals + assists, rng.choice([0, 0, 0, 1]))
+            # Offsets 1..31 from the team's own index, so a team never plays itself.
+            opponent = team_list[
+                (team["id"] + game % (len(team_list) - 1)) % len(team_list)
+            ]
+            yield {
+                "id": stat_id,
+                "assists": assists,
+                "common_name": team["common_name"],
+                "game_winning_goal": goals > 0 and rng.random() < 0.1,
+                "goals": goals,
+                "home_road_flag": game % 2 == 0,
+                "opponent_abbr": opponent["abbr"],
+                "opponent_common_name": opponent["common_name"],
+                "ot_goals": "0",
+                "pim": rng.choice([0, 0, 0, 2, 4]),
+                "plus_minus": rng.randint(-2, 2),
+                "points": goals + assists,
+                "power_play_goals": min(goals, pp_points),
+                "power_play_points": pp_points,
+                "shifts": rng.randint(12, 28),
+                "shorthanded_goals": 0,
+                "shorthanded_points": 0,
+                "shots": goals + rng.randint(0, 5),
+                "team_abbr": team["abbr"],
+                "toi": f"{rng.randint(8, 24):02d}:{rng.randint(0, 59):02d}",
+                "game_date": season_start + timedelta(days=game * 2),
+                "player": pts["player"],
+                "game_id": int(season[:4]) * 100_000 + 20_000 + game,
+                "season": season,
+            }
+            stat_id += 1
@@ -0,0 +1,49 @@
+from time import perf_counter
+
+from icecream import ic
+
+from db_async import run_db
+from nhl import call_nhl
+from db_helpers import TEAM_SEED_VERSION_KEY
+
+# Bump this whenever the seeded team data should be fetched again
+# (ex: a new season, relocation or expansion team).
+TEAM_SEED_VERSION = "20252026.1"
+
+
+async def bootstrap_teams(db_helper, nhl_client, seed_version=TEAM_SEED_VERSION):
+    """
+    Seeds conferences, divisions and teams from the NHL API.
+
+    The upstream call is skipped entirely when the stored seed version matches.
+    Otherwise the teams are fetched off the event loop and the whole league is
+    upserted in a single transaction, so running this again is always safe.
+
+    Parameters:
+        db_helper: DatabaseHelper instance.
+        nhl_client: NHLClient instance.
+        seed_version: The seed version the stored teams must match.
+            (default: TEAM_SEED_VERSION)
+
+    Returns:
+        A dictionary report of what was done and how long each stage took, in seconds.
+    """
+    start = perf_counter()
+    report = {"seed_version": seed_version, "seeded": False}
+
+    stored_version = await run_db(db_helper.get_setting, TEAM_SEED_VERSION_KEY)
+    report["check_seconds"] = perf_counter() - start
+
+    if stored_version != seed_version:
+        fetch_start = perf_counter()
+        teams = await call_nhl(nhl_client.teams.teams)
+        report["fetch_seconds"] = perf_counter() - fetch_start
+
+        upsert_start = perf_counter()
+        report.update(await run_db(db_helper.upsert_league, teams, seed_version))
+        report["upsert_seconds"] = perf_counter() - upsert_start
+        report["seeded"] = True
+
+    report["total_seconds"] = perf_counter() - start
+    ic(report)
+    return report
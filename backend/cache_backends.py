@@ -0,0 +1,315 @@
+"""
+Key/value cache backends used by the response cache and the validator store.
+
+Both backends share one interface: awaitable get(key) and set(key, value), and
+delete_prefix(*prefix) and clear(), which may be called from any thread. Keys are
+tuples whose first item is the resource kind (ex: ("teams", "id", 1)), so every key
+of a kind can be removed at once.
+
+CACHE_BACKEND selects the backend created by create_cache_backend():
+    local    A dictionary per worker (default).
+    shared   One SQLite file in a private directory on local shared memory
+             (SHARED_CACHE_DIR, default /dev/shm/nhltrak-cache-<uid>) used by every
+             worker on the host, so memory grows with the data rather than with the
+             number of workers.
+"""
+
+import asyncio
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "local")
+SHARED_CACHE_DIR = os.environ.get(
+    "SHARED_CACHE_DIR",
+    os.path.join(
+        "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+        f"nhltrak-cache-{os.getuid()}",
+    ),
+)
+SHARED_CACHE_TTL = float(os.environ.get("SHARED_CACHE_TTL", "3600"))
+SHARED_CACHE_MAX_MB = float(os.environ.get("SHARED_CACHE_MAX_MB", "64"))
+
+# Expired and least recently used entries are evicted once this worker has written
+# max_bytes / EVICT_FRACTION bytes, or EVICT_INTERVAL seconds after the last eviction.
+EVICT_FRACTION = 16
+EVICT_INTERVAL = 60.0
+
+# Separates the items of an encoded key; never appears in repr() output.
+_KEY_SEPARATOR = "\x1f"
+
+# SQLite calls of every SharedCache run here, off the event loop.
+cache_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="nhltrak-cache")
+
+
+class LocalCache:
+    """
+    In-process key/value cache backend.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    async def get(self, key):
+        """
+        Gets the value stored for a key, or None if there isn't one.
+        """
+        return self._entries.get(key)
+
+    async def set(self, key, value):
+        """
+        Stores a value under a key.
+        """
+        self._entries[key] = value
+
+    def delete_prefix(self, *prefix):
+        """
+        Removes every entry whose key starts with the given items.
+        """
+        size = len(prefix)
+        for key in list(self._entries):
+            if key[:size] == prefix:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Removes every entry.
+        """
+        self._entries.clear()
+
+
+def _encode_key(items):
+    # repr() keeps 1 and "1" apart; the trailing separator keeps ("team", 1)
+    # from matching the prefix of ("team", 12).
+    return "".join(repr(item) + _KEY_SEPARATOR for item in items)
+
+
+def private_directory(path: str):
+    """
+    Creates a directory only the current user can use, or checks an existing one.
+
+    Parameters:
+        path: The directory.
+
+    Returns:
+        The path.
+
+    Raises:
+        RuntimeError: The path is a symlink or not a directory, belongs to another
+            user, or can be used by other users.
+    """
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise RuntimeError(f"Shared cache path {path} is not a directory.")
+    if info.st_uid != os.getuid():
+        raise RuntimeError(f"Shared cache directory {path} belongs to another user.")
+    if info.st_mode & 0o077:
+        raise RuntimeError(
+            f"Shared cache directory {path} is open to other users (mode"
+            f" {stat.S_IMODE(info.st_mode):o}), expected 700."
+        )
+    return path
+
+
+class SharedCache:
+    """
+    Cache backend shared by every worker process on the host, stored in one SQLite file.
+
+    Values are stored as bytes produced by encode, and read back with decode (ex:
+    orjson), never unpickled. Entries expire ttl seconds after they are stored, and
+    the least recently used entries of the namespace are evicted once its values take
+    more than max_bytes (checked every max_bytes / EVICT_FRACTION bytes written, or
+    every EVICT_INTERVAL seconds). get() and set() run on cache_executor.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        encode,
+        decode,
+        directory=SHARED_CACHE_DIR,
+        ttl=SHARED_CACHE_TTL,
+        max_bytes=int(SHARED_CACHE_MAX_MB * 1024 * 1024),
+    ):
+        """
+        Parameters:
+            namespace: Keeps the entries of different caches apart in the same file.
+            encode: Converts a value to bytes.
+            decode: Converts bytes from encode back to a value.
+            directory: The directory of the SQLite file, created with mode 700. Put
+                it on a memory-backed filesystem.
+                (default: the SHARED_CACHE_DIR environment variable, or
+                /dev/shm/nhltrak-cache-<uid>)
+            ttl: Seconds an entry stays usable after it is stored.
+                (default: the SHARED_CACHE_TTL environment variable, or 3600)
+            max_bytes: The most bytes of encoded values kept in the namespace.
+                (default: the SHARED_CACHE_MAX_MB environment variable, or 64 MB)
+        """
+        self.namespace = namespace
+        self.encode = encode
+        self.decode = decode
+        self.path = os.path.join(private_directory(directory), "cache.sqlite3")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._evict_lock = threading.Lock()
+        self._written = 0
+        self._evicted_at = time.monotonic()
+
+    def _connection(self):
+        # sqlite3 connections can't be shared between threads: one per thread.
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " used_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_lru ON cache (namespace, used_at)"
+            )
+            self._local.connection = connection
+        return connection
+
+    async def get(self, key):
+        """
+        Gets the value stored for a key, or None if there isn't one or it expired.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(cache_executor, self.get_sync, key)
+
+    async def set(self, key, value):
+        """
+        Stores a value under a key, evicting entries when an eviction is due.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(cache_executor, self.set_sync, key, value)
+
+    def get_sync(self, key):
+        """
+        Blocking get(), for use outside the event loop.
+        """
+        encoded = _encode_key(key)
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT value, expires_at, used_at FROM cache"
+            " WHERE namespace = ? AND key = ?",
+            (self.namespace, encoded),
+        ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        # Recency only needs to be roughly right: skip the write on hot keys.
+        if now - row[2] > 1.0:
+            connection.execute(
+                "UPDATE cache SET used_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, encoded),
+            )
+        return self.decode(row[0])
+
+    def set_sync(self, key, value):
+        """
+        Blocking set(), for use outside the event loop.
+        """
+        data = self.encode(value)
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+            (self.namespace, _encode_key(key), data, len(data), now + self.ttl, now),
+        )
+        if self._eviction_due(len(data)):
+            self._evict(connection, now)
+
+    def _eviction_due(self, size):
+        with self._evict_lock:
+            self._written += size
+            if (
+                self._written < self.max_bytes / EVICT_FRACTION
+                and time.monotonic() - self._evicted_at < EVICT_INTERVAL
+            ):
+                return False
+            self._written = 0
+            self._evicted_at = time.monotonic()
+            return True
+
+    def _evict(self, connection, now):
+        connection.execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, now),
+        )
+        total = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        rows = connection.execute(
+            "SELECT key, size FROM cache WHERE namespace = ? ORDER BY used_at",
+            (self.namespace,),
+        )
+        stale = []
+        for key, size in rows:
+            if excess <= 0:
+                break
+            stale.append((self.namespace, key))
+            excess -= size
+        connection.executemany(
+            "DELETE FROM cache WHERE namespace = ? AND key = ?", stale
+        )
+
+    def delete_prefix(self, *prefix):
+        """
+        Removes every entry whose key starts with the given items. Blocks: called
+        from write listeners, which run off the event loop.
+        """
+        encoded = _encode_key(prefix)
+        self._connection().execute(
+            "DELETE FROM cache WHERE namespace = ? AND substr(key, 1, ?) = ?",
+            (self.namespace, len(encoded), encoded),
+        )
+
+    def clear(self):
+        """
+        Removes every entry of the namespace.
+        """
+        self._connection().execute(
+            "DELETE FROM cache WHERE namespace = ?", (self.namespace,)
+        )
+
+
+def create_cache_backend(namespace: str, encode, decode, backend=CACHE_BACKEND):
+    """
+    Creates the cache backend selected by CACHE_BACKEND.
+
+    Parameters:
+        namespace: The cache name (ex: "responses"), used by the shared backend.
+        encode: Converts a value to bytes, for the shared backend.
+        decode: Converts bytes from encode back to a value, for the shared backend.
+        backend: "local" or "shared".
+            (default: the CACHE_BACKEND environment variable, or "local")
+
+    Returns:
+        A LocalCache or SharedCache instance.
+    """
+    if backend == "shared":
+        return SharedCache(namespace, encode, decode)
+    return LocalCache()
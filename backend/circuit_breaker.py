@@ -0,0 +1,115 @@
+import threading
+from time import monotonic
+
+from metrics import BREAKER_REJECTED, BREAKER_STATE, BREAKER_TRANSITIONS
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a call is rejected because the circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for a while, then probes it before resuming.
+
+    closed     Calls go through. failure_threshold consecutive failures open the circuit.
+    open       Calls are rejected immediately for reset_timeout seconds.
+    half_open  Up to probes calls go through; a success closes the circuit,
+               a failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold=5, reset_timeout=30.0, probes=1):
+        """
+        Parameters:
+            name: The dependency name, used as the metrics label.
+            failure_threshold: Consecutive failures that open the circuit.
+                (default: 5)
+            reset_timeout: Seconds the circuit stays open before probing.
+                (default: 30.0)
+            probes: Calls allowed through at once while half-open.
+                (default: 1)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probes = probes
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.in_flight_probes = 0
+        self._lock = threading.Lock()
+        BREAKER_STATE.labels(name).set(_STATE_VALUES[CLOSED])
+
+    def _transition(self, state):
+        if state != self.state:
+            self.state = state
+            BREAKER_STATE.labels(self.name).set(_STATE_VALUES[state])
+            BREAKER_TRANSITIONS.labels(self.name, state).inc()
+
+    def allow(self):
+        """
+        Checks if a call may go through, and reserves a probe slot while half-open.
+
+        Returns:
+            True if the call may be made. Every allowed call must be followed by
+            record_success(), record_failure() or release().
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if monotonic() - self.opened_at < self.reset_timeout:
+                    BREAKER_REJECTED.labels(self.name).inc()
+                    return False
+                self._transition(HALF_OPEN)
+                self.in_flight_probes = 0
+
+            if self.state == HALF_OPEN:
+                if self.in_flight_probes >= self.probes:
+                    BREAKER_REJECTED.labels(self.name).inc()
+                    return False
+                self.in_flight_probes += 1
+            return True
+
+    def record_success(self):
+        """
+        Records a successful call. Only a probe closes the circuit: a slow call that
+        started before the circuit opened and succeeds afterwards leaves it open.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                return
+            self.failures = 0
+            if self.state == HALF_OPEN:
+                self.in_flight_probes = max(0, self.in_flight_probes - 1)
+                self._transition(CLOSED)
+
+    def release(self):
+        """
+        Records an allowed call that ended without an outcome (ex: it was cancelled),
+        freeing its probe slot without counting it as a success or a failure.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.in_flight_probes = max(0, self.in_flight_probes - 1)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.in_flight_probes = 0
+                self.opened_at = monotonic()
+                self._transition(OPEN)
+
+    def snapshot(self):
+        """
+        Returns:
+            A dictionary with the breaker's state and consecutive failure count.
+        """
+        return {"name": self.name, "state": self.state, "failures": self.failures}
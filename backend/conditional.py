@@ -0,0 +1,261 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+import orjson
+from fastapi import Request, Response
+
+from cache_backends import LocalCache, create_cache_backend
+from responses import encode_json
+from metrics import VALIDATOR_HIT, VALIDATOR_MISS
+
+
+class Validators:
+    """
+    The ETag and Last-Modified values last served for a resource.
+    """
+
+    __slots__ = ("etag", "last_modified", "expires_at")
+
+    def __init__(self, etag, last_modified=None, expires_at=None):
+        """
+        Parameters:
+            etag: The strong ETag of the served body, including quotes.
+            last_modified: The datetime the resource last changed.
+                (default: None)
+            expires_at: The datetime after which the stored resource must be rechecked
+                (ex: when a roster becomes stale). None means it never expires.
+                (default: None)
+        """
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    def is_expired(self):
+        return self.expires_at is not None and datetime.now() >= self.expires_at
+
+    def to_bytes(self):
+        """
+        Encodes the validators as JSON, for a shared cache backend.
+        """
+        return orjson.dumps([self.etag, self.last_modified, self.expires_at])
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """
+        Decodes validators encoded by to_bytes().
+        """
+        etag, last_modified, expires_at = orjson.loads(data)
+        return cls(
+            etag,
+            last_modified and datetime.fromisoformat(last_modified),
+            expires_at and datetime.fromisoformat(expires_at),
+        )
+
+
+class ValidatorStore:
+    """
+    Store of the validators served per resource key.
+
+    Keys are tuples whose first item is the resource kind (ex: ("roster", 1, "20252026")),
+    so every key of a kind can be invalidated at once.
+    """
+
+    def __init__(self, backend=None):
+        """
+        Parameters:
+            backend: The cache backend storing Validators entries.
+                (default: a new LocalCache)
+        """
+        self.backend = backend if backend is not None else LocalCache()
+
+    async def get(self, key):
+        """
+        Gets the validators stored for a key.
+
+        Parameters:
+            key: The resource key.
+
+        Returns:
+            A Validators instance, or None if nothing is stored or it expired.
+        """
+        validators = await self.backend.get(key)
+        if validators is None or validators.is_expired():
+            return None
+        return validators
+
+    async def set(self, key, validators):
+        """
+        Stores the validators for a key.
+
+        Parameters:
+            key: The resource key.
+            validators: A Validators instance.
+        """
+        await self.backend.set(key, validators)
+
+    def invalidate(self, *prefix):
+        """
+        Removes all stored validators whose key starts with the given items.
+
+        Parameters:
+            *prefix: The leading items of the keys to remove.
+                (ex: invalidate("teams") or invalidate("roster", 1, "20252026"))
+        """
+        if prefix:
+            self.backend.delete_prefix(*prefix)
+        else:
+            self.backend.clear()
+
+
+validators = ValidatorStore(
+    create_cache_backend("validators", Validators.to_bytes, Validators.from_bytes)
+)
+
+
+def make_etag(body: bytes) -> str:
+    """
+    Builds a strong ETag from the content hash of a response body.
+
+    Parameters:
+        body: The encoded response body.
+
+    Returns:
+        The quoted ETag string.
+    """
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def http_date(value: datetime) -> str:
+    """
+    Formats a datetime as an HTTP date. Naive datetimes are treated as local time.
+    """
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag (RFC 9110 13.1.2).
+    """
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag.removeprefix("W/") in candidates
+
+
+def is_not_modified(request: Request, etag: str, last_modified=None) -> bool:
+    """
+    Evaluates the request's conditional headers against the current validators.
+
+    If-None-Match takes precedence; If-Modified-Since is only used when it's absent.
+
+    Parameters:
+        request: The incoming request.
+        etag: The current ETag of the resource.
+        last_modified: The datetime the resource last changed.
+            (default: None)
+
+    Returns:
+        True if the client's copy is still current and a 304 can be sent.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    modified = last_modified.astimezone(timezone.utc).replace(microsecond=0)
+    return modified <= since
+
+
+def _validator_headers(etag, last_modified=None):
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+async def not_modified(request: Request, key):
+    """
+    Answers a conditional request from the stored validators alone.
+
+    Call this before touching the database; nothing is serialized or queried.
+
+    Parameters:
+        request: The incoming request.
+        key: The resource key.
+
+    Returns:
+        A 304 Response if the client's copy matches the stored validators, None otherwise.
+    """
+    stored = await validators.get(key)
+    if stored is None or not is_not_modified(
+        request, stored.etag, stored.last_modified
+    ):
+        VALIDATOR_MISS.inc()
+        return None
+    VALIDATOR_HIT.inc()
+    return Response(
+        status_code=304, headers=_validator_headers(stored.etag, stored.last_modified)
+    )
+
+
+async def conditional_response(
+    request: Request, content, key=None, last_modified=None, expires_at=None
+):
+    """
+    Encodes content once and answers with either a 304 or the full body.
+
+    The ETag is derived from a hash of the encoded body, and is stored under key so
+    later requests can be answered by not_modified() without building the content.
+
+    Parameters:
+        request: The incoming request.
+        content: The response content.
+        key: The resource key to store validators under.
+            (default: None, nothing is stored)
+        last_modified: The datetime the resource last changed.
+            (default: None)
+        expires_at: The datetime after which the stored validators must not be used.
+            (default: None)
+
+    Returns:
+        A 304 Response, or a 200 application/json Response with ETag/Last-Modified headers.
+    """
+    body = encode_json(content)
+    etag = make_etag(body)
+
+    if key is not None:
+        await validators.set(key, Validators(etag, last_modified, expires_at))
+
+    headers = _validator_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def invalidate_on_roster_write(entity, keys):
+    """
+    Write listener that drops the stored validators of refreshed rosters.
+
+    Parameters:
+        entity: PonyORM entity class that was written.
+        keys: A list of the (team_id, season) keys written, or None for all rosters.
+    """
+    if entity.__name__ != "RosterRefresh":
+        return
+    if keys is None:
+        validators.invalidate("roster")
+        return
+    for team_id, season in keys:
+        validators.invalidate("roster", team_id, season)
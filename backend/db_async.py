@@ -0,0 +1,86 @@
+"""
+Awaitable access to the synchronous PonyORM layer.
+
+Every DatabaseConnection and DatabaseHelper method opens its own db_session and
+blocks on the database, so calling them from an async route stalls the event loop
+for the whole round-trip. run_db() runs them on a dedicated, size-bounded thread
+pool instead.
+
+PonyORM keeps one connection per thread, so the pool size (the DB_POOL_SIZE
+environment variable, default 8) is also the most database connections a worker
+will open.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from db_connection import db
+from db_helpers import create_db_helper
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+
+db_executor = ThreadPoolExecutor(
+    max_workers=DB_POOL_SIZE, thread_name_prefix="nhltrak-db"
+)
+
+
+async def run_db(func, *args, **kwargs):
+    """
+    Runs a synchronous database call on the DB thread pool.
+
+    The caller's context variables are copied to the worker thread, so per-request
+    state such as query instrumentation follows the call.
+
+    Parameters:
+        func: The synchronous callable.
+        *args: Positional arguments for func.
+        **kwargs: Keyword arguments for func.
+
+    Returns:
+        The return value of func.
+
+    Examples:
+        Get a team without blocking the event loop
+            team = await run_db(db.get_by_id, Team, 1)
+    """
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(db_executor, call)
+
+
+class AsyncProxy:
+    """
+    Exposes every method of an object as an awaitable that runs on the DB thread pool.
+
+    Examples:
+        adb = AsyncProxy(db)
+        teams = await adb.get_all(Team)
+    """
+
+    def __init__(self, target):
+        """
+        Parameters:
+            target: The object whose methods are wrapped (ex: a DatabaseConnection).
+        """
+        self._target = target
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await run_db(attr, *args, **kwargs)
+
+        setattr(self, name, call)
+        return call
+
+
+adb = AsyncProxy(db)
+
+db_helper = create_db_helper(db)
+adb_helper = AsyncProxy(db_helper)
@@ -1,16 +1,107 @@
 import os
+from functools import lru_cache
+from time import perf_counter
+
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extensions import connection as PGConnection, cursor as PGCursor
+from psycopg2.extras import RealDictCursor
 from pony.orm import Database, db_session, select, commit, rollback
 from contextlib import contextmanager
 from dotenv import dotenv_values
 
 from icecream import ic
 
-config = dotenv_values(".env")
-DB_USER = config["DB_USER"]
-DB_PASSWORD = config["DB_PASSWORD"]
-DB_HOST = config["DB_HOST"]
-DB_PORT = config["DB_PORT"]
-DB_NAME = config["DB_NAME"]
+
+@lru_cache(maxsize=None)
+def load_config():
+    """
+    Reads the .env file once, the first time a setting is needed.
+
+    Returns:
+        A dictionary of the values in .env (empty if there is no .env file).
+    """
+    return dotenv_values(".env")
+
+
+def _setting(value, name, default=""):
+    """
+    Resolves a connection setting from an explicit value, the .env file or the environment.
+    """
+    return value or load_config().get(name) or os.environ.get(name, default)
+
+
+# Idempotent schema changes for tables created before a column was added to an
+# entity. PonyORM only creates missing tables, and checks existing ones against the
+# entities when mapping, so these run first. Tables that don't exist yet are left
+# to create_tables.
+MIGRATIONS = [
+    "ALTER TABLE IF EXISTS players ADD COLUMN IF NOT EXISTS content_hash TEXT",
+]
+
+
+class InstrumentedCursor(PGCursor):
+    """
+    psycopg2 cursor that reports every executed statement to query listeners.
+
+    DatabaseConnection.connect() binds PonyORM with a subclass of this cursor whose
+    listeners attribute is the connection's listener list.
+    """
+
+    listeners = ()
+
+    def _report(self, query, params, start):
+        duration = perf_counter() - start
+        if not self.listeners:
+            return
+        if not isinstance(query, str):
+            query = (
+                query.decode() if isinstance(query, bytes) else query.as_string(self)
+            )
+        for callback in self.listeners:
+            try:
+                callback(query, params, duration, self.rowcount)
+            except Exception as e:
+                print(f"Error in query listener: {e}")
+
+    def execute(self, query, vars=None):
+        start = perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._report(query, vars, start)
+
+    def executemany(self, query, vars_list):
+        start = perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._report(query, None, start)
+
+
+class TrackedConnection(PGConnection):
+    """
+    psycopg2 connection that reports when it is opened and closed to connection listeners.
+    """
+
+    listeners = ()
+
+    def _report(self, event):
+        for callback in self.listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error in connection listener: {e}")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._report("open")
+
+    def close(self):
+        was_open = not self.closed
+        super().close()
+        if was_open:
+            self._report("close")
 
 
 class DatabaseConnection:
@@ -30,14 +121,20 @@ class DatabaseConnection:
             database: Database name.
                 (default: fron .env file or from env or 'postgres')
         """
-        self.user = user or DB_USER or os.environ.get("DB_USER", "")
-        self.password = password or DB_PASSWORD or os.environ.get("DB_PASSWORD", "")
-        self.host = host or DB_HOST or os.environ.get("DB_HOST" "localhost")
-        self.port = port or DB_PORT or os.environ.get("DB_PORT" "5432")
-        self.database = database or DB_NAME or os.environ.get("DB_NAME" "postgres")
+        # Settings missing here are resolved in connect(), so creating an instance
+        # doesn't read .env at import time.
+        self.user = user
+        self.password = password
+        self.host = host
+        self.port = port
+        self.database = database
 
         self.db = Database()
         self._connected = False
+        self._mapped = False
+        self._write_listeners = []
+        self._query_listeners = []
+        self._connection_listeners = []
 
     def connect(self, debug=False):
         """
@@ -49,6 +146,15 @@ class DatabaseConnection:
         Returns:
             True if connection to database is successful, False on error.
         """
+        if self._connected:
+            return True
+
+        self.user = _setting(self.user, "DB_USER")
+        self.password = _setting(self.password, "DB_PASSWORD")
+        self.host = _setting(self.host, "DB_HOST", "localhost")
+        self.port = _setting(self.port, "DB_PORT", "5432")
+        self.database = _setting(self.database, "DB_NAME", "postgres")
+
         try:
             self.db.bind(
                 provider="postgres",
@@ -57,6 +163,16 @@ class DatabaseConnection:
                 host=self.host,
                 port=self.port,
                 database=self.database,
+                cursor_factory=type(
+                    "InstrumentedCursor",
+                    (InstrumentedCursor,),
+                    {"listeners": self._query_listeners},
+                ),
+                connection_factory=type(
+                    "TrackedConnection",
+                    (TrackedConnection,),
+                    {"listeners": self._connection_listeners},
+                ),
             )
 
             if debug:
@@ -72,6 +188,19 @@ class DatabaseConnection:
             print(f"Error connecting to database: {e}")
             return False
 
+    def migrate(self):
+        """
+        Applies MIGRATIONS, in one transaction. Every statement is idempotent, so it
+        is safe to run at every startup.
+        """
+        connection = self.open_connection()
+        try:
+            with connection, connection.cursor() as cursor:
+                for statement in MIGRATIONS:
+                    cursor.execute(statement)
+        finally:
+            connection.close()
+
     def generate_mappings(self, create_tables=False):
         """
         Generates the database mappings for all entities.
@@ -83,8 +212,14 @@ class DatabaseConnection:
         if not self._connected:
             raise RuntimeError("Database not connected. Call connect() first.")
 
+        if self._mapped:
+            if create_tables:
+                self.db.create_tables()
+            return
+
         try:
             self.db.generate_mapping(create_tables=create_tables)
+            self._mapped = True
             if create_tables:
                 print("Tables created successfully")
         except Exception as e:
@@ -107,6 +242,74 @@ class DatabaseConnection:
         self.db.drop_all_tables(with_all_data=True)
         print("All tables dropped.")
 
+    def add_query_listener(self, callback):
+        """
+        Registers a callback that is called after every SQL statement PonyORM executes.
+
+        Callbacks run synchronously on the thread that ran the statement, so they
+        should be cheap.
+
+        Parameters:
+            callback: A callable taking (sql, params, duration, rowcount), where
+                duration is in seconds and rowcount is the cursor's rowcount (-1 if unknown).
+
+        Examples:
+            Count statements
+                counter = {"queries": 0}
+
+                def on_query(sql, params, duration, rowcount):
+                    counter["queries"] += 1
+
+                db.add_query_listener(on_query)
+        """
+        self._query_listeners.append(callback)
+
+    def add_connection_listener(self, callback):
+        """
+        Registers a callback that is called when PonyORM opens or closes a connection.
+
+        Parameters:
+            callback: A callable taking the event name, "open" or "close".
+        """
+        self._connection_listeners.append(callback)
+
+    def add_write_listener(self, callback):
+        """
+        Registers a callback that is called after every committed write.
+
+        Parameters:
+            callback: A callable taking (entity, keys), where entity is the PonyORM
+                entity class that was written and keys is a list of the primary keys
+                written, or None if they aren't known.
+
+        Examples:
+            Drop cached teams whenever a team changes
+                def on_write(entity, keys):
+                    if entity is Team:
+                        cache.clear()
+
+                db.add_write_listener(on_write)
+        """
+        self._write_listeners.append(callback)
+
+    def notify_write(self, entity, keys=None):
+        """
+        Calls every registered write listener.
+
+        The generic write methods call this themselves. Code writing through
+        entities directly (ex: DatabaseHelper) should call it after committing.
+
+        Parameters:
+            entity: PonyORM entity class that was written.
+            keys: A list of the primary keys written.
+                (default: None)
+        """
+        for callback in self._write_listeners:
+            try:
+                callback(entity, keys)
+            except Exception as e:
+                print(f"Error in write listener: {e}")
+
     @db_session
     def get_all(self, entity, filters=None, **kwargs):
         """
@@ -229,6 +432,7 @@ class DatabaseConnection:
         all_data.update(kwargs)
         instance = entity(**all_data)
         commit()
+        self.notify_write(entity, [instance.get_pk()])
         return instance
 
     @db_session
@@ -273,6 +477,7 @@ class DatabaseConnection:
                 }
                 instances.append(entity(**data))
         commit()
+        self.notify_write(entity, [instance.get_pk() for instance in instances])
         return instances
 
     @db_session
@@ -327,6 +532,7 @@ class DatabaseConnection:
 
             instance.set(**all_updates)
             commit()
+            self.notify_write(entity, [id_value])
             return instance
         return None
 
@@ -395,6 +601,7 @@ class DatabaseConnection:
             record.set(**all_updates)
             count += 1
         commit()
+        self.notify_write(entity, [record.get_pk() for record in records_to_update])
         return count
 
     @db_session
@@ -413,6 +620,7 @@ class DatabaseConnection:
         if instance:
             instance.delete()
             commit()
+            self.notify_write(entity, [id_value])
             return True
         return False
 
@@ -472,9 +680,11 @@ class DatabaseConnection:
 
         records = list(query)
         count = len(records)
+        keys = [record.get_pk() for record in records]
         for record in records:
             record.delete()
         commit()
+        self.notify_write(entity, keys)
         return count
 
     @db_session
@@ -869,6 +1079,132 @@ class DatabaseConnection:
             for instance in instances
         ]
 
+    def open_connection(self, readonly=False):
+        """
+        Opens a plain psycopg2 connection outside of PonyORM, with the same settings.
+
+        Statements run on it are not reported to query listeners. The caller is
+        responsible for closing it.
+
+        Parameters:
+            readonly: Makes every transaction on the connection read-only if set to True.
+                (default: False)
+
+        Returns:
+            A psycopg2 connection.
+        """
+        connection = psycopg2.connect(
+            user=self.user,
+            password=self.password,
+            host=self.host,
+            port=self.port,
+            dbname=self.database,
+        )
+        if readonly:
+            connection.set_session(readonly=True)
+        return connection
+
+    def stream_query(self, query, params=None, batch_size=1000):
+        """
+        Streams the rows of a raw SQL query through a server-side cursor.
+
+        A dedicated connection is opened for the lifetime of the generator so rows
+        can be consumed outside of a db_session (ex: by a StreamingResponse), and
+        only batch_size rows are held in memory at any time.
+
+        Parameters:
+            query: SQL query string or psycopg2.sql.Composed object.
+            params: A dictionary or sequence of query parameters.
+                (default: None)
+            batch_size: The number of rows fetched from the server per round-trip.
+                (default: 1000)
+
+        Yields:
+            A dictionary per row, keyed by column name.
+        """
+        connection = self.open_connection(readonly=True)
+        try:
+            with connection.cursor(
+                name="nhltrak_stream", cursor_factory=RealDictCursor
+            ) as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(query, params)
+                for row in cursor:
+                    yield row
+        finally:
+            connection.close()
+
+    def stream_batches(self, query, params=None, batch_size=10000):
+        """
+        Streams the rows of a raw SQL query through a server-side cursor, in batches.
+
+        Like stream_query(), but rows are plain tuples handed over batch_size at a
+        time, for consumers that build columns (ex: Arrow record batches).
+
+        Parameters:
+            query: SQL query string or psycopg2.sql.Composed object.
+            params: A dictionary or sequence of query parameters.
+                (default: None)
+            batch_size: The number of rows fetched from the server per round-trip.
+                (default: 10000)
+
+        Yields:
+            A list of up to batch_size row tuples, in the query's column order.
+        """
+        connection = self.open_connection(readonly=True)
+        try:
+            with connection.cursor(name="nhltrak_batches") as cursor:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+        finally:
+            connection.close()
+
+    def stream_all(self, entity, filters=None, batch_size=1000, **kwargs):
+        """
+        Streams all rows of an entity's table with optional equality filters.
+
+        Parameters:
+            entity: PonyORM entity class.
+            filters: A dictionary of column:value pairs to filter by.
+                (default: None)
+            batch_size: The number of rows fetched from the server per round-trip.
+                (default: 1000)
+            **kwargs: Keyword arguments for filtering.
+
+        Yields:
+            A dictionary per row, keyed by column name. Relations are returned as
+            their foreign key value.
+
+        Examples:
+            Stream every stat row of a season
+                for row in db.stream_all(Stat, season='20252026'):
+                    ...
+        """
+        all_filters = {}
+        if filters:
+            all_filters.update(filters)
+        all_filters.update(kwargs)
+
+        for key in all_filters:
+            if key not in entity._adict_:
+                raise ValueError(f"{entity.__name__} has no attribute '{key}'")
+
+        query = sql.SQL("SELECT * FROM {}").format(sql.Identifier(entity._table_))
+        if all_filters:
+            query += sql.SQL(" WHERE ") + sql.SQL(" AND ").join(
+                sql.SQL("{} = {}").format(sql.Identifier(key), sql.Placeholder(key))
+                for key in all_filters
+            )
+        query += sql.SQL(" ORDER BY ") + sql.SQL(", ").join(
+            sql.Identifier(column) for column in entity._pk_columns_
+        )
+
+        return self.stream_query(query, all_filters, batch_size=batch_size)
+
     def disconnect(self):
         """
         Disconnects from the database.
@@ -890,7 +1226,12 @@ def init_db(
     create_tables=False,
 ):
     """
-    Initializes and connects to the database.
+    Connects the shared database and generates the entity mappings.
+
+    Entities are declared on the shared connection, so this binds that instance
+    instead of creating a new one. It is safe to call more than once; only the
+    first call connects and applies MIGRATIONS. Call it once at startup (ex: in
+    lifespan), not at import.
 
     Parameters:
         user: Database username.
@@ -902,11 +1243,19 @@ def init_db(
         create_tables: Creates database tables that do not exist if set to True.
 
     Returns:
-        DatabaseConnection instance.
+        The shared DatabaseConnection instance.
     """
-    db_conn = DatabaseConnection(user, password, host, port, database)
-    db_conn.connect(debug=debug)
-    if create_tables:
-        db_conn.create_tables()
-
-    return db_conn
+    import db_models.entities  # noqa: F401 - entities must be declared before mapping
+
+    if not db._connected:
+        db.user = user or db.user
+        db.password = password or db.password
+        db.host = host or db.host
+        db.port = port or db.port
+        db.database = database or db.database
+        db.connect(debug=debug)
+
+    if db._connected and not db._mapped:
+        db.migrate()
+    db.generate_mappings(create_tables=create_tables)
+    return db
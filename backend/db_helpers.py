@@ -1,6 +1,57 @@
-from pony.orm import db_session
+import hashlib
+from datetime import date, datetime
 
-from db_models.entities import Player, Team, PlayerTeamSeason
+import orjson
+from pony.orm import db_session, select
+
+from db_models.entities import (
+    AppSetting,
+    Conference,
+    Division,
+    Player,
+    Team,
+    PlayerTeamSeason,
+    PlayerCareerTotals,
+    PlayerSeasonTotals,
+    PlayerSplitTotals,
+    RosterRefresh,
+    Stat,
+)
+from records import RosterEntry, TeamRecord, intern_str
+from aggregates import COUNTERS, AggregateDeltas, sum_splits
+
+TEAM_SEED_VERSION_KEY = "team_seed_version"
+
+
+def current_season(today=None):
+    """
+    Gets the season string of a date. January to April belong to the season that
+    started the previous year.
+
+    Parameters:
+        today: The date.
+            (default: today)
+
+    Returns:
+        The season string (ex: "20252026").
+    """
+    today = today or date.today()
+    start = today.year - 1 if today.month <= 4 else today.year
+    return f"{start}{start + 1}"
+
+
+def content_hash(data: dict):
+    """
+    Hashes a normalized upstream record, so unchanged rows can be skipped on refresh.
+
+    Parameters:
+        data: A dictionary of column:value pairs (ex: a player without last_updated).
+
+    Returns:
+        A 32 character hex digest that only depends on the keys and values of data.
+    """
+    encoded = orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
 
 
 class DatabaseHelper:
@@ -97,37 +148,447 @@ class DatabaseHelper:
                 (ex: "20252026" is the 2025-2026 season.)
 
         Returns:
-            A list of all players on the given team for the given season.
+            A list of RosterEntry records for all players on the given team for the
+            given season, ordered by player ID.
         """
         team = Team[team_id]
         if team:
             roster = []
             for pts in team.player_seasons:
                 if pts.season == season:
-                    player = pts.player
-                    roster.append(
-                        {
-                            "id": player.id,
-                            "first_name": player.first_name,
-                            "last_name": player.last_name,
-                            "position": player.position,
-                            "birth_city": player.birth_city,
-                            "birth_country": player.birth_country,
-                            "birth_province_state": player.birth_province_state,
-                            "shoots_catches": player.shoots_catches,
-                            "height_in_centimeters": player.height_in_centimeters,
-                            "height_in_inches": player.height_in_inches,
-                            "weight_in_kilograms": player.weight_in_kilograms,
-                            "weight_in_pounds": player.weight_in_pounds,
-                            "headshot": player.headshot,
-                            "sweater_number": pts.sweater_number,
-                            "games_played": pts.games_played,
-                            "last_updated": player.last_updated,
-                        }
-                    )
+                    roster.append(RosterEntry.from_entities(pts.player, pts))
+            # Sets are unordered, and the roster's ETag is a hash of its body.
+            roster.sort(key=lambda entry: entry.id)
             return roster
         return []
 
+    @db_session
+    def get_team_rosters(self, team_ids: list, season: str):
+        """
+        Gets the rosters of several teams for a season.
+
+        All rosters come from one query joining team-seasons to players, plus one
+        query each for the teams and their refresh times, however many teams are
+        asked for.
+
+        Parameters:
+            team_ids: The IDs of the teams.
+            season: The season string (ex: "20252026").
+
+        Returns:
+            A dictionary of team ID -> {"abbr", "roster", "refreshed_at"} for every
+            team that exists. roster is in get_team_roster() form and order, and
+            refreshed_at is None if the roster was never refreshed.
+        """
+        if not team_ids:
+            return {}
+
+        rosters = {
+            team_id: {"abbr": intern_str(abbr), "roster": [], "refreshed_at": None}
+            for team_id, abbr in select(
+                (t.id, t.abbr) for t in Team if t.id in team_ids
+            )
+        }
+        for team_id, refreshed_at in select(
+            (r.team.id, r.refreshed_at)
+            for r in RosterRefresh
+            if r.team.id in team_ids and r.season == season
+        ):
+            rosters[team_id]["refreshed_at"] = refreshed_at
+
+        # The team ID, then the RosterEntry fields in order.
+        rows = select(
+            (
+                pts.team.id,
+                p.id,
+                p.first_name,
+                p.last_name,
+                p.position,
+                p.birth_city,
+                p.birth_country,
+                p.birth_province_state,
+                p.shoots_catches,
+                p.height_in_centimeters,
+                p.height_in_inches,
+                p.weight_in_kilograms,
+                p.weight_in_pounds,
+                p.headshot,
+                pts.sweater_number,
+                pts.games_played,
+                p.last_updated,
+            )
+            for pts in PlayerTeamSeason
+            for p in Player
+            if pts.player == p and pts.team.id in team_ids and pts.season == season
+        ).without_distinct()
+        # Ordered by player ID, so a roster's body (and its ETag) is stable.
+        rows = rows.order_by(2)
+        for team_id, *values in rows:
+            rosters[team_id]["roster"].append(RosterEntry.from_row(values))
+        return rosters
+
+    @db_session
+    def get_team_records(self):
+        """
+        Gets every team as a compact record.
+
+        Returns:
+            A list of TeamRecord instances, ordered by team ID.
+        """
+        return [
+            TeamRecord.from_entity(team)
+            for team in Team.select().order_by(Team.id).prefetch(Division, Conference)
+        ]
+
+    @db_session
+    def get_roster_with_freshness(self, team_id: int, season: str):
+        """
+        Gets a team's roster for a season and when it was last refreshed from the NHL API.
+
+        Parameters:
+            team_id: The ID of the team.
+            season: The season string (ex: "20252026").
+
+        Returns:
+            A tuple of (roster, refreshed_at), where roster is as returned by
+            get_team_roster() and refreshed_at is None if it was never refreshed.
+        """
+        refresh = RosterRefresh.get(team=team_id, season=season)
+        return (
+            self.get_team_roster(team_id, season),
+            refresh.refreshed_at if refresh else None,
+        )
+
+    def store_team_roster(self, team_id: int, season: str, players: list):
+        """
+        Writes a roster fetched from the NHL API, touching only rows whose content changed.
+
+        Each player's content hash is compared with the stored one, so unchanged
+        players keep their row (and last_updated) as is. Team-season rows are only
+        written when they are new or the sweater number changed. The refresh time
+        is recorded separately in RosterRefresh, in the same transaction.
+
+        Parameters:
+            team_id: The ID of the team.
+            season: The season string (ex: "20252026").
+            players: A list of player dictionaries with the Player columns except
+                last_updated and content_hash.
+
+        Returns:
+            A dictionary report with inserted, updated and unchanged counts for
+            players and team_seasons, and the refreshed_at time.
+        """
+        report = {
+            "players": {"inserted": 0, "updated": 0, "unchanged": 0},
+            "team_seasons": {"inserted": 0, "updated": 0, "unchanged": 0},
+        }
+        changed = []
+        now = datetime.now()
+        ids = [player["id"] for player in players]
+
+        with db_session:
+            team = Team[team_id]
+            existing = (
+                {p.id: p for p in select(p for p in Player if p.id in ids)}
+                if ids
+                else {}
+            )
+            seasons = {
+                pts.player.id: pts
+                for pts in select(
+                    pts
+                    for pts in PlayerTeamSeason
+                    if pts.team == team and pts.season == season
+                )
+            }
+
+            for data in players:
+                digest = content_hash(data)
+                player = existing.get(data["id"])
+                if player is None:
+                    player = Player(**data, content_hash=digest, last_updated=now)
+                    report["players"]["inserted"] += 1
+                    changed.append(data["id"])
+                elif player.content_hash != digest:
+                    player.set(**data, content_hash=digest, last_updated=now)
+                    report["players"]["updated"] += 1
+                    changed.append(data["id"])
+                else:
+                    report["players"]["unchanged"] += 1
+
+                pts = seasons.get(data["id"])
+                if pts is None:
+                    PlayerTeamSeason(
+                        player=player,
+                        team=team,
+                        season=season,
+                        sweater_number=data["sweater_number"],
+                    )
+                    report["team_seasons"]["inserted"] += 1
+                elif pts.sweater_number != data["sweater_number"]:
+                    pts.sweater_number = data["sweater_number"]
+                    report["team_seasons"]["updated"] += 1
+                else:
+                    report["team_seasons"]["unchanged"] += 1
+
+            refresh = RosterRefresh.get(team=team, season=season)
+            if refresh:
+                refresh.refreshed_at = now
+            else:
+                RosterRefresh(team=team, season=season, refreshed_at=now)
+
+        if changed:
+            self.db.notify_write(Player, changed)
+        self.db.notify_write(RosterRefresh, [[team_id, season]])
+
+        report["refreshed_at"] = now
+        return report
+
+    @db_session
+    def get_stat_rows(self, season: str, player_id=None, team_abbr=None):
+        """
+        Gets the game stat columns used by the analytics module for a season.
+
+        Parameters:
+            season: The season string (ex: "20252026").
+            player_id: Only return the given player's games.
+                (default: None)
+            team_abbr: Only return games played for the given team.
+                (default: None)
+
+        Returns:
+            A list of tuples in analytics.STAT_COLUMNS order.
+        """
+        return select(
+            (
+                s.player.id,
+                s.game_date,
+                s.goals,
+                s.assists,
+                s.points,
+                s.shots,
+                s.power_play_points,
+                s.toi,
+            )
+            for s in Stat
+            if s.season == season
+            and s.player is not None
+            and (player_id is None or s.player.id == player_id)
+            and (team_abbr is None or s.team_abbr == team_abbr)
+        ).without_distinct()[:]
+
+    @db_session(retry=3)
+    def ingest_stats(self, stats: list):
+        """
+        Inserts or updates a batch of game stat rows, and applies their change to
+        the career, season and split totals in the same transaction.
+
+        A row that already exists has its old values taken out of the totals
+        before its new values are added, so re-ingesting a game is safe. The batch
+        is retried if another batch changed the same totals concurrently.
+
+        Parameters:
+            stats: A list of dictionaries of Stat column:value pairs, with "id" and
+                "player" (the player ID).
+
+        Returns:
+            A dictionary with the number of stat rows inserted, updated and
+            unchanged, and of totals changed per aggregate table.
+        """
+        ids = [stat["id"] for stat in stats]
+        existing = {s.id: s for s in Stat.select(lambda s: s.id in ids)}
+        deltas = AggregateDeltas()
+        report = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+        for data in stats:
+            stat = existing.get(data["id"])
+            if stat is None:
+                Stat(**data)
+                deltas.add(data)
+                report["inserted"] += 1
+                continue
+
+            old = stat.to_dict()
+            if all(old.get(key) == value for key, value in data.items()):
+                report["unchanged"] += 1
+                continue
+            deltas.add(old, sign=-1)
+            stat.set(**data)
+            deltas.add({**old, **data})
+            report["updated"] += 1
+
+        report.update(deltas.apply())
+        return report
+
+    @db_session
+    def get_player_summary(self, player_id: int):
+        """
+        Gets a player's career totals and their totals per season and team.
+
+        Both come from the aggregate tables: the career totals are one primary key
+        lookup and the seasons one index range, whatever the number of games.
+
+        Parameters:
+            player_id: The ID of the player.
+
+        Returns:
+            A dictionary with "career" (COUNTERS name -> value) and "seasons" (a list
+            of the same plus season and team_abbr, oldest first), or None if the
+            player has no totals.
+        """
+        career = PlayerCareerTotals.get(player=player_id)
+        if career is None:
+            return None
+
+        seasons = select(
+            s for s in PlayerSeasonTotals if s.player.id == player_id
+        ).order_by(PlayerSeasonTotals.season, PlayerSeasonTotals.team_abbr)
+        return {
+            "career": {name: getattr(career, name) for name in COUNTERS},
+            "seasons": [
+                {
+                    "season": s.season,
+                    "team_abbr": s.team_abbr,
+                    **{name: getattr(s, name) for name in COUNTERS},
+                }
+                for s in seasons
+            ],
+            "updated_at": career.updated_at,
+        }
+
+    @db_session
+    def get_player_splits(self, player_id: int, dimension: str, season=None):
+        """
+        Gets a player's totals split by a dimension, from the split rollup.
+
+        Parameters:
+            player_id: The ID of the player.
+            dimension: One of aggregates.SPLIT_DIMENSIONS (ex: "opponent").
+            season: Only count the given season string.
+                (default: None, every season)
+
+        Returns:
+            A list of totals per split key, as returned by aggregates.sum_splits().
+        """
+        return sum_splits(
+            select(
+                s
+                for s in PlayerSplitTotals
+                if s.player.id == player_id
+                and s.dimension == dimension
+                and (season is None or s.season == season)
+            )
+        )
+
+    @db_session
+    def get_team_splits(self, team_abbr: str, season: str, dimension: str):
+        """
+        Gets the totals of a team's players split by a dimension, from the split rollup.
+
+        Parameters:
+            team_abbr: The team abbreviation.
+            season: The season string (ex: "20252026").
+            dimension: One of aggregates.SPLIT_DIMENSIONS (ex: "home_road").
+
+        Returns:
+            A list of totals per split key, as returned by aggregates.sum_splits(),
+            with games renamed player_games (games summed over the team's players).
+        """
+        splits = sum_splits(
+            select(
+                s
+                for s in PlayerSplitTotals
+                if s.team_abbr == team_abbr
+                and s.season == season
+                and s.dimension == dimension
+            )
+        )
+        for split in splits:
+            split["player_games"] = split.pop("games")
+        return splits
+
+    @db_session
+    def get_setting(self, key: str):
+        """
+        Gets a stored application setting.
+
+        Parameters:
+            key: The setting name.
+
+        Returns:
+            The setting value, or None if it isn't set.
+        """
+        setting = AppSetting.get(key=key)
+        return setting.value if setting else None
+
+    def upsert_league(self, teams: list, seed_version: str):
+        """
+        Inserts or updates all conferences, divisions and teams in one transaction.
+
+        Existing rows are loaded once into name/id maps, so the whole league is
+        written without a lookup per team. The seed version is stored in the same
+        transaction.
+
+        Parameters:
+            teams: A list of team dictionaries as returned by nhl_client.teams.teams().
+            seed_version: The seed version to store once the league is written.
+
+        Returns:
+            A dictionary with the number of conferences, divisions and teams in the league.
+        """
+        with db_session:
+            conferences = {c.name: c for c in Conference.select()}
+            divisions = {d.name: d for d in Division.select()}
+            existing_teams = {t.id: t for t in Team.select()}
+
+            for team in teams:
+                conference = team["conference"]
+                if conference["name"] not in conferences:
+                    conferences[conference["name"]] = Conference(
+                        abbr=conference["abbr"], name=conference["name"]
+                    )
+                else:
+                    conferences[conference["name"]].abbr = conference["abbr"]
+
+                division = team["division"]
+                if division["name"] not in divisions:
+                    divisions[division["name"]] = Division(
+                        abbr=division["abbr"], name=division["name"]
+                    )
+                else:
+                    divisions[division["name"]].abbr = division["abbr"]
+
+                team_data = {
+                    "abbr": team["abbr"],
+                    "common_name": team["common_name"],
+                    "name": team["name"],
+                    "conference": conferences[conference["name"]],
+                    "division": divisions[division["name"]],
+                    "logo": team["logo"],
+                }
+                if team["franchise_id"] in existing_teams:
+                    existing_teams[team["franchise_id"]].set(**team_data)
+                else:
+                    existing_teams[team["franchise_id"]] = Team(
+                        id=team["franchise_id"], **team_data
+                    )
+
+            setting = AppSetting.get(key=TEAM_SEED_VERSION_KEY)
+            if setting:
+                setting.value = seed_version
+            else:
+                AppSetting(key=TEAM_SEED_VERSION_KEY, value=seed_version)
+
+        self.db.notify_write(Conference)
+        self.db.notify_write(Division)
+        self.db.notify_write(Team, [team["franchise_id"] for team in teams])
+
+        return {
+            "conferences": len(conferences),
+            "divisions": len(divisions),
+            "teams": len(teams),
+        }
+
 
 def create_db_helper(db_connection):
     """
@@ -1,8 +1,6 @@
 from pony.orm import Required, Optional, PrimaryKey, Set
 from datetime import datetime, date
-from db_connection import init_db, db
-
-db = init_db()
+from db_connection import db
 
 
 class Team(db.db.Entity):
@@ -16,6 +14,7 @@ class Team(db.db.Entity):
     division = Required("Division")
     logo = Optional(str)
     player_seasons = Set("PlayerTeamSeason")
+    roster_refreshes = Set("RosterRefresh")
 
 
 class Conference(db.db.Entity):
@@ -55,8 +54,12 @@ class Player(db.db.Entity):
     weight_in_kilograms = Optional(int)
     weight_in_pounds = Optional(int)
     last_updated = Required(datetime)
+    content_hash = Optional(str, nullable=True)
     stats = Set("Stat")
     team_seasons = Set("PlayerTeamSeason")
+    career_totals = Optional("PlayerCareerTotals")
+    season_totals = Set("PlayerSeasonTotals")
+    split_totals = Set("PlayerSplitTotals")
 
 
 class PlayerTeamSeason(db.db.Entity):
@@ -70,6 +73,15 @@ class PlayerTeamSeason(db.db.Entity):
     PrimaryKey(player, team, season)
 
 
+class RosterRefresh(db.db.Entity):
+    _table_ = "roster_refreshes"
+
+    team = Required("Team")
+    season = Required(str)
+    refreshed_at = Required(datetime)
+    PrimaryKey(team, season)
+
+
 class Stat(db.db.Entity):
     _table_ = "stats"
 
@@ -99,4 +111,76 @@ class Stat(db.db.Entity):
     season = Required(str)
 
 
-db.generate_mappings(create_tables=True)
+class PlayerCareerTotals(db.db.Entity):
+    _table_ = "player_career_totals"
+
+    player = PrimaryKey("Player")
+    games = Required(int, default=0)
+    goals = Required(int, default=0)
+    assists = Required(int, default=0)
+    points = Required(int, default=0)
+    shots = Required(int, default=0)
+    pim = Required(int, default=0)
+    plus_minus = Required(int, default=0)
+    power_play_goals = Required(int, default=0)
+    power_play_points = Required(int, default=0)
+    shorthanded_goals = Required(int, default=0)
+    shorthanded_points = Required(int, default=0)
+    game_winning_goals = Required(int, default=0)
+    toi_seconds = Required(int, default=0)
+    updated_at = Required(datetime)
+
+
+class PlayerSeasonTotals(db.db.Entity):
+    _table_ = "player_season_totals"
+
+    player = Required("Player")
+    season = Required(str)
+    team_abbr = Required(str)
+    games = Required(int, default=0)
+    goals = Required(int, default=0)
+    assists = Required(int, default=0)
+    points = Required(int, default=0)
+    shots = Required(int, default=0)
+    pim = Required(int, default=0)
+    plus_minus = Required(int, default=0)
+    power_play_goals = Required(int, default=0)
+    power_play_points = Required(int, default=0)
+    shorthanded_goals = Required(int, default=0)
+    shorthanded_points = Required(int, default=0)
+    game_winning_goals = Required(int, default=0)
+    toi_seconds = Required(int, default=0)
+    updated_at = Required(datetime)
+    PrimaryKey(player, season, team_abbr)
+
+
+class PlayerSplitTotals(db.db.Entity):
+    _table_ = "player_split_totals"
+
+    player = Required("Player")
+    season = Required(str)
+    team_abbr = Required(str)
+    dimension = Required(str)
+    split_key = Required(str)
+    games = Required(int, default=0)
+    goals = Required(int, default=0)
+    assists = Required(int, default=0)
+    points = Required(int, default=0)
+    shots = Required(int, default=0)
+    pim = Required(int, default=0)
+    plus_minus = Required(int, default=0)
+    power_play_goals = Required(int, default=0)
+    power_play_points = Required(int, default=0)
+    shorthanded_goals = Required(int, default=0)
+    shorthanded_points = Required(int, default=0)
+    game_winning_goals = Required(int, default=0)
+    toi_seconds = Required(int, default=0)
+    updated_at = Required(datetime)
+    PrimaryKey(player, season, team_abbr, dimension, split_key)
+
+
+class AppSetting(db.db.Entity):
+    _table_ = "app_settings"
+
+    key = PrimaryKey(str)
+    value = Optional(str)
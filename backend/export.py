@@ -0,0 +1,301 @@
+"""
+Columnar export of the players, player_team_seasons and stats tables.
+
+Rows are read through a server-side cursor (DatabaseConnection.stream_batches())
+and converted to Arrow record batches of batch_size rows, which are written as
+an Arrow IPC stream or a Parquet file (one row group per batch) as they arrive.
+At most one batch is held in memory, however large the table.
+
+Used by the /export routes, and from the command line (run from the backend directory):
+    python -m export stats --season 20252026 --format parquet --output stats.parquet
+"""
+
+import argparse
+import sys
+from datetime import date, datetime
+
+from psycopg2 import sql
+
+from db_connection import db, init_db
+from db_models.entities import Player, PlayerTeamSeason, Stat, Team
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, only needed for exports
+    pa = pq = None
+
+EXPORT_TABLES = {
+    "players": Player,
+    "player_team_seasons": PlayerTeamSeason,
+    "stats": Stat,
+}
+
+# Format -> (media type, file extension).
+EXPORT_FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Internal bookkeeping columns left out of exports.
+EXCLUDED_COLUMNS = {"content_hash"}
+
+EXPORT_BATCH_SIZE = 10000
+
+
+def _arrow_type(attr):
+    if attr.is_relation:
+        return pa.int64()
+    return {
+        int: pa.int64(),
+        str: pa.string(),
+        bool: pa.bool_(),
+        float: pa.float64(),
+        datetime: pa.timestamp("us"),
+        date: pa.date32(),
+    }[attr.py_type]
+
+
+def export_schema(table: str):
+    """
+    Builds the Arrow schema of an exported table. Requires the entity mappings (init_db()).
+
+    Parameters:
+        table: One of EXPORT_TABLES.
+
+    Returns:
+        A pyarrow.Schema with one field per column, named after the column.
+    """
+    entity = EXPORT_TABLES[table]
+    # Reverse sides of relations (ex: Player.career_totals) have no columns.
+    return pa.schema(
+        [
+            pa.field(column, _arrow_type(attr))
+            for attr in entity._attrs_
+            if not attr.is_collection
+            for column in attr.columns
+            if column not in EXCLUDED_COLUMNS
+        ]
+    )
+
+
+def export_query(table: str, schema, season=None, team_id=None):
+    """
+    Builds the SELECT of an exported table.
+
+    Parameters:
+        table: One of EXPORT_TABLES.
+        schema: The table's export_schema().
+        season: Only export rows of the given season string. For players, only
+            players with a player-team-season in it.
+            (default: None)
+        team_id: Only export rows of the given team. For players, only players
+            who played for it; for stats, games played for it.
+            (default: None)
+
+    Returns:
+        A tuple of (psycopg2.sql.Composed query, parameters dictionary).
+    """
+    entity = EXPORT_TABLES[table]
+    params = {"season": season, "team_id": team_id}
+    conditions = []
+
+    if table == "players":
+        seasons = PlayerTeamSeason._table_
+        if season is not None or team_id is not None:
+            membership = [sql.SQL("pts.player = p.id")]
+            if season is not None:
+                membership.append(sql.SQL("pts.season = %(season)s"))
+            if team_id is not None:
+                membership.append(sql.SQL("pts.team = %(team_id)s"))
+            conditions.append(
+                sql.SQL("EXISTS (SELECT 1 FROM {} pts WHERE {})").format(
+                    sql.Identifier(seasons), sql.SQL(" AND ").join(membership)
+                )
+            )
+    else:
+        if season is not None:
+            conditions.append(sql.SQL("p.season = %(season)s"))
+        if team_id is not None and table == "player_team_seasons":
+            conditions.append(sql.SQL("p.team = %(team_id)s"))
+        if team_id is not None and table == "stats":
+            conditions.append(
+                sql.SQL(
+                    "p.team_abbr = (SELECT abbr FROM {} WHERE id = %(team_id)s)"
+                ).format(sql.Identifier(Team._table_))
+            )
+
+    query = sql.SQL("SELECT {} FROM {} p").format(
+        sql.SQL(", ").join(
+            sql.SQL("p.{}").format(sql.Identifier(f.name)) for f in schema
+        ),
+        sql.Identifier(entity._table_),
+    )
+    if conditions:
+        query += sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions)
+    query += sql.SQL(" ORDER BY ") + sql.SQL(", ").join(
+        sql.SQL("p.{}").format(sql.Identifier(column)) for column in entity._pk_columns_
+    )
+    return query, params
+
+
+def to_record_batch(rows, schema):
+    """
+    Converts a list of row tuples, in schema order, to an Arrow record batch.
+    """
+    columns = zip(*rows)
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(list(column), type=field.type)
+            for column, field in zip(columns, schema)
+        ],
+        schema=schema,
+    )
+
+
+class _ChunkSink:
+    """
+    Write-only file object that keeps written bytes until they are drained.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _open_writer(fmt: str, sink, schema):
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    options = pa.ipc.IpcWriteOptions(compression="zstd")
+    return pa.ipc.new_stream(sink, schema, options=options)
+
+
+def write_batches(batches, fmt: str, schema):
+    """
+    Writes record batches in an export format, yielding the output as it is written.
+
+    Parameters:
+        batches: An iterable of lists of row tuples, in schema order.
+        fmt: One of EXPORT_FORMATS.
+        schema: The pyarrow.Schema of the rows.
+
+    Yields:
+        Chunks of the encoded output, one per batch plus the trailer.
+    """
+    sink = _ChunkSink()
+    with _open_writer(fmt, pa.PythonFile(sink, mode="w"), schema) as writer:
+        for rows in batches:
+            writer.write_batch(to_record_batch(rows, schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()
+
+
+def iter_export(
+    table: str, fmt: str, season=None, team_id=None, batch_size=EXPORT_BATCH_SIZE
+):
+    """
+    Exports a table, producing the encoded output as rows are read from the database.
+
+    Parameters:
+        table: One of EXPORT_TABLES.
+        fmt: One of EXPORT_FORMATS.
+        season: Only export rows of the given season (see export_query()).
+            (default: None)
+        team_id: Only export rows of the given team (see export_query()).
+            (default: None)
+        batch_size: Rows per database round-trip and per record batch.
+            (default: EXPORT_BATCH_SIZE)
+
+    Returns:
+        An iterator of chunks of the encoded output. The schema and query are built
+        before it is returned, so errors in them are raised here rather than after
+        a response has started.
+    """
+    if pa is None:
+        raise RuntimeError("Exports require pyarrow (pip install pyarrow).")
+
+    schema = export_schema(table)
+    query, params = export_query(table, schema, season, team_id)
+    return _stream_export(query, params, fmt, schema, batch_size)
+
+
+def _stream_export(query, params, fmt, schema, batch_size):
+    batches = db.stream_batches(query, params, batch_size=batch_size)
+    try:
+        yield from write_batches(batches, fmt, schema)
+    finally:
+        batches.close()
+
+
+def export_filename(table: str, fmt: str, season=None, team_id=None):
+    """
+    Builds the default file name of an export (ex: stats-20252026-team10.parquet).
+    """
+    parts = [table]
+    if season is not None:
+        parts.append(season)
+    if team_id is not None:
+        parts.append(f"team{team_id}")
+    return "-".join(parts) + "." + EXPORT_FORMATS[fmt][1]
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Exports a table to Arrow or Parquet."
+    )
+    arg_parser.add_argument("table", choices=sorted(EXPORT_TABLES))
+    arg_parser.add_argument(
+        "--format", choices=sorted(EXPORT_FORMATS), default="parquet"
+    )
+    arg_parser.add_argument("--season", help='Season string (ex: "20252026").')
+    arg_parser.add_argument("--team-id", type=int)
+    arg_parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    arg_parser.add_argument(
+        "--output", help="Output file, or - for stdout. (default: an export_filename())"
+    )
+    args = arg_parser.parse_args(argv)
+
+    init_db()
+    output = args.output or export_filename(
+        args.table, args.format, args.season, args.team_id
+    )
+    chunks = iter_export(
+        args.table, args.format, args.season, args.team_id, args.batch_size
+    )
+
+    size = 0
+    out = sys.stdout.buffer if output == "-" else open(output, "wb")
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+            size += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"Wrote {size} bytes to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+
+logger = logging.getLogger("nhltrak.queries")
+
+REPEAT_THRESHOLD = int(os.environ.get("QUERY_REPEAT_THRESHOLD", "10"))
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(statement: str):
+    """
+    Reduces a SQL statement to its shape, so the same query with different
+    parameters counts as one.
+
+    Parameters:
+        statement: The SQL statement as sent to the database.
+
+    Returns:
+        The statement with placeholders and literals replaced by "?", IN lists
+        collapsed to "(?)" and whitespace collapsed.
+
+    Examples:
+        normalize_sql('SELECT * FROM "team" WHERE "id" = %(p1)s')
+            -> 'SELECT * FROM "team" WHERE "id" = ?'
+    """
+    shape = _PLACEHOLDER.sub("?", statement)
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """
+    The SQL statements issued while handling one request.
+
+    A request's DB calls can run on several DB pool threads at once (ex: gathered
+    run_db() calls), so record() is guarded by a lock.
+    """
+
+    __slots__ = ("count", "duration", "rows", "shapes", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.rows = 0
+        self.shapes = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement, duration, rowcount):
+        shape = normalize_sql(statement)
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            if rowcount > 0:
+                self.rows += rowcount
+            self.shapes[shape] += 1
+
+    def repeated(self, threshold=REPEAT_THRESHOLD):
+        """
+        Returns:
+            A list of (shape, count) for statement shapes run more than threshold times.
+        """
+        with self._lock:
+            return [(shape, n) for shape, n in self.shapes.items() if n > threshold]
+
+
+class QueryTotals:
+    """
+    Process-wide query counters, aggregated over every instrumented request.
+    """
+
+    def __init__(self, top=20):
+        """
+        Parameters:
+            top: The number of repeated shapes reported by snapshot().
+                (default: 20)
+        """
+        self.top = top
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.queries = 0
+        self.duration = 0.0
+        self.rows = 0
+        self.n_plus_one = 0
+        self.repeated_shapes = Counter()
+
+    def add(self, stats: QueryStats, repeated):
+        self.requests += 1
+        self.queries += stats.count
+        self.duration += stats.duration
+        self.rows += stats.rows
+        if repeated:
+            self.n_plus_one += 1
+            for shape, n in repeated:
+                self.repeated_shapes[shape] += n
+
+    def snapshot(self):
+        """
+        Returns:
+            A dictionary with the request, query and row totals, total DB time in
+            milliseconds, the number of requests flagged as N+1 and the most
+            repeated statement shapes.
+        """
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "rows": self.rows,
+            "db_ms": self.duration * 1000,
+            "queries_per_request": (
+                self.queries / self.requests if self.requests else 0.0
+            ),
+            "n_plus_one_requests": self.n_plus_one,
+            "repeat_threshold": REPEAT_THRESHOLD,
+            "top_repeated": [
+                {"shape": shape, "count": n}
+                for shape, n in self.repeated_shapes.most_common(self.top)
+            ],
+        }
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar(
+    "nhltrak_query_stats", default=None
+)
+query_totals = QueryTotals()
+
+
+def record_query(statement, params, duration, rowcount):
+    """
+    Query listener (see DatabaseConnection.add_query_listener) that adds the
+    statement to the current request's QueryStats. Statements run outside an
+    instrumented request are ignored.
+    """
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, duration, rowcount)
+
+
+def current_query_stats():
+    """
+    Returns:
+        The QueryStats of the request being handled, or None outside a request.
+    """
+    return _current_stats.get()
+
+
+class QueryInstrumentationMiddleware:
+    """
+    ASGI middleware that collects per-request query stats.
+
+    Adds a Server-Timing header (ex: db;dur=12.3;desc="4 queries, 130 rows"),
+    updates query_totals and logs a warning when a statement shape runs more than
+    QUERY_REPEAT_THRESHOLD times in a single request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and stats.count:
+                timing = (
+                    f"db;dur={stats.duration * 1000:.1f};"
+                    f'desc="{stats.count} queries, {stats.rows} rows"'
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            repeated = stats.repeated()
+            query_totals.add(stats, repeated)
+            for shape, n in repeated:
+                logger.warning(
+                    "Possible N+1: %s %s ran the same statement %d times: %s",
+                    scope.get("method"),
+                    scope.get("path"),
+                    n,
+                    shape,
+                )
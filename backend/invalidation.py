@@ -0,0 +1,159 @@
+"""
+Cross-worker cache invalidation over Postgres LISTEN/NOTIFY.
+
+Every committed write reported by DatabaseConnection.notify_write() is published on
+the nhltrak_invalidate channel as {"origin", "entity", "keys"}. Each worker runs a
+listener thread that replays events from other workers through its own write
+listeners, so in-process caches (response_cache, conditional validators) are
+evicted within one NOTIFY round-trip of the write, in every worker.
+"""
+
+import json
+import os
+import select
+import socket
+import threading
+import uuid
+
+from icecream import ic
+
+from db_connection import db
+from metrics import INVALIDATIONS_PUBLISHED, INVALIDATIONS_RECEIVED
+
+CHANNEL = "nhltrak_invalidate"
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+MAX_PAYLOAD = 7900
+
+
+class InvalidationBus:
+    """
+    Publishes local writes and applies writes published by other workers.
+    """
+
+    def __init__(self, database):
+        """
+        Parameters:
+            database: The DatabaseConnection whose writes are shared.
+        """
+        self.database = database
+        self._publisher = None
+        self._publish_lock = threading.Lock()
+        self._applying = threading.local()
+        self._listener = None
+        self._stop = threading.Event()
+
+    def publish(self, entity, keys):
+        """
+        Write listener (see DatabaseConnection.add_write_listener) that publishes
+        the write to the other workers.
+
+        Writes replayed from other workers are not published again.
+        """
+        if getattr(self._applying, "remote", False):
+            return
+
+        message = {"origin": WORKER_ID, "entity": entity.__name__, "keys": keys}
+        payload = json.dumps(message, default=str)
+        if len(payload.encode()) > MAX_PAYLOAD:
+            message["keys"] = None  # too many keys: evict the whole entity instead
+            payload = json.dumps(message)
+
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publisher is None or self._publisher.closed:
+                        self._publisher = self.database.open_connection()
+                        self._publisher.autocommit = True
+                    with self._publisher.cursor() as cursor:
+                        cursor.execute("SELECT pg_notify(%s, %s)", (CHANNEL, payload))
+                    INVALIDATIONS_PUBLISHED.inc()
+                    return
+                except Exception as e:
+                    if self._publisher is not None:
+                        self._publisher.close()
+                    self._publisher = None
+                    if attempt:
+                        ic(f"Could not publish invalidation for {entity.__name__}: {e}")
+
+    def _apply(self, entity_name, keys):
+        entity = self.database.db.entities.get(entity_name)
+        if entity is None:
+            return
+        self._applying.remote = True
+        try:
+            self.database.notify_write(entity, keys)
+        finally:
+            self._applying.remote = False
+
+    def _handle(self, payload: str):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("origin") == WORKER_ID:
+            return
+        INVALIDATIONS_RECEIVED.inc()
+        self._apply(message.get("entity"), message.get("keys"))
+
+    def _flush_all(self):
+        # Events may have been missed while disconnected: evict everything.
+        for entity_name in list(self.database.db.entities):
+            self._apply(entity_name, None)
+
+    def _listen(self):
+        backoff = 1.0
+        connected_before = False
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self.database.open_connection()
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                if connected_before:
+                    self._flush_all()
+                connected_before = True
+                backoff = 1.0
+
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self._handle(connection.notifies.pop(0).payload)
+            except Exception as e:
+                ic(f"Invalidation listener disconnected: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+    def start(self):
+        """
+        Starts the listener thread. Call from lifespan, after the database is connected.
+        """
+        if self._listener is None:
+            self._stop.clear()
+            self._listener = threading.Thread(
+                target=self._listen, name="nhltrak-invalidation", daemon=True
+            )
+            self._listener.start()
+
+    def stop(self):
+        """
+        Stops the listener thread and closes the publisher connection.
+        """
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=2)
+            self._listener = None
+        with self._publish_lock:
+            if self._publisher is not None:
+                self._publisher.close()
+                self._publisher = None
+
+
+invalidation_bus = InvalidationBus(db)
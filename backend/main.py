@@ -1,5 +1,6 @@
-from db_connection import init_db
-from db_models.entities import Team, Conference, Division, Player, Stat
+from db_connection import init_db, db
+from db_async import db_helper
+from bootstrap import bootstrap_teams
 
 from contextlib import asynccontextmanager
 
@@ -7,67 +8,61 @@ from icecream import ic
 
 from fastapi import FastAPI
 
-from nhlpy import NHLClient
-
 from routers.team_routes import team_router
 from routers.player_routes import player_router
-
-nhl_client = NHLClient()
-
-
-db = init_db(create_tables=True)
+from routers.admin_routes import admin_router
+from routers.metrics_routes import metrics_router
+from routers.export_routes import export_router
+from responses import FastJSONResponse
+from response_cache import invalidate_on_team_write
+from conditional import invalidate_on_roster_write
+from invalidation import invalidation_bus
+from nhl import get_nhl_client
+from monitoring import loop_lag
+from profiling import ProfilingMiddleware, profiling_enabled
+from slow_queries import slow_query_log
+from prefetch import roster_prefetcher
+from instrumentation import QueryInstrumentationMiddleware, record_query
+from metrics import (
+    MetricsMiddleware,
+    mark_process_dead,
+    observe_connection,
+    observe_query,
+)
+
+db.add_write_listener(invalidate_on_team_write)
+db.add_write_listener(invalidate_on_roster_write)
+db.add_write_listener(invalidation_bus.publish)
+db.add_query_listener(record_query)
+db.add_query_listener(observe_query)
+db.add_query_listener(slow_query_log.record)
+db.add_connection_listener(observe_connection)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    all_teams = []
-    all_divisions = []
-    all_conferences = []
-
-    db_teams = db.get_all(Team)
-    db_conf = db.get_all(Conference)
-    db_div = db.get_all(Division)
-
-    if len(db_teams) < 32:
-        teams = nhl_client.teams.teams()
-
-        for team in teams:
-            if team["conference"] not in all_conferences:
-                all_conferences.append(team["conference"])
-
-            if team["division"] not in all_divisions:
-                all_divisions.append(team["division"])
-
-        if len(db_conf) < 2:
-            for conference in all_conferences:
-                db.insert_one(
-                    Conference, abbr=conference["abbr"], name=conference["name"]
-                )
-
-        if len(db_div) < 4:
-            for division in all_divisions:
-                db.insert_one(Division, abbr=division["abbr"], name=division["name"])
-
-        for team in teams:
-            conf = db.get_one(Conference, name=team["conference"]["name"])
-            div = db.get_one(Division, name=team["division"]["name"])
-            team_data = {
-                "id": team["franchise_id"],
-                "abbr": team["abbr"],
-                "common_name": team["common_name"],
-                "name": team["name"],
-                "conference": conf.id,
-                "division": div.id,
-                "logo": team["logo"],
-            }
-            all_teams.append(team_data)
-
-        teams_inserted = db.insert_many(Team, all_teams)
+    init_db(create_tables=True)
+    invalidation_bus.start()
+    await bootstrap_teams(db_helper, get_nhl_client())
+    loop_lag.start()
+    roster_prefetcher.start()
 
     yield
 
+    await roster_prefetcher.stop()
+    await loop_lag.stop()
+    invalidation_bus.stop()
+    mark_process_dead()
+
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(QueryInstrumentationMiddleware)
+app.add_middleware(MetricsMiddleware)
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
 
 app.include_router(team_router, tags=["team"], prefix="/teams")
 app.include_router(player_router, tags=["player"], prefix="/players")
+app.include_router(admin_router, tags=["admin"], prefix="/admin")
+app.include_router(export_router, tags=["export"], prefix="/export")
+app.include_router(metrics_router, tags=["metrics"])
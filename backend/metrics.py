@@ -0,0 +1,195 @@
+"""
+Prometheus metrics for the API.
+
+Every metric is created here, at import time, so they all share one value store.
+With several uvicorn workers, set the PROMETHEUS_MULTIPROC_DIR environment variable
+to an empty, writable directory before the workers start (ex: /dev/shm/nhltrak-metrics);
+each worker then writes its values to memory-mapped files in that directory and
+/metrics aggregates all of them.
+"""
+
+import os
+from time import perf_counter
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+REQUEST_LATENCY = Histogram(
+    "nhltrak_http_request_duration_seconds",
+    "Time spent handling HTTP requests, by route template.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+NHL_API_CALLS = Counter(
+    "nhltrak_nhl_api_calls_total",
+    "Calls made to the NHL API, by endpoint.",
+    ["endpoint"],
+)
+NHL_API_ERRORS = Counter(
+    "nhltrak_nhl_api_errors_total",
+    "Failed calls to the NHL API, by endpoint and error type.",
+    ["endpoint", "error"],
+)
+NHL_API_LATENCY = Histogram(
+    "nhltrak_nhl_api_duration_seconds",
+    "Time spent waiting on the NHL API, by endpoint.",
+    ["endpoint"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+
+BREAKER_STATE = Gauge(
+    "nhltrak_circuit_breaker_state",
+    "Circuit breaker state: 0 closed, 1 half-open, 2 open.",
+    ["dependency"],
+    multiprocess_mode="liveall",
+)
+BREAKER_TRANSITIONS = Counter(
+    "nhltrak_circuit_breaker_transitions_total",
+    "Circuit breaker state changes, by the state entered.",
+    ["dependency", "state"],
+)
+BREAKER_REJECTED = Counter(
+    "nhltrak_circuit_breaker_rejected_total",
+    "Calls rejected without trying because the circuit was open or already probing.",
+    ["dependency"],
+)
+STALE_RESPONSES = Counter(
+    "nhltrak_stale_responses_total",
+    "Responses served from stored data because the upstream refresh did not finish.",
+    ["reason"],
+)
+
+ROSTER_REFRESHES = Counter(
+    "nhltrak_roster_refreshes_total",
+    "Roster refresh requests; coalesced ones joined a refresh already in flight.",
+    ["outcome"],
+)
+ROSTER_REFRESH_TRIGGERED = ROSTER_REFRESHES.labels("triggered")
+ROSTER_REFRESH_COALESCED = ROSTER_REFRESHES.labels("coalesced")
+
+DB_CONNECTIONS = Gauge(
+    "nhltrak_db_connections",
+    "Open database connections held by PonyORM's per-thread pool.",
+    multiprocess_mode="livesum",
+)
+DB_QUERY_LATENCY = Histogram(
+    "nhltrak_db_query_duration_seconds",
+    "Time spent executing SQL statements.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+
+CACHE_REQUESTS = Counter(
+    "nhltrak_cache_requests_total",
+    "Cache lookups, by cache and result. The hit ratio is hit / (hit + miss).",
+    ["cache", "result"],
+)
+RESPONSE_CACHE_HIT = CACHE_REQUESTS.labels("response", "hit")
+RESPONSE_CACHE_MISS = CACHE_REQUESTS.labels("response", "miss")
+VALIDATOR_HIT = CACHE_REQUESTS.labels("validators", "hit")
+VALIDATOR_MISS = CACHE_REQUESTS.labels("validators", "miss")
+NHL_CACHE_HIT = CACHE_REQUESTS.labels("nhl_api", "hit")
+NHL_CACHE_MISS = CACHE_REQUESTS.labels("nhl_api", "miss")
+
+INVALIDATIONS = Counter(
+    "nhltrak_invalidations_total",
+    "Cache invalidation events published to and received from other workers.",
+    ["direction"],
+)
+INVALIDATIONS_PUBLISHED = INVALIDATIONS.labels("published")
+INVALIDATIONS_RECEIVED = INVALIDATIONS.labels("received")
+
+LOOP_LAG = Histogram(
+    "nhltrak_event_loop_lag_seconds",
+    "How late the event loop woke a sleeping task.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+
+def observe_query(statement, params, duration, rowcount):
+    """
+    Query listener (see DatabaseConnection.add_query_listener) that records
+    statement latency.
+    """
+    DB_QUERY_LATENCY.observe(duration)
+
+
+def observe_connection(event):
+    """
+    Connection listener (see DatabaseConnection.add_connection_listener) that tracks
+    open connections.
+    """
+    if event == "open":
+        DB_CONNECTIONS.inc()
+    else:
+        DB_CONNECTIONS.dec()
+
+
+def mark_process_dead():
+    """
+    Removes this worker's live gauges from the multiprocess directory. Call on shutdown.
+    """
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def render_metrics():
+    """
+    Renders all metrics in the Prometheus text exposition format.
+
+    Returns:
+        A tuple of (body, content_type). In multiprocess mode the body aggregates
+        every worker's values.
+    """
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that records request latency by method, route template and status.
+
+    Routes are labelled by their template (ex: /players/players_by_team_id/) rather
+    than the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            ).observe(perf_counter() - start)
@@ -0,0 +1,79 @@
+import asyncio
+from collections import deque
+from time import perf_counter
+
+from metrics import LOOP_LAG
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag: how late a sleeping task wakes up compared to when it asked to.
+
+    Any synchronous work on the event loop (ex: a blocking DB call in an async route)
+    shows up directly as lag.
+    """
+
+    def __init__(self, interval=0.1, window=600):
+        """
+        Parameters:
+            interval: Seconds between samples.
+                (default: 0.1)
+            window: The number of most recent samples kept.
+                (default: 600, one minute at the default interval)
+        """
+        self.interval = interval
+        self.samples = deque(maxlen=window)
+        self.max_lag = 0.0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, perf_counter() - start - self.interval)
+            self.samples.append(lag)
+            LOOP_LAG.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def start(self):
+        """
+        Starts sampling on the running event loop. Call from lifespan.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stops sampling.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self):
+        """
+        Summarizes the recent samples.
+
+        Returns:
+            A dictionary with the sample count and the p50, p99 and max lag in milliseconds.
+        """
+        samples = sorted(self.samples)
+        if not samples:
+            return {"samples": 0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+        def pct(p):
+            return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+        return {
+            "samples": len(samples),
+            "p50_ms": pct(0.50),
+            "p99_ms": pct(0.99),
+            "max_ms": self.max_lag * 1000,
+        }
+
+
+loop_lag = LoopLagMonitor()
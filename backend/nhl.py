@@ -0,0 +1,187 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+NHL_API_TIMEOUT = float(os.environ.get("NHL_API_TIMEOUT", "10"))
+NHL_API_CONCURRENCY = int(os.environ.get("NHL_API_CONCURRENCY", "8"))
+
+_nhl_client = None
+_nhl_executor = ThreadPoolExecutor(
+    max_workers=NHL_API_CONCURRENCY, thread_name_prefix="nhltrak-nhl"
+)
+
+nhl_breaker = CircuitBreaker(
+    "nhl_api",
+    failure_threshold=int(os.environ.get("NHL_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.environ.get("NHL_BREAKER_RESET_SECONDS", "30")),
+)
+
+
+def _endpoint_label(resource: str):
+    """
+    Reduces an NHL API resource path to a low-cardinality metrics label
+    (ex: "roster/TOR/20252026" -> "roster", "en/franchise" -> "franchise").
+    """
+    parts = [part for part in resource.split("/") if part and part != "en"]
+    return parts[0] if parts else "root"
+
+
+def _build_client(base_url: str | None = None):
+    """
+    Builds an NHLClient whose requests go through the on-disk response cache (see
+    nhl_cache.py) and are recorded in the NHL API metrics.
+
+    nhlpy builds every URL from a hardcoded Endpoint value, so the HTTP client of
+    each API group is swapped for an instrumented one. When base_url is given, it
+    also rewrites "https://<host>/<path>" to "<base_url>/<host>/<path>" (ex: for the
+    offline replay server in benchmarks).
+    """
+    import httpx
+    from nhlpy import NHLClient
+    from nhlpy.http_client import HttpClient
+
+    from metrics import (
+        NHL_API_CALLS,
+        NHL_API_ERRORS,
+        NHL_API_LATENCY,
+        NHL_CACHE_HIT,
+        NHL_CACHE_MISS,
+    )
+    from nhl_cache import upstream_cache
+
+    class InstrumentedHttpClient(HttpClient):
+        def _redirected_get(self, endpoint, resource, query_params):
+            url = endpoint.value.replace("https://", base_url.rstrip("/") + "/", 1)
+            with httpx.Client(
+                timeout=self._config.timeout,
+                follow_redirects=self._config.follow_redirects,
+            ) as client:
+                response = client.get(url=f"{url}{resource}", params=query_params)
+
+            self._handle_response(response, resource)
+            return response
+
+        def get(self, endpoint, resource, query_params=None):
+            label = _endpoint_label(resource)
+            url = f"{endpoint.value}{resource}"
+            key = upstream_cache.request_key(url, query_params)
+            if upstream_cache.enabled:
+                body = upstream_cache.get(key, label)
+                if body is not None:
+                    NHL_CACHE_HIT.inc()
+                    return httpx.Response(
+                        200,
+                        content=body,
+                        headers={"content-type": "application/json"},
+                        request=httpx.Request("GET", url, params=query_params),
+                    )
+                NHL_CACHE_MISS.inc()
+
+            NHL_API_CALLS.labels(label).inc()
+            start = perf_counter()
+            try:
+                if base_url:
+                    response = self._redirected_get(endpoint, resource, query_params)
+                else:
+                    response = super().get(endpoint, resource, query_params)
+            except Exception as e:
+                NHL_API_ERRORS.labels(label, type(e).__name__).inc()
+                raise
+            finally:
+                NHL_API_LATENCY.labels(label).observe(perf_counter() - start)
+
+            if upstream_cache.enabled:
+                upstream_cache.put(key, response.content)
+            return response
+
+    client = NHLClient(timeout=NHL_API_TIMEOUT)
+    http_client = InstrumentedHttpClient(client._config)
+    for api in vars(client).values():
+        if hasattr(api, "client"):
+            api.client = http_client
+    return client
+
+
+def get_nhl_client():
+    """
+    Gets the shared NHL API client, creating it on first use.
+
+    nhlpy (and the HTTP stack under it) is only imported when the first upstream
+    call is made, which keeps it out of worker import time. When the NHL_API_URL
+    environment variable is set, all requests are sent there instead of the NHL API.
+
+    Returns:
+        The shared NHLClient instance, or the client set with set_nhl_client().
+    """
+    global _nhl_client
+    if _nhl_client is None:
+        _nhl_client = _build_client(os.environ.get("NHL_API_URL"))
+    return _nhl_client
+
+
+def set_nhl_client(client):
+    """
+    Replaces the shared NHL API client.
+
+    Parameters:
+        client: Any object exposing the NHLClient endpoints used by the app
+            (ex: a fake client for benchmarks). None resets to a new NHLClient on next use.
+    """
+    global _nhl_client
+    _nhl_client = client
+
+
+async def call_nhl(func, *args, **kwargs):
+    """
+    Calls a blocking NHL client method on the upstream thread pool, through the
+    NHL API circuit breaker.
+
+    Upstream calls get their own pool (NHL_API_CONCURRENCY threads), so a slow NHL
+    API can't starve the DB pool or the default executor. Calls are abandoned
+    after NHL_API_TIMEOUT seconds, which is also the HTTP timeout, so a stuck call
+    frees its thread at about the same time.
+
+    Not found and bad request responses are caller errors, not upstream failures,
+    so they don't count against the breaker.
+
+    Parameters:
+        func: The NHL client method (ex: get_nhl_client().players.players_by_team).
+        *args: Positional arguments for func.
+        **kwargs: Keyword arguments for func.
+
+    Returns:
+        The return value of func.
+
+    Raises:
+        CircuitOpenError: If the breaker is open and the call was not attempted.
+        asyncio.TimeoutError: If the call took longer than NHL_API_TIMEOUT.
+    """
+    if not nhl_breaker.allow():
+        raise CircuitOpenError("The NHL API circuit breaker is open.")
+
+    call = functools.partial(func, *args, **kwargs)
+    try:
+        result = await asyncio.wait_for(
+            asyncio.get_running_loop().run_in_executor(_nhl_executor, call),
+            NHL_API_TIMEOUT,
+        )
+    except Exception as e:
+        from nhlpy.http_client import BadRequestException, ResourceNotFoundException
+
+        if isinstance(e, (BadRequestException, ResourceNotFoundException)):
+            nhl_breaker.record_success()
+        else:
+            nhl_breaker.record_failure()
+        raise
+    except asyncio.CancelledError:
+        # The caller went away (ex: client disconnect, shutdown); says nothing
+        # about the NHL API.
+        nhl_breaker.release()
+        raise
+
+    nhl_breaker.record_success()
+    return result
@@ -0,0 +1,250 @@
+"""
+Content-addressed on-disk cache for NHL API responses.
+
+Layout under NHL_CACHE_DIR (default ~/.cache/nhltrak/nhl-api, created with mode 700):
+    blobs/<sha256 of body>.json.gz   Compressed response bodies, stored once per distinct body.
+    index/<sha256 of url>.json       {"url", "blob", "fetched_at"} per request URL.
+    .lock                            flock()ed: shared while storing, exclusive while evicting.
+
+NHL_CACHE_MODE selects how the cache is used:
+    on       Serve fresh entries from the cache, fetch and store the rest.
+    replay   Serve only from the cache, ignoring TTLs; a missing entry is an error.
+             Gives deterministic offline runs for benchmarks and tests.
+    off      Always call the NHL API (default).
+"""
+
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from cache_backends import private_directory
+
+NHL_CACHE_MODE = os.environ.get("NHL_CACHE_MODE", "off")
+NHL_CACHE_DIR = Path(
+    os.environ.get("NHL_CACHE_DIR")
+    or Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    / "nhltrak"
+    / "nhl-api"
+)
+NHL_CACHE_MAX_MB = float(os.environ.get("NHL_CACHE_MAX_MB", "256"))
+
+# Old entries are evicted once this process has stored max_bytes / EVICT_FRACTION
+# bytes since the last eviction.
+EVICT_FRACTION = 16
+
+# Seconds a response stays fresh, by endpoint label (see nhl._endpoint_label()).
+# Rosters stay well under ROSTER_MAX_AGE so a refresh always sees new data.
+DEFAULT_TTLS = {
+    "roster": 15 * 60,
+    "standings": 60 * 60,
+    "franchise": 7 * 24 * 60 * 60,
+    "schedule": 30 * 60,
+}
+DEFAULT_TTL = 10 * 60
+
+
+class ReplayMissError(LookupError):
+    """
+    Raised in replay mode when a request has no cached response.
+    """
+
+
+def _parse_ttls(value: str):
+    """
+    Parses NHL_CACHE_TTLS (ex: "roster=600,standings=1800") into a dictionary.
+    """
+    ttls = dict(DEFAULT_TTLS)
+    for item in value.split(","):
+        if "=" in item:
+            label, seconds = item.split("=", 1)
+            ttls[label.strip()] = float(seconds)
+    return ttls
+
+
+class UpstreamCache:
+    """
+    Stores NHL API response bodies on disk, keyed by request URL and deduplicated by content.
+    """
+
+    def __init__(
+        self,
+        directory=NHL_CACHE_DIR,
+        mode=NHL_CACHE_MODE,
+        max_bytes=int(NHL_CACHE_MAX_MB * 1024 * 1024),
+        ttls=None,
+    ):
+        """
+        Parameters:
+            directory: The cache directory, created with mode 700.
+                (default: the NHL_CACHE_DIR environment variable, or
+                ~/.cache/nhltrak/nhl-api)
+            mode: "on", "replay" or "off".
+                (default: the NHL_CACHE_MODE environment variable, or "off")
+            max_bytes: The most bytes of compressed bodies kept; the least recently
+                fetched entries are evicted first, every max_bytes / EVICT_FRACTION
+                bytes stored.
+                (default: the NHL_CACHE_MAX_MB environment variable, or 256 MB)
+            ttls: A dictionary of endpoint label to TTL in seconds.
+                (default: DEFAULT_TTLS, overridden by the NHL_CACHE_TTLS environment variable)
+        """
+        self.directory = Path(directory)
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.ttls = ttls or _parse_ttls(os.environ.get("NHL_CACHE_TTLS", ""))
+        self._written_lock = threading.Lock()
+        self._written = 0
+        self._ready = False
+
+    @property
+    def enabled(self):
+        return self.mode in ("on", "replay")
+
+    @property
+    def replay(self):
+        return self.mode == "replay"
+
+    @staticmethod
+    def request_key(url: str, params=None):
+        """
+        Builds the cache key of a request.
+
+        Parameters:
+            url: The full request URL.
+            params: The query parameters.
+                (default: None)
+
+        Returns:
+            The URL with its query parameters in sorted order.
+        """
+        if not params:
+            return url
+        query = "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        return f"{url}?{query}"
+
+    def _index_path(self, key: str):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.directory / "index" / f"{digest}.json"
+
+    def _blob_path(self, digest: str):
+        return self.directory / "blobs" / f"{digest}.json.gz"
+
+    def _write_atomic(self, path: Path, data: bytes):
+        path.parent.mkdir(mode=0o700, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    @contextmanager
+    def _flock(self, exclusive: bool):
+        """
+        Holds the cache directory's lock file, shared across processes.
+        """
+        if not self._ready:
+            self.directory.parent.mkdir(parents=True, exist_ok=True)
+            private_directory(str(self.directory))
+            self._ready = True
+        with open(self.directory / ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get(self, key: str, label: str):
+        """
+        Looks up a cached response body.
+
+        Parameters:
+            key: The request key, from request_key().
+            label: The endpoint label, used to pick the TTL.
+
+        Returns:
+            The response body bytes, or None if there is no fresh entry.
+
+        Raises:
+            ReplayMissError: In replay mode, if there is no entry at all.
+        """
+        try:
+            entry = json.loads(self._index_path(key).read_bytes())
+            if not self.replay:
+                ttl = self.ttls.get(label, DEFAULT_TTL)
+                if time.time() - entry["fetched_at"] > ttl:
+                    return None
+            return gzip.decompress(self._blob_path(entry["blob"]).read_bytes())
+        except (OSError, ValueError, KeyError):
+            if self.replay:
+                raise ReplayMissError(f"No cached NHL API response for {key}")
+            return None
+
+    def put(self, key: str, body: bytes):
+        """
+        Stores a response body, and evicts old entries when an eviction is due.
+
+        The blob is written before the index entry that points to it, each with an
+        atomic rename, under the shared lock, so an eviction in another process
+        never sees the blob without its entry.
+
+        Parameters:
+            key: The request key, from request_key().
+            body: The response body bytes.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        blob = self._blob_path(digest)
+        compressed = gzip.compress(body, mtime=0)
+        entry = {"url": key, "blob": digest, "fetched_at": time.time()}
+        with self._flock(exclusive=False):
+            if not blob.exists():
+                self._write_atomic(blob, compressed)
+            self._write_atomic(self._index_path(key), json.dumps(entry).encode())
+
+        with self._written_lock:
+            self._written += len(compressed)
+            due = self._written >= self.max_bytes / EVICT_FRACTION
+            if due:
+                self._written = 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently fetched entries, and any blob no entry points
+        to, until the blobs fit in max_bytes.
+        """
+        with self._flock(exclusive=True):
+            entries = []
+            for path in (self.directory / "index").glob("*.json"):
+                try:
+                    entries.append((json.loads(path.read_bytes()), path))
+                except (OSError, ValueError):
+                    path.unlink(missing_ok=True)
+            entries.sort(key=lambda item: item[0].get("fetched_at", 0))
+
+            blobs = {p.name: p for p in (self.directory / "blobs").glob("*.json.gz")}
+            sizes = {name: p.stat().st_size for name, p in blobs.items()}
+            references = Counter(f"{entry['blob']}.json.gz" for entry, _ in entries)
+            for name in set(blobs) - set(references):
+                blobs[name].unlink(missing_ok=True)
+                sizes.pop(name)
+
+            total = sum(sizes.values())
+            for entry, path in entries:
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                name = f"{entry['blob']}.json.gz"
+                references[name] -= 1
+                if references[name] == 0 and name in sizes:
+                    blobs[name].unlink(missing_ok=True)
+                    total -= sizes.pop(name)
+
+
+upstream_cache = UpstreamCache()
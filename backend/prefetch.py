@@ -0,0 +1,282 @@
+"""
+Background roster prefetcher.
+
+Refreshes every team's roster for the current season before it goes stale, so users
+are not the ones paying for the NHL API call after the two-hour window. Started
+from lifespan; set ROSTER_PREFETCH=0 to disable it.
+
+Each team refreshes at a random point within a fixed slot of the cycle, so the time
+between two refreshes of a team is at most interval * (1 + jitter). Intervals are capped to keep
+that under ROSTER_MAX_AGE.
+
+With several uvicorn workers, only the worker holding a Postgres advisory lock runs
+the prefetcher. The lock lives on a dedicated connection, so it is released as soon
+as that worker exits and another worker takes over on its next attempt. The holder
+checks that connection every cycle and stops prefetching if it is gone.
+"""
+
+import asyncio
+import os
+import random
+from datetime import date, datetime
+from time import monotonic
+
+from icecream import ic
+
+from db_async import adb_helper
+from db_connection import db
+from db_helpers import current_season
+from nhl import call_nhl, get_nhl_client
+from rosters import ROSTER_MAX_AGE, refresh_team_roster
+
+PREFETCH_ENABLED = os.environ.get("ROSTER_PREFETCH", "1") != "0"
+PREFETCH_LOCK_KEY = 0x4E484C5452414B  # "NHLTRAK"
+
+# Refresh intervals in seconds, shortest first. Rosters go stale after two hours.
+DEADLINE_INTERVAL = float(os.environ.get("ROSTER_PREFETCH_DEADLINE_INTERVAL", "900"))
+GAME_DAY_INTERVAL = float(os.environ.get("ROSTER_PREFETCH_GAME_DAY_INTERVAL", "2700"))
+BASE_INTERVAL = float(os.environ.get("ROSTER_PREFETCH_INTERVAL", "4500"))
+
+# Seconds kept between the longest gap between refreshes and ROSTER_MAX_AGE, for
+# the refreshes themselves.
+STALE_MARGIN = 300.0
+
+# Trade deadline dates (ex: "2026-03-06"). Refreshes run at DEADLINE_INTERVAL from
+# two days before to one day after each date.
+TRADE_DEADLINES = [
+    date.fromisoformat(value.strip())
+    for value in os.environ.get("NHL_TRADE_DEADLINES", "").split(",")
+    if value.strip()
+]
+
+
+class TokenBucket:
+    """
+    Async token bucket: allows bursts of up to capacity calls, refilled at rate per second.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        """
+        Parameters:
+            rate: Tokens added per second.
+            capacity: The most tokens the bucket holds.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        Waits until a token is available and takes it.
+        """
+        async with self._lock:
+            while True:
+                now = monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def near_trade_deadline(today: date, deadlines=TRADE_DEADLINES):
+    """
+    Checks if a date is within the trade deadline window (two days before to one day after).
+
+    Parameters:
+        today: The date to check.
+        deadlines: The trade deadline dates.
+            (default: the NHL_TRADE_DEADLINES environment variable)
+
+    Returns:
+        True if today is in the window of any deadline.
+    """
+    return any(-1 <= (deadline - today).days <= 2 for deadline in deadlines)
+
+
+class RosterPrefetcher:
+    """
+    Periodically refreshes all team rosters for the current season.
+    """
+
+    def __init__(self, concurrency=4, rate=2.0, burst=4, jitter=0.5, lock_retry=60.0):
+        """
+        Parameters:
+            concurrency: The most roster refreshes running at once.
+                (default: 4)
+            rate: NHL API calls allowed per second.
+                (default: 2.0)
+            burst: NHL API calls allowed back to back before rate applies.
+                (default: 4)
+            jitter: Fraction of the cycle interval that team slots are spread over.
+                (default: 0.5)
+            lock_retry: Seconds between attempts to become the prefetching worker.
+                (default: 60.0)
+        """
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.jitter = jitter
+        # Longest interval whose worst gap, interval * (1 + jitter), stays fresh.
+        self.max_interval = (ROSTER_MAX_AGE.total_seconds() - STALE_MARGIN) / (
+            1 + jitter
+        )
+        self.lock_retry = lock_retry
+        self.last_cycle = None
+        self._task = None
+        self._lock_connection = None
+
+    def _try_lock(self):
+        connection = None
+        try:
+            connection = db.open_connection()
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", (PREFETCH_LOCK_KEY,))
+                locked = cursor.fetchone()[0]
+        except Exception as e:
+            ic(f"Could not take the roster prefetch lock: {e}")
+            if connection is not None:
+                connection.close()
+            return False
+
+        if locked:
+            self._lock_connection = connection
+        else:
+            connection.close()
+        return locked
+
+    def _holds_lock(self):
+        """
+        Checks that the advisory lock's connection is alive. Postgres releases the
+        lock when the session ends, so a dead connection means another worker may
+        hold it.
+        """
+        connection = self._lock_connection
+        if connection is None or connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except Exception as e:
+            ic(f"Lost the roster prefetch lock connection: {e}")
+            self._release_lock()
+            return False
+
+    def _release_lock(self):
+        if self._lock_connection is not None:
+            self._lock_connection.close()
+            self._lock_connection = None
+
+    async def _is_game_day(self, today: date):
+        try:
+            await self.bucket.acquire()
+            schedule = await call_nhl(
+                get_nhl_client().schedule.daily_schedule, today.isoformat()
+            )
+            return bool(schedule.get("games"))
+        except Exception as e:
+            ic(f"Could not get the schedule, assuming no games: {e}")
+            return False
+
+    async def next_interval(self):
+        """
+        Returns:
+            Seconds until the next cycle: shortest around trade deadlines, shorter on
+            game days, and at most max_interval.
+        """
+        today = date.today()
+        if near_trade_deadline(today):
+            interval = DEADLINE_INTERVAL
+        elif await self._is_game_day(today):
+            interval = GAME_DAY_INTERVAL
+        else:
+            interval = BASE_INTERVAL
+        return min(interval, self.max_interval)
+
+    async def refresh_all(self, interval: float):
+        """
+        Refreshes every team's roster once. Teams are ordered by ID and spread evenly
+        over the first jitter * interval seconds, so each keeps the same slot from
+        one cycle to the next. Each refresh starts at a random point within its slot,
+        so workers and restarts don't line up on the same instants.
+
+        Parameters:
+            interval: The cycle interval in seconds.
+
+        Returns:
+            A dictionary with the number of teams refreshed and failed.
+        """
+        teams = sorted(await adb_helper.get_team_records(), key=lambda team: team.id)
+        season = current_season()
+        spacing = interval * self.jitter / max(len(teams), 1)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        report = {"teams": len(teams), "refreshed": 0, "failed": 0}
+
+        async def refresh(slot, team):
+            await asyncio.sleep((slot + random.random()) * spacing)
+            async with semaphore:
+                await self.bucket.acquire()
+                try:
+                    await refresh_team_roster(team.id, team.abbr, season)
+                    report["refreshed"] += 1
+                except Exception as e:
+                    report["failed"] += 1
+                    ic(f"Roster prefetch failed for {team.abbr}: {e}")
+
+        await asyncio.gather(*(refresh(slot, team) for slot, team in enumerate(teams)))
+        return report
+
+    async def _run(self):
+        try:
+            while True:
+                while not await asyncio.to_thread(self._try_lock):
+                    await asyncio.sleep(self.lock_retry)
+                ic("Roster prefetcher running in this worker.")
+                await self._prefetch()
+                ic("Roster prefetcher stopped: the advisory lock was lost.")
+        finally:
+            self._release_lock()
+
+    async def _prefetch(self):
+        """
+        Runs refresh cycles for as long as this worker holds the advisory lock.
+        """
+        while await asyncio.to_thread(self._holds_lock):
+            interval = await self.next_interval()
+            started = datetime.now()
+            try:
+                report = await self.refresh_all(interval)
+            except Exception as e:
+                report = {"error": str(e)}
+            self.last_cycle = {"started": started, "interval": interval, **report}
+            ic(self.last_cycle)
+            elapsed = (datetime.now() - started).total_seconds()
+            await asyncio.sleep(max(0.0, interval - elapsed))
+
+    def start(self):
+        """
+        Starts prefetching on the running event loop. Call from lifespan.
+        """
+        if PREFETCH_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stops prefetching and releases the advisory lock.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+roster_prefetcher = RosterPrefetcher()
@@ -0,0 +1,234 @@
+"""
+On-demand sampling profiler for individual requests.
+
+Profiling is off unless one of these environment variables is set:
+    PROFILE_SAMPLE_RATE   Fraction of requests to profile (ex: 0.001).
+    PROFILE_ON_DEMAND     If "1", requests with an "X-Profile" header equal to
+                          ADMIN_TOKEN are profiled.
+When both are unset the middleware is not installed at all.
+
+Captures are written as collapsed stacks ("frame;frame;frame count" per line, the
+input format of flamegraph.pl and speedscope) to PROFILE_DIR, which keeps at most
+PROFILE_MAX_FILES captures.
+"""
+
+import asyncio
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", "/tmp/nhltrak-profiles"))
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", "50"))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_ON_DEMAND = os.environ.get("PROFILE_ON_DEMAND", "") == "1"
+
+CAPTURE_SUFFIX = ".collapsed"
+
+
+def profiling_enabled():
+    """
+    Returns:
+        True if requests may be profiled, i.e. the middleware should be installed.
+    """
+    return PROFILE_SAMPLE_RATE > 0 or PROFILE_ON_DEMAND
+
+
+class StackSampler(threading.Thread):
+    """
+    Background thread that periodically samples the Python stacks of every other
+    thread and counts them in collapsed form.
+
+    Sampling reads sys._current_frames(), so the profiled code is not traced and
+    pays nothing per call; the cost is one stack walk per thread per interval.
+    Async routes share the event loop thread, so concurrent requests show up in
+    each other's captures.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        """
+        Parameters:
+            interval: Seconds between samples.
+                (default: PROFILE_INTERVAL_MS / 1000)
+        """
+        super().__init__(name="nhltrak-profiler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                    )
+                    frame = frame.f_back
+                frames.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(frames))] += 1
+            self.samples += 1
+
+    def stop(self):
+        """
+        Stops sampling and waits for the thread to exit.
+        """
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self):
+        """
+        Returns:
+            The samples in collapsed stack format.
+        """
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+class CaptureStore:
+    """
+    A directory of profile captures that keeps only the newest max_files.
+    """
+
+    def __init__(self, directory=PROFILE_DIR, max_files=PROFILE_MAX_FILES):
+        """
+        Parameters:
+            directory: Where captures are written.
+                (default: PROFILE_DIR)
+            max_files: The most captures kept; the oldest are deleted first.
+                (default: PROFILE_MAX_FILES)
+        """
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    def new_name(self, method: str, path: str):
+        """
+        Builds a unique capture name for a request.
+
+        Parameters:
+            method: The request method.
+            path: The request path.
+
+        Returns:
+            A file name like 20261019T120000_4242_GET_players-stats_1a2b3c.collapsed.
+        """
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-") or "root"
+        return (
+            f"{time.strftime('%Y%m%dT%H%M%S')}_{os.getpid()}_{method}_{slug[:60]}"
+            f"_{os.urandom(3).hex()}{CAPTURE_SUFFIX}"
+        )
+
+    def save(self, name: str, sampler: StackSampler):
+        """
+        Writes a capture and prunes old ones.
+
+        Parameters:
+            name: The capture name, from new_name().
+            sampler: The stopped sampler holding the stacks.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / name).write_text(sampler.collapsed())
+        self.prune()
+
+    def prune(self):
+        captures = sorted(self._captures(), key=lambda p: p.stat().st_mtime)
+        for capture in captures[: max(0, len(captures) - self.max_files)]:
+            capture.unlink(missing_ok=True)
+
+    def _captures(self):
+        if not self.directory.is_dir():
+            return []
+        return [p for p in self.directory.iterdir() if p.name.endswith(CAPTURE_SUFFIX)]
+
+    def list(self):
+        """
+        Returns:
+            A list of dictionaries with each capture's name, size and creation time,
+            newest first.
+        """
+        captures = []
+        for capture in self._captures():
+            stat = capture.stat()
+            captures.append(
+                {"name": capture.name, "bytes": stat.st_size, "created": stat.st_mtime}
+            )
+        return sorted(captures, key=lambda c: c["created"], reverse=True)
+
+    def path(self, name: str):
+        """
+        Parameters:
+            name: A capture name as returned by list().
+
+        Returns:
+            The capture's path, or None if there is no capture with that name.
+        """
+        if name not in {capture.name for capture in self._captures()}:
+            return None
+        return self.directory / name
+
+
+captures = CaptureStore()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles sampled or explicitly requested requests.
+
+    On-demand captures answer with an X-Profile-Capture header naming the capture,
+    which can be downloaded from /admin/profiles/{name}.
+    """
+
+    def __init__(self, app, store: CaptureStore = captures):
+        self.app = app
+        self.store = store
+        self.admin_token = os.environ.get("ADMIN_TOKEN", "")
+
+    def _requested(self, scope):
+        if not (PROFILE_ON_DEMAND and self.admin_token):
+            return False
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                # Bytes: compare_digest() raises on non-ASCII str.
+                return hmac.compare_digest(value, self.admin_token.encode())
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = self._requested(scope)
+        if not requested and random.random() >= PROFILE_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        name = self.store.new_name(scope["method"], scope["path"])
+        sampler = StackSampler()
+
+        async def send_with_capture(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-capture", name.encode())
+                ]
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_capture if requested else send)
+        finally:
+            # stop() joins the sampler thread, which can take up to an interval.
+            await asyncio.to_thread(sampler.stop)
+            await asyncio.to_thread(self.store.save, name, sampler)
@@ -0,0 +1,126 @@
+"""
+Compact, immutable records for team and roster data held in memory.
+
+A roster entry as a dictionary carries a 16 slot hash table per player; these
+records are slotted dataclasses holding only the values. orjson serializes
+dataclasses natively, so records can be returned from routes and encoded without
+converting them back to dictionaries first.
+
+Values repeated across thousands of records (positions, countries, cities, team
+abbreviations) are interned, so every record shares one copy of each string.
+"""
+
+import sys
+from dataclasses import dataclass, fields
+from datetime import datetime
+
+
+def intern_str(value):
+    """
+    Interns a string so equal values share one object. Other values are returned as is.
+    """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(frozen=True, slots=True)
+class TeamRecord:
+    """
+    A team and the abbreviations of its division and conference.
+    """
+
+    id: int
+    abbr: str | None
+    common_name: str | None
+    name: str | None
+    logo: str | None
+    division: str | None
+    conference: str | None
+
+    @classmethod
+    def from_entity(cls, team):
+        """
+        Builds a record from a Team entity. Call inside a db_session.
+        """
+        return cls(
+            id=team.id,
+            abbr=intern_str(team.abbr),
+            common_name=team.common_name,
+            name=team.name,
+            logo=team.logo,
+            division=intern_str(team.division.abbr),
+            conference=intern_str(team.conference.abbr),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class RosterEntry:
+    """
+    A player on a team's roster for one season.
+    """
+
+    id: int
+    first_name: str | None
+    last_name: str | None
+    position: str | None
+    birth_city: str | None
+    birth_country: str | None
+    birth_province_state: str | None
+    shoots_catches: str | None
+    height_in_centimeters: int | None
+    height_in_inches: int | None
+    weight_in_kilograms: int | None
+    weight_in_pounds: int | None
+    headshot: str | None
+    sweater_number: int | None
+    games_played: int | None
+    last_updated: datetime
+
+    @classmethod
+    def from_row(cls, values):
+        """
+        Builds a record from a row of values in ROSTER_FIELDS order.
+        """
+        return cls(
+            *(intern_str(v) if i in _INTERNED else v for i, v in enumerate(values))
+        )
+
+    @classmethod
+    def from_entities(cls, player, pts):
+        """
+        Builds a record from a Player and its PlayerTeamSeason. Call inside a db_session.
+        """
+        return cls.from_row(
+            (
+                player.id,
+                player.first_name,
+                player.last_name,
+                player.position,
+                player.birth_city,
+                player.birth_country,
+                player.birth_province_state,
+                player.shoots_catches,
+                player.height_in_centimeters,
+                player.height_in_inches,
+                player.weight_in_kilograms,
+                player.weight_in_pounds,
+                player.headshot,
+                pts.sweater_number,
+                pts.games_played,
+                player.last_updated,
+            )
+        )
+
+
+# The fields of a roster entry, in the order RosterEntry.from_row() expects them.
+ROSTER_FIELDS = tuple(field.name for field in fields(RosterEntry))
+
+_INTERNED = frozenset(
+    ROSTER_FIELDS.index(name)
+    for name in (
+        "position",
+        "birth_city",
+        "birth_country",
+        "birth_province_state",
+        "shoots_catches",
+    )
+)
@@ -0,0 +1,208 @@
+import gzip
+from datetime import datetime
+
+import orjson
+
+from fastapi import Request, Response
+
+from cache_backends import LocalCache, create_cache_backend
+from conditional import http_date, is_not_modified, make_etag
+from responses import encode_json
+from metrics import RESPONSE_CACHE_HIT, RESPONSE_CACHE_MISS
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, responses fall back to gzip
+    brotli = None
+
+
+class CachedResponse:
+    """
+    A fully encoded response body and its pre-compressed variants.
+    """
+
+    __slots__ = ("variants", "last_modified")
+
+    def __init__(self, body: bytes, last_modified=None):
+        """
+        Parameters:
+            body: The encoded JSON body.
+            last_modified: The datetime the resource last changed.
+                (default: None)
+        """
+        etag = make_etag(body)
+        # Content-Encoding -> (body, strong ETag). Each encoding is a different
+        # representation, so each gets its own strong ETag.
+        self.variants = {
+            "identity": (body, etag),
+            "gzip": (gzip.compress(body, mtime=0), etag[:-1] + '-gzip"'),
+        }
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body), etag[:-1] + '-br"')
+        self.last_modified = last_modified
+
+    def to_bytes(self):
+        """
+        Encodes the entry for a shared cache backend: an orjson header line with the
+        ETag and length of each variant, followed by the variant bodies.
+        """
+        header = {
+            "last_modified": self.last_modified,
+            "variants": [
+                [encoding, etag, len(body)]
+                for encoding, (body, etag) in self.variants.items()
+            ],
+        }
+        bodies = [body for body, _ in self.variants.values()]
+        return b"\n".join([orjson.dumps(header), *bodies])
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """
+        Decodes an entry encoded by to_bytes().
+        """
+        header, _, rest = data.partition(b"\n")
+        header = orjson.loads(header)
+        entry = cls.__new__(cls)
+        entry.variants = {}
+        position = 0
+        for encoding, etag, size in header["variants"]:
+            entry.variants[encoding] = (rest[position : position + size], etag)
+            position += size + 1
+        last_modified = header["last_modified"]
+        entry.last_modified = last_modified and datetime.fromisoformat(last_modified)
+        return entry
+
+
+def _accepted_encodings(request: Request):
+    """
+    Parses the Accept-Encoding header into the set of encodings with a non-zero q value.
+    """
+    accepted = set()
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def _select_encoding(request: Request, entry: CachedResponse) -> str:
+    accepted = _accepted_encodings(request)
+    for encoding in ("br", "gzip"):
+        if encoding in entry.variants and (encoding in accepted or "*" in accepted):
+            return encoding
+    return "identity"
+
+
+class ResponseCache:
+    """
+    Caches final, encoded response bodies (plus gzip and brotli variants) per route
+    and parameters, so a hit is a dictionary lookup and a socket write.
+    """
+
+    def __init__(self, backend=None):
+        """
+        Parameters:
+            backend: The cache backend storing CachedResponse entries.
+                (default: a new LocalCache)
+        """
+        self.backend = backend if backend is not None else LocalCache()
+
+    async def respond(self, request: Request, key):
+        """
+        Answers a request from the cache.
+
+        Parameters:
+            request: The incoming request.
+            key: The resource key (ex: ("teams", "id", 1)).
+
+        Returns:
+            A Response built from the cached bytes (or a 304), or None on a cache miss.
+        """
+        entry = await self.backend.get(key)
+        if entry is None:
+            RESPONSE_CACHE_MISS.inc()
+            return None
+        RESPONSE_CACHE_HIT.inc()
+        return self._build_response(request, entry)
+
+    async def store(
+        self, request: Request, key, content, last_modified=None, cacheable=True
+    ):
+        """
+        Encodes content once, stores it with its compressed variants and answers the request.
+
+        Parameters:
+            request: The incoming request.
+            key: The resource key.
+            content: The response content.
+            last_modified: The datetime the resource last changed.
+                (default: None)
+            cacheable: Only answers the request without storing it if set to False
+                (ex: for empty results, so unknown parameters can't grow the cache).
+                (default: True)
+
+        Returns:
+            A Response for the entry (or a 304).
+        """
+        entry = CachedResponse(encode_json(content), last_modified)
+        if cacheable:
+            await self.backend.set(key, entry)
+        return self._build_response(request, entry)
+
+    def invalidate(self, *prefix):
+        """
+        Removes every cached response whose key starts with the given items.
+
+        Parameters:
+            *prefix: The leading items of the keys to remove. (ex: invalidate("teams"))
+        """
+        if prefix:
+            self.backend.delete_prefix(*prefix)
+        else:
+            self.backend.clear()
+
+    def _build_response(self, request: Request, entry: CachedResponse):
+        encoding = _select_encoding(request, entry)
+        body, etag = entry.variants[encoding]
+
+        headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+        if entry.last_modified is not None:
+            headers["Last-Modified"] = http_date(entry.last_modified)
+
+        if is_not_modified(request, etag, entry.last_modified):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache(
+    create_cache_backend(
+        "responses", CachedResponse.to_bytes, CachedResponse.from_bytes
+    )
+)
+
+TEAM_ENTITIES = ("Team", "Division", "Conference")
+
+
+def invalidate_on_team_write(entity, keys):
+    """
+    Write listener that drops every cached team response when a team, division or
+    conference is written.
+
+    Parameters:
+        entity: PonyORM entity class that was written.
+        keys: A list of the primary keys written.
+    """
+    if entity.__name__ in TEAM_ENTITIES:
+        response_cache.invalidate("teams")
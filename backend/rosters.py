@@ -0,0 +1,172 @@
+"""
+Team roster refreshes from the NHL API.
+
+Shared by the roster routes, which refresh a stale roster on request, and the
+background prefetcher, which refreshes rosters before they go stale. Concurrent
+refreshes of the same roster share one NHL API call.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+from icecream import ic
+
+from db_async import adb_helper
+from circuit_breaker import CircuitOpenError
+from nhl import call_nhl, get_nhl_client
+from metrics import (
+    ROSTER_REFRESH_COALESCED,
+    ROSTER_REFRESH_TRIGGERED,
+    STALE_RESPONSES,
+)
+
+logger = logging.getLogger("nhltrak.rosters")
+
+ROSTER_MAX_AGE = timedelta(hours=2)
+
+# Seconds a request waits on a roster refresh before answering with the stored roster.
+ROSTER_REFRESH_BUDGET = float(os.environ.get("ROSTER_REFRESH_BUDGET_MS", "1500")) / 1000
+
+_roster_refreshes = {}
+
+
+async def update_team_roster(team_id: int, team_abbr: str, season: str):
+    """
+    Helper function to fetch and update team roster from the NHL API.
+
+    Parameters:
+        team_id: The ID of the team.
+        team_abbr: The team abbreviation.
+        season: The season string.
+
+    Returns:
+        A tuple of the updated list of players from the database and the refresh time.
+    """
+    roster = await call_nhl(get_nhl_client().players.players_by_team, team_abbr, season)
+    players = [
+        player_data(player) for position in roster for player in roster[position]
+    ]
+    report = await adb_helper.store_team_roster(team_id, season, players)
+    logger.debug(
+        "Refreshed %s %s roster: players %s, team seasons %s",
+        team_abbr,
+        season,
+        report["players"],
+        report["team_seasons"],
+    )
+
+    players = await adb_helper.get_team_roster(team_id, season)
+    return players, report["refreshed_at"]
+
+
+def player_data(player: dict):
+    """
+    Normalizes a player from an NHL API roster response into Player columns.
+
+    Parameters:
+        player: A player dictionary from nhl_client.players.players_by_team().
+
+    Returns:
+        A dictionary of Player column:value pairs, without last_updated.
+    """
+    return {
+        "id": player["id"],
+        "first_name": player["firstName"]["default"],
+        "last_name": player["lastName"]["default"],
+        "birth_date": player["birthDate"],
+        "birth_city": player["birthCity"]["default"],
+        "birth_country": player["birthCountry"],
+        "birth_province_state": player.get("birthStateProvince", {}).get("default"),
+        "position": player["positionCode"],
+        "shoots_catches": player["shootsCatches"],
+        "height_in_centimeters": player["heightInCentimeters"],
+        "height_in_inches": player["heightInInches"],
+        "weight_in_kilograms": player["weightInKilograms"],
+        "weight_in_pounds": player["weightInPounds"],
+        "headshot": player["headshot"],
+        "sweater_number": player["sweaterNumber"],
+    }
+
+
+async def refresh_team_roster(team_id: int, team_abbr: str, season: str):
+    """
+    Refreshes a team roster, sharing one refresh between concurrent requests.
+
+    The first request for a stale roster starts the refresh; requests arriving while
+    it is in flight wait for the same result instead of calling the NHL API again.
+
+    Parameters:
+        team_id: The ID of the team.
+        team_abbr: The team abbreviation.
+        season: The season string.
+
+    Returns:
+        A tuple of the updated list of players from the database and the refresh time.
+    """
+    key = (team_id, season)
+    task = _roster_refreshes.get(key)
+    if task is None:
+        ROSTER_REFRESH_TRIGGERED.inc()
+        task = asyncio.ensure_future(update_team_roster(team_id, team_abbr, season))
+        _roster_refreshes[key] = task
+        task.add_done_callback(lambda _: _roster_refreshes.pop(key, None))
+    else:
+        ROSTER_REFRESH_COALESCED.inc()
+
+    # A disconnecting client cancels its own wait, not the shared refresh.
+    return await asyncio.shield(task)
+
+
+def should_update_roster(refreshed_at: datetime | None) -> bool:
+    """
+    Checks to see if roster data needs to be updated (older than 2 hours).
+
+    Parameters:
+        refreshed_at: When the roster was last refreshed from the NHL API, or None.
+
+    Returns:
+        True if the roster was never refreshed or the last refresh is stale, False otherwise.
+    """
+    if refreshed_at is None:
+        return True
+
+    return refreshed_at <= datetime.now() - ROSTER_MAX_AGE
+
+
+async def refresh_within_budget(
+    team_id: int, team_abbr: str, season: str, players: list, refreshed_at
+):
+    """
+    Refreshes a stale roster, waiting at most ROSTER_REFRESH_BUDGET seconds.
+
+    The refresh itself keeps running in the background when the budget runs out,
+    so the next request gets the fresh roster.
+
+    Parameters:
+        team_id: The ID of the team.
+        team_abbr: The team abbreviation.
+        season: The season string.
+        players: The stored roster, served if the refresh doesn't finish in time.
+        refreshed_at: When the stored roster was last refreshed, or None.
+
+    Returns:
+        A tuple of (players, refreshed_at, stale_reason), where stale_reason is None
+        if the refresh finished, or "timeout", "circuit_open" or "error".
+    """
+    try:
+        players, refreshed_at = await asyncio.wait_for(
+            refresh_team_roster(team_id, team_abbr, season), ROSTER_REFRESH_BUDGET
+        )
+        return players, refreshed_at, None
+    except asyncio.TimeoutError:
+        reason = "timeout"
+    except CircuitOpenError:
+        reason = "circuit_open"
+    except Exception as e:
+        ic(f"Roster refresh failed for {team_abbr}: {e}")
+        reason = "error"
+
+    STALE_RESPONSES.labels(reason).inc()
+    return players, refreshed_at, reason
@@ -0,0 +1,103 @@
+import hmac
+import os
+import threading
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from monitoring import loop_lag
+from nhl import nhl_breaker
+from instrumentation import query_totals
+from profiling import captures
+from slow_queries import slow_query_log
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)):
+    """
+    Dependency that only lets requests with the configured admin token through.
+
+    Admin routes are disabled (404) unless the ADMIN_TOKEN environment variable is set.
+
+    Parameters:
+        x_admin_token: The value of the X-Admin-Token header.
+    """
+    expected = os.environ.get("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404)
+    # compare_digest() only accepts ASCII str; header values may not be.
+    if not x_admin_token or not hmac.compare_digest(
+        x_admin_token.encode(), expected.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+admin_router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@admin_router.get("/runtime")
+async def get_runtime():
+    """
+    Gets runtime health information for this worker process.
+
+    Returns:
+        The worker's process ID, thread count, event loop lag over the last minute
+        and the NHL API circuit breaker state.
+    """
+    return {
+        "pid": os.getpid(),
+        "threads": threading.active_count(),
+        "event_loop_lag": loop_lag.snapshot(),
+        "nhl_api_breaker": nhl_breaker.snapshot(),
+    }
+
+
+@admin_router.get("/queries")
+async def get_query_stats():
+    """
+    Gets the SQL statement totals of this worker process.
+
+    Returns:
+        Query, row and DB time totals over all requests, the number of requests
+        flagged as N+1 and the most repeated statement shapes.
+    """
+    return query_totals.snapshot()
+
+
+@admin_router.get("/slow-queries")
+async def get_slow_queries():
+    """
+    Gets the most recent statements that ran slower than SLOW_QUERY_MS.
+
+    Returns:
+        The threshold and the slow statements, newest first, with normalized SQL,
+        redacted parameters and an EXPLAIN (ANALYZE, BUFFERS) plan for SELECTs.
+    """
+    return slow_query_log.snapshot()
+
+
+@admin_router.get("/profiles")
+async def list_profiles():
+    """
+    Lists the stored profile captures.
+
+    Returns:
+        A list of captures with their name, size in bytes and creation time, newest first.
+    """
+    return {"profiles": captures.list()}
+
+
+@admin_router.get("/profiles/{name}")
+async def get_profile(name: str):
+    """
+    Downloads a profile capture in collapsed stack format (ex: for flamegraph.pl or speedscope).
+
+    Parameters:
+        name: The capture name, from /admin/profiles or the X-Profile-Capture header.
+
+    Returns:
+        The capture file.
+    """
+    path = captures.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return FileResponse(path, media_type="text/plain", filename=name)
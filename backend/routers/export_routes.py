@@ -0,0 +1,47 @@
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+export_router = APIRouter()
+
+
+@export_router.get("/{table}")
+async def get_export(
+    table: Literal["players", "player_team_seasons", "stats"],
+    format: Literal["arrow", "parquet"] = "parquet",
+    season: str | None = Query(default=None, pattern=r"^\d{8}$"),
+    team_id: int | None = None,
+):
+    """
+    Streams a table as an Arrow IPC stream or a Parquet file.
+
+    Rows are read from a server-side cursor and written in record batches as the
+    client downloads them, so memory use doesn't grow with the size of the table.
+
+    Parameters:
+        table: players, player_team_seasons or stats.
+        format: arrow or parquet.
+            (default: parquet)
+        season: Only export rows of the given season string (ex: "20252026"). It
+            is also part of the file name, so anything but 8 digits is rejected.
+            (this parameter is optional)
+        team_id: Only export rows of the given team.
+            (this parameter is optional)
+
+    Returns:
+        The exported table, as an attachment.
+    """
+    # Imported here: export loads pyarrow, which would slow down every worker start.
+    import export
+
+    if export.pa is None:
+        raise HTTPException(status_code=503, detail="Exports are not available.")
+
+    media_type = export.EXPORT_FORMATS[format][0]
+    filename = export.export_filename(table, format, season, team_id)
+    return StreamingResponse(
+        export.iter_export(table, format, season, team_id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Response
+
+from metrics import render_metrics
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Gets the API's metrics for Prometheus to scrape.
+
+    Returns:
+        All metrics in the Prometheus text exposition format, aggregated over every
+        worker when PROMETHEUS_MULTIPROC_DIR is set.
+    """
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
@@ -1,122 +1,88 @@
+import asyncio
+from typing import Literal
+
 from icecream import ic
 
 from pony.orm import db_session
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from dateutil import parser
 
-from fastapi import APIRouter
-from fastapi.encoders import jsonable_encoder
-
-from nhlpy import NHLClient
-from nhlpy.api.query.builder import QueryBuilder, QueryContext
-from nhlpy.api.query.filters.season import SeasonQuery
-
-from pony.orm import TransactionIntegrityError
-
-from db_connection import init_db, db
-from db_models.entities import Team, Player, PlayerTeamSeason
-from db_helpers import create_db_helper
-
-
-db = init_db(create_tables=True)
-
-db_helper = create_db_helper(db)
-
-nhl_client = NHLClient()
+from fastapi import APIRouter, Request
+
+from db_connection import db
+from db_async import adb, adb_helper, run_db
+from db_models.entities import Team, Player, PlayerTeamSeason, Stat
+from db_helpers import current_season
+from analytics import player_analytics
+from responses import (
+    NDJSON_BATCH_SIZE,
+    FastJSONResponse,
+    NDJSONResponse,
+    wants_ndjson,
+)
+from conditional import conditional_response, not_modified
+from rosters import ROSTER_MAX_AGE, refresh_within_budget, should_update_roster
 
 player_router = APIRouter()
 
-current_season = datetime.now().year
-
-if datetime.now().month >= 1 and datetime.now().month <= 4:
-    current_season = str(current_season - 1) + str(current_season)
-else:
-    current_season = str(current_season) + str(current_season + 1)
+MAX_ROSTERS_PER_REQUEST = 32
 
 
-async def _update_team_roster(team_id: int, team_abbr: str, season: str):
+async def _roster_response(
+    request: Request,
+    team_id: int,
+    season: str,
+    players: list,
+    refreshed_at: datetime,
+):
     """
-    Helper function to fetch and update team roster from the NHL API.
+    Builds a roster response with ETag and Last-Modified validators.
+
+    Last-Modified is the newest player.last_updated on the roster, which only
+    changes when a player's data does. The stored validators expire when the
+    roster refresh becomes stale, so a 304 is never served for a roster that
+    would have been refreshed.
 
     Parameters:
+        request: The incoming request.
         team_id: The ID of the team.
-        team_abbr: The team abbreviation.
         season: The season string.
+        players: List of player dictionaries with last_updated timestamps.
+        refreshed_at: When the roster was last refreshed from the NHL API.
 
     Returns:
-        Updated list of players from the database.
-    """
-    players = nhl_client.players.players_by_team(team_abbr, season)
-
-    team = db.get_by_id(Team, team_id)
-
-    for position in players:
-        for player in players[position]:
-            birth_province_state = player.get("birthStateProvince", {}).get("default")
-
-            data = {
-                "id": player["id"],
-                "first_name": player["firstName"]["default"],
-                "last_name": player["lastName"]["default"],
-                "birth_date": player["birthDate"],
-                "birth_city": player["birthCity"]["default"],
-                "birth_country": player["birthCountry"],
-                "birth_province_state": birth_province_state,
-                "position": player["positionCode"],
-                "shoots_catches": player["shootsCatches"],
-                "height_in_centimeters": player["heightInCentimeters"],
-                "height_in_inches": player["heightInInches"],
-                "weight_in_kilograms": player["weightInKilograms"],
-                "weight_in_pounds": player["weightInPounds"],
-                "headshot": player["headshot"],
-                "sweater_number": player["sweaterNumber"],
-                "last_updated": datetime.now(),
-            }
-            try:
-                new_player = db.insert_one(Player, data)
-            except TransactionIntegrityError as e:
-                new_player = db.update_one(Player, player["id"], data)
-
-            try:
-                season_data = {
-                    "player": new_player,
-                    "team": team,
-                    "season": season,
-                    "sweater_number": player["sweaterNumber"],
-                }
-
-                db_helper.insert_player_team_season(new_player.id, team.id, season_data)
-            except TransactionIntegrityError as e:
-                update_data = {
-                    "sweater_number": player["sweaterNumber"],
-                }
-                db_helper.update_player_team_season(
-                    new_player.id, team.id, season, update_data
-                )
-
-    return db_helper.get_team_roster(team_id, season)
+        A 304 Response, or the roster and its count in json format.
+    """
+    content = {"roster": players, "count": len(players)}
+    if not players:
+        return await conditional_response(request, content)
+
+    return await conditional_response(
+        request,
+        content,
+        key=("roster", team_id, season),
+        last_modified=max(player.last_updated for player in players),
+        expires_at=refreshed_at + ROSTER_MAX_AGE,
+    )
 
 
-def _should_update_roster(players: list) -> bool:
+def _stale_roster_response(players: list):
     """
-    Checks to see if roster data needs to be updated (older than 2 hours).
-
-    Parameters:
-        players: List of player dictionaries with last_updated timestamps.
+    Builds a response for a roster that could not be refreshed.
 
     Returns:
-        True if any player data is stale, False otherwise.
+        The stored roster and its count with "stale": true, without validators so
+        it is never answered with a 304 later.
     """
-    if len(players) == 0:
-        return True
-
-    update_threshold = datetime.now() - timedelta(hours=2)
-    return any(player["last_updated"] <= update_threshold for player in players)
+    return FastJSONResponse(
+        {"roster": players, "count": len(players), "stale": True},
+        headers={"Cache-Control": "no-store"},
+    )
 
 
 @player_router.get("/players_by_team_id/")
-async def get_players_by_team_id(id: int, season: str = current_season):
+async def get_players_by_team_id(request: Request, id: int, season: str | None = None):
     """
     Gets basic player information about all players on a given teas for a given season.
 
@@ -128,21 +94,31 @@ async def get_players_by_team_id(id: int, season: str = current_season):
     Returns:
         A list of players on the given team and a dictionary of their basic information.
     """
-    team = db.get_by_id(Team, id)
+    season = season or current_season()
+    cached = await not_modified(request, ("roster", id, season))
+    if cached:
+        return cached
+
+    team = await adb.get_by_id(Team, id)
     if not team:
         return {"error": "Team not found."}
 
-    players = db_helper.get_team_roster(id, season)
+    players, refreshed_at = await adb_helper.get_roster_with_freshness(id, season)
 
-    if _should_update_roster(players):
-        players = await _update_team_roster(id, team.abbr, season)
+    if should_update_roster(refreshed_at):
+        players, refreshed_at, stale = await refresh_within_budget(
+            id, team.abbr, season, players, refreshed_at
+        )
+        if stale:
+            return _stale_roster_response(players)
 
-    players = jsonable_encoder(players)
-    return {"roster": players, "count": len(players)}
+    return await _roster_response(request, id, season, players, refreshed_at)
 
 
 @player_router.get("/players_by_team_name/")
-async def get_players_by_team_name(name: str, season: str = current_season):
+async def get_players_by_team_name(
+    request: Request, name: str, season: str | None = None
+):
     """
     Gets a team's roster for a specific season by the team's name.
 
@@ -153,20 +129,184 @@ async def get_players_by_team_name(name: str, season: str = current_season):
     Returns:
         A list aff the team's roster for the given season with a dictionary of the players basic information.
     """
-    team = db.search_by_any_field(
+    season = season or current_season()
+    team = await adb.search_by_any_field(
         Team, name, fields=["name", "common_name", "abbr"], case_sensitive=False
     )
     if not team:
         return {"error": "Team not found"}
 
-    players = db_helper.get_team_roster(team.id, season)
+    cached = await not_modified(request, ("roster", team.id, season))
+    if cached:
+        return cached
+
+    players, refreshed_at = await adb_helper.get_roster_with_freshness(team.id, season)
 
-    if _should_update_roster(players):
+    if should_update_roster(refreshed_at):
         ic("We need to update.")
-        players = await _update_team_roster(team.id, team.abbr, season)
+        players, refreshed_at, stale = await refresh_within_budget(
+            team.id, team.abbr, season, players, refreshed_at
+        )
+        if stale:
+            return _stale_roster_response(players)
+
+    return await _roster_response(request, team.id, season, players, refreshed_at)
+
+
+@player_router.get("/rosters")
+async def get_rosters(request: Request, team_ids: str, season: str | None = None):
+    """
+    Gets the rosters of several teams for a season in one request.
+
+    Stored rosters are read together, and only the stale ones are refreshed from
+    the NHL API, concurrently, so the request takes about as long as the slowest
+    refresh (at most the refresh budget) rather than the sum of them.
+
+    Parameters:
+        team_ids: A comma-separated list of team IDs (ex: "1,6,10").
+        season: The season string.
+            (default: the current season)
+
+    Returns:
+        The rosters keyed by team ID, each with its players, count and whether it is
+        stale, plus the requested IDs that didn't match a team.
+    """
+    season = season or current_season()
+    try:
+        ids = list(dict.fromkeys(int(i) for i in team_ids.split(",") if i.strip()))
+    except ValueError:
+        return {"error": "team_ids must be a comma-separated list of team IDs."}
+    if not ids or len(ids) > MAX_ROSTERS_PER_REQUEST:
+        return {
+            "error": f"Between 1 and {MAX_ROSTERS_PER_REQUEST} team IDs are supported."
+        }
+
+    rosters = await adb_helper.get_team_rosters(ids, season)
+
+    stale_ids = [
+        team_id
+        for team_id, state in rosters.items()
+        if should_update_roster(state["refreshed_at"])
+    ]
+    refreshes = await asyncio.gather(
+        *(
+            refresh_within_budget(
+                team_id,
+                rosters[team_id]["abbr"],
+                season,
+                rosters[team_id]["roster"],
+                rosters[team_id]["refreshed_at"],
+            )
+            for team_id in stale_ids
+        )
+    )
+
+    stale = set()
+    for team_id, (players, refreshed_at, reason) in zip(stale_ids, refreshes):
+        rosters[team_id]["roster"] = players
+        if reason:
+            stale.add(team_id)
+
+    content = {
+        "rosters": {
+            team_id: {
+                "roster": state["roster"],
+                "count": len(state["roster"]),
+                "stale": team_id in stale,
+            }
+            for team_id, state in rosters.items()
+        },
+        "not_found": [team_id for team_id in ids if team_id not in rosters],
+    }
+    if stale:
+        return FastJSONResponse(content, headers={"Cache-Control": "no-store"})
+    return await conditional_response(request, content)
+
+
+async def _list_response(request: Request, key: str, entity, filters: dict):
+    """
+    Builds a list endpoint response, streamed as NDJSON when the client asks for it.
+
+    Parameters:
+        request: The incoming request.
+        key: The name of the list in the JSON response.
+        entity: PonyORM entity class to list.
+        filters: A dictionary of column:value pairs to filter by. None values are ignored.
+
+    Returns:
+        An NDJSONResponse streaming one row per line (sent a cursor batch at a time),
+        or a dictionary with the rows and count.
+    """
+    filters = {k: v for k, v in filters.items() if v is not None}
+    rows = db.stream_all(entity, filters=filters, batch_size=NDJSON_BATCH_SIZE)
+
+    if wants_ndjson(request):
+        return NDJSONResponse(rows, batch_size=NDJSON_BATCH_SIZE)
+
+    rows = await run_db(list, rows)
+    return FastJSONResponse({key: rows, "count": len(rows)})
+
 
-    players = jsonable_encoder(players)
-    return {"roster": players, "count": len(players)}
+@player_router.get("/")
+async def get_all_players(request: Request):
+    """
+    Gets basic information about every stored player.
+
+    Send "Accept: application/x-ndjson" to stream one player per line instead of
+    building the whole list in memory.
+
+    Returns:
+        A list of players and their basic information.
+    """
+    return await _list_response(request, "players", Player, {})
+
+
+@player_router.get("/stats/")
+async def get_all_stats(
+    request: Request, season: str | None = None, player_id: int | None = None
+):
+    """
+    Gets game stats for every stored player.
+
+    Send "Accept: application/x-ndjson" to stream one stat line per row instead of
+    building the whole list in memory.
+
+    Parameters:
+        season: Only return stats for the given season string.
+            (this parameter is optional)
+        player_id: Only return stats for the given player.
+            (this parameter is optional)
+
+    Returns:
+        A list of stat rows.
+    """
+    return await _list_response(
+        request, "stats", Stat, {"season": season, "player": player_id}
+    )
+
+
+@player_router.get("/team_seasons/")
+async def get_all_team_seasons(
+    request: Request, season: str | None = None, team_id: int | None = None
+):
+    """
+    Gets every stored player-team-season record.
+
+    Send "Accept: application/x-ndjson" to stream one record per line instead of
+    building the whole list in memory.
+
+    Parameters:
+        season: Only return records for the given season string.
+            (this parameter is optional)
+        team_id: Only return records for the given team.
+            (this parameter is optional)
+
+    Returns:
+        A list of player-team-season records.
+    """
+    return await _list_response(
+        request, "team_seasons", PlayerTeamSeason, {"season": season, "team": team_id}
+    )
 
 
 @player_router.get("player_by_name/{name}")
@@ -182,3 +322,77 @@ async def get_player_by_name(name: str):
 
     """
     pass
+
+
+@player_router.get("/{id}/analytics")
+async def get_player_analytics(request: Request, id: int, season: str | None = None):
+    """
+    Gets a player's derived metrics for a season: points/60, shooting %, power play
+    share, rolling 5 and 10 game averages and TOI trend, plus a per-game log.
+
+    Parameters:
+        id: The ID of the player.
+        season: The season string (ex: "20252026").
+            (default: the current season)
+
+    Returns:
+        The player's metrics in json format, or None if they have no games in the season.
+    """
+    season = season or current_season()
+    rows = await adb_helper.get_stat_rows(season, player_id=id)
+    analytics = player_analytics(rows)
+    if analytics is not None:
+        analytics["season"] = season
+    return await conditional_response(request, analytics)
+
+
+@player_router.get("/{id}/summary")
+async def get_player_summary(request: Request, id: int):
+    """
+    Gets a player's career totals and their totals per season and team.
+
+    Parameters:
+        id: The ID of the player.
+
+    Returns:
+        The player's totals in json format, or None if they have no stats.
+    """
+    summary = await adb_helper.get_player_summary(id)
+    if summary is not None:
+        summary["player_id"] = id
+    return await conditional_response(request, summary)
+
+
+@player_router.get("/{id}/splits")
+async def get_player_splits(
+    request: Request,
+    id: int,
+    by: Literal["opponent", "home_road", "month"] = "opponent",
+    season: str | None = None,
+):
+    """
+    Gets a player's totals split by opponent, home/road or month.
+
+    Splits are read from the precomputed split rollup, not from game rows.
+
+    Parameters:
+        id: The ID of the player.
+        by: The split dimension: opponent, home_road or month.
+            (default: opponent)
+        season: Only count the given season string.
+            (this parameter is optional, every season is counted without it)
+
+    Returns:
+        The totals per split key and their count in json format.
+    """
+    splits = await adb_helper.get_player_splits(id, by, season)
+    return await conditional_response(
+        request,
+        {
+            "player_id": id,
+            "by": by,
+            "season": season,
+            "splits": splits,
+            "count": len(splits),
+        },
+    )
@@ -1,33 +1,46 @@
+from typing import Literal
+
 from icecream import ic
 
-from fastapi import APIRouter
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Request
 
-from db_connection import init_db, db
+from analytics import team_analytics
+from db_async import adb, adb_helper
 from db_models.entities import Team, Division, Conference
-
-db = init_db(create_tables=True)
+from response_cache import response_cache
+from conditional import conditional_response
+from db_helpers import current_season
 
 team_router = APIRouter()
 
 
 @team_router.get("/")
-async def get_all_team():
+async def get_all_team(request: Request):
     """
     Gets basic information about all NHL teams.
 
     Returns:
         A list of all basic team information in json format.
     """
-    teams_list = db.get_all_with_relations(
+    key = ("teams", "all")
+    cached = await response_cache.respond(request, key)
+    if cached:
+        return cached
+
+    teams_list = await adb.get_all_with_relations(
         Team,
         relation_fields={"division": ["name", "abbr"], "conference": ["name", "abbr"]},
     )
-    return {"teams": teams_list, "count": len(teams_list)}
+    return await response_cache.store(
+        request,
+        key,
+        {"teams": teams_list, "count": len(teams_list)},
+        cacheable=bool(teams_list),
+    )
 
 
 @team_router.get("/id/")
-async def get_team_by_id(id: int):
+async def get_team_by_id(request: Request, id: int):
     """
     Gets a teams basic information by its ID.
 
@@ -37,21 +50,23 @@ async def get_team_by_id(id: int):
     Returns:
         A dictionary of the teams basic information in json format, or None if not found.
     """
-    # team = db.get_by_id(Team, id_value=id)
-    team = db.get_one_by_id_with_relations(
+    key = ("teams", "id", id)
+    cached = await response_cache.respond(request, key)
+    if cached:
+        return cached
+
+    team = await adb.get_one_by_id_with_relations(
         Team,
         id_value=id,
         exclude=["id"],
         relation_fields={"division": ["abbr", "name"], "conference": ["abbr", "name"]},
     )
 
-    team = jsonable_encoder(team)
-
-    return team
+    return await response_cache.store(request, key, team, cacheable=team is not None)
 
 
 @team_router.get("/name/")
-async def get_team_by_name(name: str):
+async def get_team_by_name(request: Request, name: str):
     """
     Gets teams basic information by its name, common name, or abbreviation.
 
@@ -61,18 +76,22 @@ async def get_team_by_name(name: str):
     Returns:
         A dictionary of the teams basic information in json format, or None if not found.
     """
-    team = db.search_by_any_field_with_relations(
+    key = ("teams", "name", name.lower())
+    cached = await response_cache.respond(request, key)
+    if cached:
+        return cached
+
+    team = await adb.search_by_any_field_with_relations(
         Team,
         search_value=name,
         fields=["name", "common_name", "abbr"],
         case_sensitive=False,
     )
-    team = jsonable_encoder(team)
-    return team
+    return await response_cache.store(request, key, team, cacheable=team is not None)
 
 
 @team_router.get("/division/id/")
-async def get_teams_by_division_id(div_id: int):
+async def get_teams_by_division_id(request: Request, div_id: int):
     """
     Gets basic team information for all teams in the given division.
 
@@ -82,19 +101,24 @@ async def get_teams_by_division_id(div_id: int):
     Returns:
         A list of teams and a dictionary of thier information in json format.
     """
-    teams = db.get_all_with_relations(
+    key = ("teams", "division_id", div_id)
+    cached = await response_cache.respond(request, key)
+    if cached:
+        return cached
+
+    teams = await adb.get_all_with_relations(
         Team,
         filters={"division": div_id},
         exclude=["id"],
         relation_fields={"division": ["abbr", "name"], "conference": ["abbr", "name"]},
     )
-    teams = jsonable_encoder(teams)
-
-    return {"teams": teams, "count": len(teams)}
+    return await response_cache.store(
+        request, key, {"teams": teams, "count": len(teams)}, cacheable=bool(teams)
+    )
 
 
 @team_router.get("division/name/")
-async def get_teams_by_division_name(div_name: str):
+async def get_teams_by_division_name(request: Request, div_name: str):
     """
     Gets basic team information for all teams in the given division.
 
@@ -104,21 +128,26 @@ async def get_teams_by_division_name(div_name: str):
     Returns:
         A list of teams and a dictionary of thier information in json format.
     """
-    division = db.search_by_any_field(Division, div_name, ["name", "abbr"]).id
+    key = ("teams", "division_name", div_name.lower())
+    cached = await response_cache.respond(request, key)
+    if cached:
+        return cached
 
-    teams = db.get_all_with_relations(
+    division = (await adb.search_by_any_field(Division, div_name, ["name", "abbr"])).id
+
+    teams = await adb.get_all_with_relations(
         Team,
         filters={"division": division},
         exclude=["id"],
         relation_fields={"division": ["abbr", "name"], "conference": ["abbr", "name"]},
     )
-    teams = jsonable_encoder(teams)
-
-    return {"teams": teams, "count": len(teams)}
+    return await response_cache.store(
+        request, key, {"teams": teams, "count": len(teams)}, cacheable=bool(teams)
+    )
 
 
 @team_router.get("/conference/id/")
-async def get_teams_by_conference_id(conf_id: int):
+async def get_teams_by_conference_id(request: Request, conf_id: int):
     """
     Gets basic team information for all teams in the given conference.
 
@@ -128,19 +157,24 @@ async def get_teams_by_conference_id(conf_id: int):
     Returns:
         A list of teams and a dictionary of thier information in json format.
     """
-    teams = db.get_all_with_relations(
+    key = ("teams", "conference_id", conf_id)
+    cached = await response_cache.respond(request, key)
+    if cached:
+        return cached
+
+    teams = await adb.get_all_with_relations(
         Team,
         filters={"conference": conf_id},
         exclude=["id"],
         relation_fields={"division": ["abbr", "name"], "conference": ["abbr", "name"]},
     )
-    teams = jsonable_encoder(teams)
-
-    return {"teams": teams, "count": len(teams)}
+    return await response_cache.store(
+        request, key, {"teams": teams, "count": len(teams)}, cacheable=bool(teams)
+    )
 
 
 @team_router.get("/conference/name/")
-async def get_teams_by_conference_name(conf_name: str):
+async def get_teams_by_conference_name(request: Request, conf_name: str):
     """
     Gets basic team information for all teams in the given conference.
 
@@ -150,14 +184,98 @@ async def get_teams_by_conference_name(conf_name: str):
     Returns:
         A list of teams and a dictionary of thier information in json format.
     """
-    conference = db.search_by_any_field(Conference, conf_name, ["abbr", "name"]).id
+    key = ("teams", "conference_name", conf_name.lower())
+    cached = await response_cache.respond(request, key)
+    if cached:
+        return cached
+
+    conference = (
+        await adb.search_by_any_field(Conference, conf_name, ["abbr", "name"])
+    ).id
 
-    teams = db.get_all_with_relations(
+    teams = await adb.get_all_with_relations(
         Team,
         filters={"conference": conference},
         exclude=["id"],
         relation_fields={"division": ["abbr", "name"], "conference": ["abbr", "name"]},
     )
-    teams = jsonable_encoder(teams)
+    return await response_cache.store(
+        request, key, {"teams": teams, "count": len(teams)}, cacheable=bool(teams)
+    )
+
+
+@team_router.get("/{id}/analytics")
+async def get_team_analytics(request: Request, id: int, season: str | None = None):
+    """
+    Gets the derived metrics of every player who played for a team in a season.
+
+    Parameters:
+        id: The ID of the team.
+        season: The season string (ex: "20252026").
+            (default: the current season)
+
+    Returns:
+        The team's players and their metrics in json format, or None if the team
+        doesn't exist.
+    """
+    season = season or current_season()
+    team = await adb.get_by_id(Team, id)
+    if team is None:
+        return None
+
+    players = team_analytics(
+        await adb_helper.get_stat_rows(season, team_abbr=team.abbr)
+    )
+    return await conditional_response(
+        request,
+        {
+            "team_id": id,
+            "abbr": team.abbr,
+            "season": season,
+            "players": players,
+            "count": len(players),
+        },
+    )
 
-    return {"teams": teams, "count": len(teams)}
+
+@team_router.get("/{id}/splits")
+async def get_team_splits(
+    request: Request,
+    id: int,
+    by: Literal["opponent", "home_road", "month"] = "opponent",
+    season: str | None = None,
+):
+    """
+    Gets the totals of a team's players in a season, split by opponent, home/road
+    or month.
+
+    Splits are read from the precomputed split rollup, not from game rows.
+
+    Parameters:
+        id: The ID of the team.
+        by: The split dimension: opponent, home_road or month.
+            (default: opponent)
+        season: The season string (ex: "20252026").
+            (default: the current season)
+
+    Returns:
+        The totals per split key and their count in json format, or None if the
+        team doesn't exist. player_games counts each player's games.
+    """
+    season = season or current_season()
+    team = await adb.get_by_id(Team, id)
+    if team is None:
+        return None
+
+    splits = await adb_helper.get_team_splits(team.abbr, season, by)
+    return await conditional_response(
+        request,
+        {
+            "team_id": id,
+            "abbr": team.abbr,
+            "by": by,
+            "season": season,
+            "splits": splits,
+            "count": len(splits),
+        },
+    )
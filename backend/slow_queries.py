@@ -0,0 +1,164 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from icecream import ic
+
+from db_connection import db
+from instrumentation import normalize_sql
+
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_BUFFER = int(os.environ.get("SLOW_QUERY_BUFFER", "200"))
+EXPLAIN_TIMEOUT_MS = int(os.environ.get("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "5000"))
+
+
+def redact_params(params):
+    """
+    Replaces query parameter values with their type, so logged queries never
+    contain user data.
+
+    Parameters:
+        params: A dictionary or sequence of query parameters, or None.
+
+    Returns:
+        The parameters with every value replaced by "<type>" (None is kept).
+
+    Examples:
+        redact_params({"p1": 8478402, "p2": "McDavid"})
+            -> {"p1": "<int>", "p2": "<str>"}
+    """
+
+    def redact(value):
+        return None if value is None else f"<{type(value).__name__}>"
+
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: redact(value) for key, value in params.items()}
+    return [redact(value) for value in params]
+
+
+class SlowQueryLog:
+    """
+    Records statements slower than a threshold in a bounded ring buffer, and
+    captures an EXPLAIN (ANALYZE, BUFFERS) plan for each slow SELECT.
+
+    Plans are captured on a background thread with its own connection (see
+    DatabaseConnection.open_connection()), inside a read-only transaction that is
+    rolled back, so the request that ran the slow statement never waits for them.
+    Each statement shape is explained at most once per explain_cooldown seconds.
+    """
+
+    def __init__(
+        self,
+        database,
+        threshold_ms=SLOW_QUERY_MS,
+        size=SLOW_QUERY_BUFFER,
+        explain_cooldown=60.0,
+    ):
+        """
+        Parameters:
+            database: The DatabaseConnection whose statements are recorded.
+            threshold_ms: Statements slower than this are recorded.
+                (default: the SLOW_QUERY_MS environment variable, or 100)
+            size: The number of slow statements kept.
+                (default: the SLOW_QUERY_BUFFER environment variable, or 200)
+            explain_cooldown: Seconds before the same statement shape is explained again.
+                (default: 60.0)
+        """
+        self.database = database
+        self.threshold = threshold_ms / 1000
+        self.entries = deque(maxlen=size)
+        self.explain_cooldown = explain_cooldown
+        self._explained = {}
+        self._pending = queue.Queue(maxsize=32)
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def record(self, statement, params, duration, rowcount):
+        """
+        Query listener (see DatabaseConnection.add_query_listener).
+        """
+        if duration < self.threshold:
+            return
+
+        shape = normalize_sql(statement)
+        entry = {
+            "recorded_at": time.time(),
+            "duration_ms": duration * 1000,
+            "rows": rowcount,
+            "sql": shape,
+            "params": redact_params(params),
+            "explain": None,
+            "explain_status": "skipped",
+        }
+        self.entries.append(entry)
+
+        if not statement.lstrip()[:6].upper() == "SELECT":
+            entry["explain_status"] = "skipped: not a SELECT"
+            return
+
+        now = time.monotonic()
+        if now - self._explained.get(shape, -self.explain_cooldown) < (
+            self.explain_cooldown
+        ):
+            entry["explain_status"] = "skipped: explained recently"
+            return
+        self._explained[shape] = now
+
+        try:
+            self._pending.put_nowait((entry, statement, params))
+            entry["explain_status"] = "pending"
+        except queue.Full:
+            entry["explain_status"] = "skipped: explain queue full"
+            return
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._explain_loop, name="nhltrak-explain", daemon=True
+                )
+                self._worker.start()
+
+    def _explain_loop(self):
+        connection = None
+        while True:
+            entry, statement, params = self._pending.get()
+            try:
+                if connection is None or connection.closed:
+                    connection = self.database.open_connection(readonly=True)
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}"
+                    )
+                    cursor.execute(
+                        "EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) " + statement, params
+                    )
+                    entry["explain"] = "\n".join(row[0] for row in cursor.fetchall())
+                entry["explain_status"] = "captured"
+            except Exception as e:
+                entry["explain_status"] = f"error: {e}"
+                ic(f"Error explaining slow query: {e}")
+                if connection is not None:
+                    connection.close()
+                    connection = None
+            finally:
+                if connection is not None and not connection.closed:
+                    connection.rollback()
+
+    def snapshot(self):
+        """
+        Returns:
+            A dictionary with the threshold and the recorded slow statements, newest first.
+        """
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "queries": list(reversed(self.entries)),
+        }
+
+
+slow_query_log = SlowQueryLog(db)
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# Modules import each other from the backend directory (ex: "from db_connection import db").
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def mapped_db(tmp_path_factory):
+    """
+    Maps all entities, including the aggregate tables, on a temporary SQLite database.
+
+    A file rather than ":memory:", whose tables only exist on the connection of the
+    thread that created them, so calls made on the DB thread pool see them too.
+    """
+    from db_connection import db
+    import db_models.entities  # noqa: F401 - entities must be declared before mapping
+
+    if not db._mapped:
+        filename = str(tmp_path_factory.mktemp("db") / "nhltrak.sqlite")
+        db.db.bind(provider="sqlite", filename=filename, create_db=True)
+        db._connected = True
+        db.generate_mappings(create_tables=True)
+    return db
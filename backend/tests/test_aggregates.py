@@ -0,0 +1,72 @@
+from datetime import date, datetime
+
+from pony.orm import db_session
+
+from aggregates import _touched_rows
+from db_helpers import DatabaseHelper
+from db_models.entities import Player, PlayerSeasonTotals, PlayerSplitTotals
+
+
+def _stat(stat_id, player, season, day, opponent="TOR", goals=1):
+    return {
+        "id": stat_id,
+        "player": player,
+        "season": season,
+        "team_abbr": "EDM",
+        "opponent_abbr": opponent,
+        "home_road_flag": True,
+        "game_date": day,
+        "goals": goals,
+        "assists": 0,
+        "points": goals,
+        "toi": "20:00",
+    }
+
+
+def test_ingest_updates_only_touched_totals(mapped_db):
+    helper = DatabaseHelper(mapped_db)
+    with db_session:
+        Player(id=101, last_updated=datetime(2025, 10, 1))
+
+    helper.ingest_stats(
+        [
+            _stat(1001, 101, "20232024", date(2023, 11, 1)),
+            _stat(1002, 101, "20242025", date(2024, 11, 1), opponent="MTL"),
+        ]
+    )
+    # Re-ingesting a game with a new value moves only that game's totals.
+    report = helper.ingest_stats(
+        [_stat(1002, 101, "20242025", date(2024, 11, 1), opponent="MTL", goals=3)]
+    )
+    assert report["updated"] == 1
+
+    summary = helper.get_player_summary(101)
+    assert summary["career"]["goals"] == 4
+    assert [(s["season"], s["goals"]) for s in summary["seasons"]] == [
+        ("20232024", 1),
+        ("20242025", 3),
+    ]
+
+
+def test_touched_rows_skips_other_seasons_and_keys(mapped_db):
+    helper = DatabaseHelper(mapped_db)
+    with db_session:
+        Player(id=102, last_updated=datetime(2025, 10, 1))
+    helper.ingest_stats(
+        [
+            _stat(2001, 102, "20232024", date(2023, 11, 1)),
+            _stat(2002, 102, "20242025", date(2024, 11, 1), opponent="MTL"),
+        ]
+    )
+
+    with db_session:
+        key = (102, "20242025", "EDM")
+        rows = _touched_rows(
+            PlayerSeasonTotals, ("player", "season", "team_abbr"), {key: None}
+        )
+        assert list(rows) == [key]
+
+        split = (102, "20242025", "EDM", "opponent", "MTL")
+        columns = ("player", "season", "team_abbr", "dimension", "split_key")
+        rows = _touched_rows(PlayerSplitTotals, columns, {split: None})
+        assert list(rows) == [split]
@@ -0,0 +1,55 @@
+import asyncio
+import os
+from datetime import datetime
+
+import pytest
+
+from cache_backends import SharedCache, private_directory
+from conditional import Validators
+from response_cache import CachedResponse
+
+
+def test_cached_response_round_trip():
+    entry = CachedResponse(b'{"teams": []}', datetime(2025, 10, 1, 12, 30))
+    decoded = CachedResponse.from_bytes(entry.to_bytes())
+    assert decoded.variants == entry.variants
+    assert decoded.last_modified == entry.last_modified
+
+
+def test_validators_round_trip():
+    validators = Validators('"abc"', datetime(2025, 10, 1), None)
+    decoded = Validators.from_bytes(validators.to_bytes())
+    assert (decoded.etag, decoded.last_modified, decoded.expires_at) == (
+        '"abc"',
+        datetime(2025, 10, 1),
+        None,
+    )
+
+
+def test_private_directory_rejects_open_modes(tmp_path):
+    path = tmp_path / "cache"
+    assert private_directory(str(path)) == str(path)
+    assert os.stat(path).st_mode & 0o777 == 0o700
+
+    os.chmod(path, 0o755)
+    with pytest.raises(RuntimeError):
+        private_directory(str(path))
+
+
+def test_shared_cache_evicts_over_max_bytes(tmp_path):
+    cache = SharedCache(
+        "test",
+        bytes,
+        bytes,
+        directory=str(tmp_path / "cache"),
+        max_bytes=10000,
+    )
+
+    async def fill():
+        for i in range(100):
+            await cache.set(("key", i), b"x" * 500)
+        return await cache.get(("key", 99))
+
+    assert asyncio.run(fill()) == b"x" * 500
+    size = cache._connection().execute("SELECT SUM(size) FROM cache").fetchone()[0]
+    assert size <= 10000
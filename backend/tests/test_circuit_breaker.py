@@ -0,0 +1,153 @@
+import asyncio
+import threading
+
+import pytest
+
+import circuit_breaker
+import nhl
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker, "monotonic", clock)
+    return clock
+
+
+def _open_breaker(clock, probes=1):
+    breaker = CircuitBreaker(
+        "test", failure_threshold=3, reset_timeout=30.0, probes=probes
+    )
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    return breaker
+
+
+def test_closed_to_open_to_half_open_to_closed(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30.0)
+
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now += 29.9
+    assert not breaker.allow()
+    assert breaker.state == OPEN
+
+    clock.now += 0.1
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+
+    breaker.record_success()
+    assert breaker.snapshot() == {"name": "test", "state": CLOSED, "failures": 0}
+    assert breaker.allow()
+
+
+def test_success_resets_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3)
+
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens_for_a_full_timeout(clock):
+    breaker = _open_breaker(clock)
+    clock.now += 30.0
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    clock.now += 29.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.allow()
+
+
+def test_success_while_open_keeps_it_open(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    assert breaker.allow()  # a slow call, started while closed
+    breaker.allow()
+    breaker.record_failure()
+
+    breaker.record_success()
+
+    assert breaker.state == OPEN
+
+
+@pytest.mark.parametrize("probes", [1, 3])
+def test_half_open_allows_only_probe_slots(clock, probes):
+    breaker = _open_breaker(clock, probes=probes)
+    clock.now += 30.0
+
+    assert [breaker.allow() for _ in range(probes + 2)] == [True] * probes + [
+        False,
+        False,
+    ]
+    assert breaker.in_flight_probes == probes
+
+    # A released probe frees its slot without changing the state.
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_release_outside_half_open_is_a_no_op(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3)
+    assert breaker.allow()
+
+    breaker.release()
+
+    assert breaker.snapshot() == {"name": "test", "state": CLOSED, "failures": 0}
+
+
+def test_cancelled_call_releases_its_probe(clock, monkeypatch):
+    breaker = _open_breaker(clock)
+    clock.now += 30.0
+    monkeypatch.setattr(nhl, "nhl_breaker", breaker)
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_call():
+        started.set()
+        finish.wait(5)
+
+    async def cancel_probe():
+        task = asyncio.ensure_future(nhl.call_nhl(slow_call))
+        await asyncio.to_thread(started.wait, 5)
+        # The probe slot is taken while the call is in flight.
+        with pytest.raises(CircuitOpenError):
+            await nhl.call_nhl(slow_call)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    try:
+        asyncio.run(cancel_probe())
+    finally:
+        finish.set()
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.in_flight_probes == 0
+    assert breaker.failures == 3
+    assert breaker.allow()
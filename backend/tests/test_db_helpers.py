@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from pony.orm import db_session
+
+from db_helpers import DatabaseHelper, content_hash
+from db_models.entities import Conference, Division, Player, RosterRefresh, Team
+
+
+def _team(team_id, abbr):
+    with db_session:
+        Team(
+            id=team_id,
+            abbr=abbr,
+            conference=Conference(abbr="W"),
+            division=Division(abbr="P"),
+        )
+
+
+def _player(player_id, sweater_number=10, weight=90):
+    return {
+        "id": player_id,
+        "first_name": "First",
+        "last_name": f"Last{player_id}",
+        "birth_date": "2000-01-01",
+        "birth_city": "Edmonton",
+        "birth_country": "CAN",
+        "birth_province_state": None,
+        "position": "C",
+        "shoots_catches": "L",
+        "height_in_centimeters": 185,
+        "height_in_inches": 73,
+        "weight_in_kilograms": weight,
+        "weight_in_pounds": round(weight * 2.2),
+        "headshot": "",
+        "sweater_number": sweater_number,
+    }
+
+
+def test_store_team_roster_reports_inserted_updated_unchanged(mapped_db):
+    helper = DatabaseHelper(mapped_db)
+    _team(9001, "AAA")
+
+    report = helper.store_team_roster(
+        9001, "20252026", [_player(90011), _player(90012)]
+    )
+    assert report["players"] == {"inserted": 2, "updated": 0, "unchanged": 0}
+    assert report["team_seasons"] == {"inserted": 2, "updated": 0, "unchanged": 0}
+
+    report = helper.store_team_roster(
+        9001,
+        "20252026",
+        [_player(90011), _player(90012, sweater_number=99), _player(90013)],
+    )
+    # Player rows include the sweater number, so the renumbered player is updated too.
+    assert report["players"] == {"inserted": 1, "updated": 1, "unchanged": 1}
+    assert report["team_seasons"] == {"inserted": 1, "updated": 1, "unchanged": 1}
+
+    with db_session:
+        assert (
+            RosterRefresh[Team[9001], "20252026"].refreshed_at == report["refreshed_at"]
+        )
+
+
+def test_store_team_roster_skips_players_with_unchanged_hash(mapped_db):
+    helper = DatabaseHelper(mapped_db)
+    _team(9002, "BBB")
+    helper.store_team_roster(9002, "20252026", [_player(90021), _player(90022)])
+    with db_session:
+        Player[90021].last_updated = datetime(2000, 1, 1)
+        Player[90022].last_updated = datetime(2000, 1, 1)
+
+    report = helper.store_team_roster(
+        9002, "20252026", [_player(90021), _player(90022, weight=95)]
+    )
+
+    assert report["players"] == {"inserted": 0, "updated": 1, "unchanged": 1}
+    with db_session:
+        assert Player[90021].last_updated == datetime(2000, 1, 1)
+        assert Player[90021].content_hash == content_hash(_player(90021))
+        assert Player[90022].last_updated == report["refreshed_at"]
+        assert Player[90022].weight_in_kilograms == 95
+        assert Player[90022].content_hash == content_hash(_player(90022, weight=95))
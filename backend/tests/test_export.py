@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from db_models.entities import PlayerCareerTotals  # noqa: E402
+from export import (
+    EXCLUDED_COLUMNS,
+    EXPORT_TABLES,
+    export_schema,
+    write_batches,
+)  # noqa: E402
+
+
+@pytest.mark.parametrize("table", sorted(EXPORT_TABLES))
+def test_export_schema_has_only_columns(mapped_db, table):
+    entity = EXPORT_TABLES[table]
+    columns = [c for a in entity._attrs_ if not a.is_collection for c in a.columns]
+    schema = export_schema(table)
+    assert schema.names == [c for c in columns if c not in EXCLUDED_COLUMNS]
+
+
+def test_players_schema_skips_reverse_attributes(mapped_db):
+    # Player.career_totals is the reverse side of PlayerCareerTotals.player.
+    assert PlayerCareerTotals.player.reverse.columns == []
+    names = export_schema("players").names
+    assert "career_totals" not in names and None not in names
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+def test_players_round_trip(mapped_db, fmt):
+    schema = export_schema("players")
+    values = {
+        "id": 8478402,
+        "first_name": "Connor",
+        "last_name": "McDavid",
+        "sweater_number": 97,
+        "last_updated": datetime(2025, 10, 1, 12, 0),
+    }
+    row = tuple(values.get(name) for name in schema.names)
+    data = b"".join(write_batches([[row]], fmt, schema))
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(pa.BufferReader(data))
+    else:
+        table = pa.ipc.open_stream(data).read_all()
+    assert table.num_rows == 1
+    assert table.column("last_name").to_pylist() == ["McDavid"]
+    assert table.column("last_updated").to_pylist() == [values["last_updated"]]
+
+
+def test_stats_schema_types(mapped_db):
+    schema = export_schema("stats")
+    assert schema.field("player").type == pa.int64()
+    assert schema.field("game_date").type == pa.date32()
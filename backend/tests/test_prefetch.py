@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+import prefetch
+
+
+class FakeConnection:
+    def __init__(self, error=None):
+        self.error = error
+        self.autocommit = False
+        self.closed = False
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, *args):
+                if connection.error:
+                    raise connection.error
+
+            def fetchone(self):
+                return (False,)
+
+        return Cursor()
+
+    def close(self):
+        self.closed = True
+
+
+def test_try_lock_closes_connection_on_error(monkeypatch):
+    connection = FakeConnection(error=RuntimeError("connection reset"))
+    monkeypatch.setattr(prefetch.db, "open_connection", lambda: connection)
+
+    assert prefetch.RosterPrefetcher()._try_lock() is False
+    assert connection.closed
+
+
+def test_try_lock_closes_connection_when_lock_is_held(monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(prefetch.db, "open_connection", lambda: connection)
+
+    assert prefetch.RosterPrefetcher()._try_lock() is False
+    assert connection.closed
+
+
+def test_refresh_all_starts_each_team_within_its_slot(monkeypatch):
+    teams = [SimpleNamespace(id=i, abbr=f"T{i}") for i in (3, 1, 2, 4)]
+    delays = {}
+    refreshed = []
+
+    async def get_team_records():
+        return teams
+
+    async def refresh_team_roster(team_id, team_abbr, season):
+        refreshed.append(team_id)
+
+    real_sleep = asyncio.sleep
+
+    async def sleep(seconds):
+        delays[len(delays)] = seconds
+        await real_sleep(0)
+
+    monkeypatch.setattr(prefetch.adb_helper, "get_team_records", get_team_records)
+    monkeypatch.setattr(prefetch, "refresh_team_roster", refresh_team_roster)
+    monkeypatch.setattr(prefetch.asyncio, "sleep", sleep)
+
+    prefetcher = prefetch.RosterPrefetcher(rate=1000.0, burst=len(teams), jitter=0.5)
+    report = asyncio.run(prefetcher.refresh_all(800.0))
+
+    assert report == {"teams": 4, "refreshed": 4, "failed": 0}
+    assert sorted(refreshed) == [1, 2, 3, 4]
+    spacing = 800.0 * 0.5 / len(teams)
+    for slot in range(len(teams)):
+        assert slot * spacing <= delays[slot] < (slot + 1) * spacing
+    assert max(delays.values()) < 800.0 * 0.5
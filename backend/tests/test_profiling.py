@@ -0,0 +1,44 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import profiling
+from profiling import CaptureStore, ProfilingMiddleware
+from routers.admin_routes import admin_router
+
+NON_ASCII = "töken".encode("latin-1")
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(profiling, "PROFILE_ON_DEMAND", True)
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0.0)
+
+    app = FastAPI()
+    app.include_router(admin_router, prefix="/admin")
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    store = CaptureStore(directory=tmp_path)
+    app.add_middleware(ProfilingMiddleware, store=store)
+    return TestClient(app)
+
+
+def test_profile_header_with_the_token_captures(client):
+    response = client.get("/ping", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    assert "x-profile-capture" in response.headers
+
+
+def test_non_ascii_profile_header_is_not_an_error(client):
+    response = client.get("/ping", headers={"X-Profile": NON_ASCII})
+    assert response.status_code == 200
+    assert "x-profile-capture" not in response.headers
+
+
+def test_non_ascii_admin_token_is_forbidden(client):
+    response = client.get("/admin/runtime", headers={"X-Admin-Token": NON_ASCII})
+    assert response.status_code == 403
@@ -0,0 +1,147 @@
+import asyncio
+import gzip
+
+import pytest
+from starlette.requests import Request
+
+import response_cache
+from cache_backends import LocalCache
+from db_models.entities import Division, Player, Team
+from response_cache import CachedResponse, ResponseCache
+
+BODY = b'{"teams": []}'
+
+
+def _request(**headers):
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "headers": [
+                (name.replace("_", "-").lower().encode(), value.encode())
+                for name, value in headers.items()
+            ],
+        }
+    )
+
+
+def _entry_with_br():
+    # Entries from a shared backend can carry a br variant written by another worker.
+    entry = CachedResponse(BODY)
+    etag = entry.variants["identity"][1]
+    entry.variants["br"] = (b"brotli body", etag[:-1] + '-br"')
+    return entry
+
+
+def _respond(cache, request, key=("teams",)):
+    return asyncio.run(cache.respond(request, key))
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, encoding",
+    [
+        (None, "identity"),
+        ("identity", "identity"),
+        ("gzip", "gzip"),
+        ("gzip, deflate", "gzip"),
+        ("br", "br"),
+        ("gzip, br", "br"),
+        ("br;q=0, gzip", "gzip"),
+        ("br;q=0, gzip;q=0", "identity"),
+        ("gzip;q=0.5", "gzip"),
+        ("*", "br"),
+        ("GZIP", "gzip"),
+    ],
+)
+def test_select_encoding(accept_encoding, encoding):
+    headers = {} if accept_encoding is None else {"accept_encoding": accept_encoding}
+
+    selected = response_cache._select_encoding(_request(**headers), _entry_with_br())
+
+    assert selected == encoding
+
+
+def test_select_encoding_without_br_variant_falls_back_to_gzip():
+    entry = CachedResponse(BODY)
+    entry.variants.pop("br", None)
+
+    assert (
+        response_cache._select_encoding(_request(accept_encoding="br, gzip"), entry)
+        == "gzip"
+    )
+    assert (
+        response_cache._select_encoding(_request(accept_encoding="br"), entry)
+        == "identity"
+    )
+
+
+def test_variants_have_separate_etags():
+    entry = CachedResponse(BODY)
+    identity_etag = entry.variants["identity"][1]
+
+    assert entry.variants["identity"][0] == BODY
+    assert gzip.decompress(entry.variants["gzip"][0]) == BODY
+    assert entry.variants["gzip"][1] == identity_etag[:-1] + '-gzip"'
+    etags = [etag for _, etag in entry.variants.values()]
+    assert len(set(etags)) == len(etags)
+
+
+def test_br_variant_is_compressed():
+    brotli = pytest.importorskip("brotli")
+    entry = CachedResponse(BODY)
+
+    assert brotli.decompress(entry.variants["br"][0]) == BODY
+    assert entry.variants["br"][1] == entry.variants["identity"][1][:-1] + '-br"'
+
+
+def test_response_uses_variant_body_and_etag():
+    cache = ResponseCache(LocalCache())
+    asyncio.run(cache.backend.set(("teams",), CachedResponse(BODY)))
+
+    plain = _respond(cache, _request())
+    gzipped = _respond(cache, _request(accept_encoding="gzip"))
+
+    assert plain.body == BODY
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(gzipped.body) == BODY
+    assert gzipped.headers["etag"] != plain.headers["etag"]
+    assert gzipped.headers["vary"] == plain.headers["vary"] == "Accept-Encoding"
+
+
+def test_if_none_match_is_checked_against_the_selected_variant():
+    cache = ResponseCache(LocalCache())
+    asyncio.run(cache.backend.set(("teams",), CachedResponse(BODY)))
+    gzip_etag = _respond(cache, _request(accept_encoding="gzip")).headers["etag"]
+
+    # The gzip ETag doesn't validate the identity representation, and vice versa.
+    assert _respond(cache, _request(if_none_match=gzip_etag)).status_code == 200
+    response = _respond(
+        cache, _request(accept_encoding="gzip", if_none_match=gzip_etag)
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == gzip_etag
+
+
+@pytest.fixture
+def shared_cache(monkeypatch):
+    cache = ResponseCache(LocalCache())
+    monkeypatch.setattr(response_cache, "response_cache", cache)
+    for key in (("teams",), ("teams", "id", 1), ("players", 1)):
+        asyncio.run(cache.backend.set(key, CachedResponse(BODY)))
+    return cache
+
+
+@pytest.mark.parametrize("entity", [Team, Division])
+def test_invalidate_on_team_write_drops_team_responses(shared_cache, entity):
+    response_cache.invalidate_on_team_write(entity, [1])
+
+    assert _respond(shared_cache, _request(), ("teams",)) is None
+    assert _respond(shared_cache, _request(), ("teams", "id", 1)) is None
+    assert _respond(shared_cache, _request(), ("players", 1)) is not None
+
+
+def test_invalidate_on_team_write_ignores_other_entities(shared_cache):
+    response_cache.invalidate_on_team_write(Player, [1])
+
+    assert _respond(shared_cache, _request(), ("teams", "id", 1)) is not None
@@ -0,0 +1,107 @@
+from datetime import date
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from responses import (
+    NDJSON_BATCH_SIZE,
+    NDJSON_MEDIA_TYPE,
+    NDJSONResponse,
+    ndjson_lines,
+    wants_ndjson,
+)
+
+
+def _request(accept=None):
+    headers = [] if accept is None else [(b"accept", accept.encode())]
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, False),
+        ("application/json", False),
+        ("*/*", False),
+        ("application/x-ndjson", True),
+        ("application/json;q=0.5, application/x-ndjson", True),
+    ],
+)
+def test_wants_ndjson(accept, expected):
+    assert wants_ndjson(_request(accept)) is expected
+
+
+def _rows(count):
+    return [{"id": i} for i in range(count)]
+
+
+@pytest.mark.parametrize(
+    "count, batch_size, chunk_rows",
+    [
+        (0, 3, []),
+        (3, 3, [3]),
+        (7, 3, [3, 3, 1]),
+        (2, 3, [2]),
+        (NDJSON_BATCH_SIZE, NDJSON_BATCH_SIZE, [NDJSON_BATCH_SIZE]),
+        (NDJSON_BATCH_SIZE + 1, NDJSON_BATCH_SIZE, [NDJSON_BATCH_SIZE, 1]),
+    ],
+)
+def test_ndjson_lines_batches_rows(count, batch_size, chunk_rows):
+    chunks = list(ndjson_lines(_rows(count), batch_size))
+
+    assert [chunk.count(b"\n") for chunk in chunks] == chunk_rows
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+    lines = b"".join(chunks).splitlines()
+    assert [orjson.loads(line) for line in lines] == _rows(count)
+
+
+def test_ndjson_lines_defaults_to_batch_size():
+    chunks = list(ndjson_lines(_rows(NDJSON_BATCH_SIZE)))
+
+    assert len(chunks) == 1
+
+
+def test_ndjson_lines_pulls_one_batch_at_a_time():
+    pulled = []
+
+    def rows():
+        for i in range(10):
+            pulled.append(i)
+            yield {"id": i}
+
+    chunks = ndjson_lines(rows(), batch_size=4)
+    next(chunks)
+
+    assert pulled == [0, 1, 2, 3]
+
+
+def test_ndjson_response_streams_rows():
+    app = FastAPI()
+
+    @app.get("/rows")
+    def rows():
+        return NDJSONResponse(
+            iter([{"id": 1, "day": date(2025, 10, 1)}, {"id": 2, "day": None}]),
+            batch_size=1,
+        )
+
+    response = TestClient(app).get("/rows")
+
+    assert response.headers["content-type"] == NDJSON_MEDIA_TYPE
+    assert response.text == '{"id":1,"day":"2025-10-01"}\n{"id":2,"day":null}\n'
+
+
+def test_ndjson_response_with_no_rows_is_empty():
+    app = FastAPI()
+
+    @app.get("/rows")
+    def rows():
+        return NDJSONResponse(iter([]))
+
+    response = TestClient(app).get("/rows")
+
+    assert response.status_code == 200
+    assert response.content == b""
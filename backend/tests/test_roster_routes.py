@@ -0,0 +1,149 @@
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pony.orm import db_session
+
+from conditional import http_date, validators
+from db_models.entities import (
+    Conference,
+    Division,
+    Player,
+    PlayerTeamSeason,
+    RosterRefresh,
+    Team,
+)
+from routers.player_routes import MAX_ROSTERS_PER_REQUEST, player_router
+
+SEASON = "20252026"
+TEAM_ID = 9101
+
+
+@pytest.fixture(scope="module")
+def client(mapped_db):
+    with db_session:
+        team = Team(
+            id=TEAM_ID,
+            abbr="RRR",
+            name="Roster Route Testers",
+            conference=Conference(abbr="E"),
+            division=Division(abbr="A"),
+        )
+        # Inserted out of ID order: the roster must not depend on storage order.
+        for player_id, day in ((91013, 3), (91011, 1), (91012, 2)):
+            player = Player(id=player_id, last_updated=datetime(2025, 10, day, 12))
+            PlayerTeamSeason(player=player, team=team, season=SEASON)
+        # Fresh, so the routes never call the NHL API.
+        RosterRefresh(team=team, season=SEASON, refreshed_at=datetime.now())
+
+    app = FastAPI()
+    app.include_router(player_router, prefix="/players")
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clear_validators():
+    validators.invalidate()
+
+
+ROUTES = [
+    f"/players/players_by_team_id/?id={TEAM_ID}&season={SEASON}",
+    f"/players/players_by_team_name/?name=RRR&season={SEASON}",
+]
+
+
+@pytest.mark.parametrize("url", ROUTES)
+def test_roster_is_ordered_by_player_id(client, url):
+    roster = client.get(url).json()["roster"]
+
+    assert [player["id"] for player in roster] == [91011, 91012, 91013]
+
+
+@pytest.mark.parametrize("url", ROUTES)
+@pytest.mark.parametrize("stored", [True, False])
+def test_roster_if_none_match_returns_304(client, url, stored):
+    first = client.get(url)
+    assert first.status_code == 200
+    if not stored:
+        # Answered by rebuilding the body instead of from the stored validators.
+        validators.invalidate()
+
+    response = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == first.headers["etag"]
+
+
+@pytest.mark.parametrize("url", ROUTES)
+@pytest.mark.parametrize("stored", [True, False])
+def test_roster_if_modified_since_returns_304(client, url, stored):
+    first = client.get(url)
+    assert first.status_code == 200
+    # The newest last_updated on the roster.
+    assert first.headers["last-modified"] == http_date(datetime(2025, 10, 3, 12))
+    if not stored:
+        validators.invalidate()
+
+    response = client.get(
+        url, headers={"If-Modified-Since": first.headers["last-modified"]}
+    )
+
+    assert response.status_code == 304
+
+
+def test_roster_etag_is_stable(client):
+    first = client.get(ROUTES[0]).headers["etag"]
+    validators.invalidate()
+
+    assert client.get(ROUTES[0]).headers["etag"] == first
+
+
+def test_rosters_if_none_match_returns_304(client):
+    url = f"/players/rosters?team_ids={TEAM_ID}&season={SEASON}"
+    first = client.get(url)
+    assert first.status_code == 200
+    assert [p["id"] for p in first.json()["rosters"][str(TEAM_ID)]["roster"]] == [
+        91011,
+        91012,
+        91013,
+    ]
+
+    response = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+
+    assert response.status_code == 304
+
+
+def test_rosters_reports_missing_teams(client):
+    response = client.get(
+        f"/players/rosters?team_ids=9199,{TEAM_ID},9198,{TEAM_ID}&season={SEASON}"
+    )
+    content = response.json()
+
+    assert list(content["rosters"]) == [str(TEAM_ID)]
+    assert content["rosters"][str(TEAM_ID)]["count"] == 3
+    assert content["not_found"] == [9199, 9198]
+
+
+def _rosters_url(ids):
+    return f"/players/rosters?team_ids={','.join(map(str, ids))}&season={SEASON}"
+
+
+def test_rosters_accepts_at_most_32_teams(client):
+    ids = [TEAM_ID] + list(range(9200, 9200 + MAX_ROSTERS_PER_REQUEST - 1))
+
+    content = client.get(_rosters_url(ids)).json()
+    assert len(content["not_found"]) == MAX_ROSTERS_PER_REQUEST - 1
+
+    ids.append(9300)
+    content = client.get(_rosters_url(ids)).json()
+    assert content == {
+        "error": f"Between 1 and {MAX_ROSTERS_PER_REQUEST} team IDs are supported."
+    }
+
+
+@pytest.mark.parametrize("team_ids", ["", ",", "1,two"])
+def test_rosters_rejects_invalid_team_ids(client, team_ids):
+    content = client.get(f"/players/rosters?team_ids={team_ids}").json()
+
+    assert "error" in content
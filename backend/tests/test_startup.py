@@ -0,0 +1,24 @@
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Heavy optional dependencies that only some routes need; importing main (what
+# every worker does at start) must not load them (see benchmarks/bench_startup.py).
+DEFERRED_MODULES = ("numpy", "pyarrow")
+
+
+def test_main_import_defers_heavy_modules():
+    check = (
+        "import sys, main; "
+        f"print('loaded:', [m for m in {DEFERRED_MODULES!r} if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", check],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert "loaded: []" in result.stdout.splitlines()